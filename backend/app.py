@@ -5,54 +5,266 @@ This service provides endpoints to calculate memory requirements for LLM inferen
 based on model configurations and parameters.
 """
 
+import atexit
+import functools
+import gc
+import hashlib
+import json
 import os
-import re
-from typing import Any, Dict, List
+import threading
+import time
+from typing import Any, Callable, Dict, List
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
-from config.memory import DATA_TYPES, OPTIMIZERS, SFT_OR_PEFT
-from utils.help import load_predefined_models
-from utils.memory import calculate_inference_memory, calculate_training_memory
+try:
+    import uwsgi
+except ImportError:  # Not served by uWSGI (tests, scripts)
+    uwsgi = None
+
+from config.gpu import GPUS
+from config.memory import DATA_TYPES, DEFAULT_COEFFICIENTS, OPTIMIZERS, SFT_OR_PEFT
+from utils.calibration import load_profiles
+from utils.capacity import (
+    DEFAULT_LAYOUTS,
+    TARGET_UTILIZATION,
+    model_profile,
+    plan_capacity,
+    validate_target_utilization,
+    validate_traffic,
+)
+from utils.catalog_index import MAX_PAGE_SIZE, CatalogIndex, decode_cursor
+from utils.config_store import canonical_json
+from utils.disaggregation import DEFAULT_KV_TRANSFER_GBPS, DEFAULT_TENSOR_PARALLEL, plan_disaggregated
+from utils.help import catalog_versions, get_gpu_spec, load_catalog
+from utils.live import LiveSession, receive_until, serve_channel
+from utils.memory_timeline import simulate_training_step
+from utils.metrics import MetricsRegistry
+from utils.model_info import base_model_name, parse_active_size
+from utils.multi_lora import DEFAULT_HOST_TO_DEVICE_GBPS, DEFAULT_SIMULATED_REQUESTS, plan_multi_lora
+from utils.offload import DEFAULT_RAM_BANDWIDTH_GBPS, default_runtime, plan_layer_split, weight_bits
+from utils.peft import ADAPTER_PARAMETERS, PEFT_METHODS, resolve_peft_params
+from utils.pipeline import DEFAULT_VIRTUAL_STAGES, search_micro_batches, simulate_pipeline
+from utils.profiling import RequestProfiler, SamplingProfiler, is_authorized
+from utils.quantization import find_variants, recommend_quantization
+from utils.scenario import (
+    INFERENCE_PARAMETERS,
+    TRAINING_PARAMETERS,
+    coerce_parameter,
+    extract_model_params,
+    resolve_scenario,
+    run_inference_calculation,
+    run_training_calculation,
+)
+from utils.shared_cache import SharedCache, make_key, source_version
+from utils.streaming import NDJSON_MIMETYPE, grid_size, iter_grid, iter_rows, json_array_stream, ndjson_stream
+from utils.training_time import DEFAULT_MFU, estimate_training_time
+from utils.warmup import WARMUP_ENVIRON_KEY, prepare_for_fork, process_memory, warm_up
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all domains on all routes
 
+# Metrics, aggregated across uwsgi workers through METRICS_MULTIPROC_DIR when it is set
+METRICS = MetricsRegistry(os.environ.get("METRICS_MULTIPROC_DIR"))
+METRICS.init_multiproc_dir()
+os.register_at_fork(after_in_child=METRICS.after_fork)
+atexit.register(METRICS.flush)
+if uwsgi is not None:
+    # uWSGI workers may exit without running the atexit handlers
+    uwsgi.atexit = METRICS.flush
+
+# Opt-in profiling, gated by the PROFILING_TOKEN admin token
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN")
+PROFILER = RequestProfiler(os.environ.get("PROFILING_OUTPUT_DIR"))
+SAMPLER = (
+    SamplingProfiler(float(os.environ["PROFILING_SAMPLE_INTERVAL"]))
+    if os.environ.get("PROFILING_SAMPLE_INTERVAL")
+    else None
+)
+
+# Prefork warmup (see utils/warmup.py): no collection runs in the master until the shared state is frozen
+PREFORK_WARMUP = os.environ.get("PREFORK_WARMUP", "1") != "0"
+WARMUP: Dict[str, Any] = {"ready": False}
+if PREFORK_WARMUP:
+    gc.disable()
+
 # Configuration
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
-MODELS = load_predefined_models(MODELS_DIR)
+# Content-addressed config store, used instead of MODELS_DIR once it has a snapshot
+CONFIG_STORE_DIR = os.environ.get("CONFIG_STORE_DIR", os.path.join(os.path.dirname(__file__), "store"))
+_catalog_load_start = time.perf_counter()
+try:
+    MODELS = load_catalog(MODELS_DIR, CONFIG_STORE_DIR)
+except BaseException:
+    # prepare_for_fork re-enables the GC once the warmup is done; it never runs if the catalog fails to load
+    gc.enable()
+    raise
+METRICS.set_gauge("catalog_load_seconds", time.perf_counter() - _catalog_load_start)
+METRICS.set_gauge("catalog_models", len(MODELS))
+# Sorted once at startup instead of on every request
+MODEL_NAMES = sorted(MODELS)
+# SQLite index for faceted search and pagination, updated incrementally from the catalog
+CATALOG_INDEX = CatalogIndex(os.environ.get("CATALOG_INDEX_PATH", os.path.join(CONFIG_STORE_DIR, "catalog.sqlite")))
+CATALOG_INDEX.sync_models(MODELS, catalog_versions(MODELS_DIR, CONFIG_STORE_DIR))
+
+
+# Shared result cache for all uwsgi workers on the host, enabled by SHARED_CACHE_PATH
+SHARED_CACHE = (
+    SharedCache(
+        os.environ["SHARED_CACHE_PATH"],
+        buckets=int(os.environ.get("SHARED_CACHE_BUCKETS", 1024)),
+        ways=int(os.environ.get("SHARED_CACHE_WAYS", 8)),
+        slot_size=int(os.environ.get("SHARED_CACHE_SLOT_SIZE", 4096)),
+    )
+    if os.environ.get("SHARED_CACHE_PATH")
+    else None
+)
+# Calibration profiles fitted by llm-memory-calibrate, selected per request
+CALIBRATION_PROFILES = load_profiles(
+    os.environ.get("CALIBRATION_PROFILES_PATH", os.path.join(CONFIG_STORE_DIR, "calibration_profiles.json"))
+)
+# Cache keys include the catalog version, so a catalog change or rollback never serves stale results
+CATALOG_VERSION = hashlib.sha256(canonical_json(MODELS)).hexdigest()[:16]
+# ...and the code and coefficients version, since the shared cache file survives deploys
+CACHE_VERSION = make_key(
+    CATALOG_VERSION,
+    source_version([__file__, *(os.path.join(os.path.dirname(__file__), d) for d in ("config", "utils"))]),
+    DEFAULT_COEFFICIENTS,
+    CALIBRATION_PROFILES,
+).hex()
+
+
+def cached_json_response(key_parts: tuple, compute: Callable[[], Dict[str, Any]]) -> Response:
+    """Return ``compute()`` as a JSON response, served from the shared cache when possible."""
+    # A profiled request computes: a cache hit would profile nothing useful
+    if SHARED_CACHE is None or g.get("profiling"):
+        return jsonify(compute())
+    key = make_key(CACHE_VERSION, *key_parts)
+    body = SHARED_CACHE.get(key)
+    METRICS.record_cache("shared", body is not None)
+    if body is None:
+        body = app.json.dumps(compute()).encode()
+        SHARED_CACHE.set(key, body)
+    return Response(body, mimetype="application/json")
+
+
+def _calibration_coefficients(data: Dict[str, Any]) -> Dict[str, float] | None:
+    """Coefficients of the calibration profile selected by a request, None for the defaults."""
+    name = data.get("calibration_profile")
+    if name is None:
+        return None
+    if name not in CALIBRATION_PROFILES:
+        raise ValueError(f'Calibration profile "{name}" not found')
+    return CALIBRATION_PROFILES[name]["coefficients"]
+
+
+def _models_payload() -> Dict[str, Any]:
+    models = get_available_models()
+    return {"models": models, "count": len(models)}
 
 
 def get_available_models() -> List[str]:
     """Get list of available models."""
-    models = list(MODELS.keys())
-    return sorted(models)
-
-
-def extract_model_params(model_name: str, config: Dict[str, Any]) -> Dict[str, Any]:
-    # 正则表达式：匹配一个数字（可能带小数点），后面跟着 'B' 或 'M'，不区分大小写
-    # \d+(\.\d+)?  -> 匹配整数或小数
-    # (B|M)        -> 匹配 'B' 或 'M'
-    pattern = re.compile(r"\d+(\.\d+)?(B|M)", re.IGNORECASE)
-    match = pattern.search(model_name)
-    if match:
-        model_size = float(match.group(0)[:-1])
-    else:
-        model_size = None
-    return {
-        "model_size": model_size,
-        "precision": config.get("torch_dtype", "float32"),
-        "num_hidden_layers": config.get("num_hidden_layers", 36),
-        "hidden_size": config.get("hidden_size", 4096),
-        "num_attention_heads": config.get("num_attention_heads", 32),
-        "head_dim": config.get("head_dim", 128),
-        "num_key_value_heads": config.get(
-            "num_key_value_heads", config.get("num_attention_heads", 32)
-        ),  # MHA 的 KV 头数等于查询头数
-        "use_flash_attention": False,
-        "use_page_attention": False,
-    }
+    return MODEL_NAMES
+
+
+# Upper bound on the number of rows a single grid request may produce
+MAX_GRID_ROWS = int(os.environ.get("MAX_GRID_ROWS", 1_000_000))
+# Live channels open at once per worker; each holds a worker thread for as long as it is open
+LIVE_MAX_CHANNELS = int(os.environ.get("LIVE_MAX_CHANNELS", 2))
+LIVE_CHANNELS = threading.BoundedSemaphore(LIVE_MAX_CHANNELS)
+# Lifetime of a live channel, kept below the uWSGI harakiri (see uwsgi.ini): the client reopens on its next edit
+LIVE_CHANNEL_SECONDS = float(os.environ.get("LIVE_CHANNEL_SECONDS", 25))
+
+
+@app.before_request
+def start_request_timer():
+    # Warmup requests run in the master before the fork and are not traffic
+    if not request.environ.get(WARMUP_ENVIRON_KEY):
+        g.request_start_time = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop("request_start_time", None)
+    if start is not None:
+        METRICS.record_request(
+            route=request.url_rule.rule if request.url_rule is not None else "<unmatched>",
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - start,
+            request_size=request.content_length or 0,
+            response_size=response.calculate_content_length() or 0,
+        )
+    return response
+
+
+def _is_admin_request() -> bool:
+    # Header only: a query parameter would write the token into the access log with the URI
+    token = request.headers.get("X-Profile-Token")
+    return is_authorized(token, PROFILING_TOKEN)
+
+
+@app.before_request
+def start_request_profiling():
+    if request.environ.get(WARMUP_ENVIRON_KEY):
+        return
+    if SAMPLER is not None:
+        SAMPLER.ensure_started()
+    if PROFILING_TOKEN:
+        # Profiles are process-wide: only a request alone in its worker can be profiled
+        PROFILER.request_started()
+        g.profiler_counted = True
+    if _is_admin_request():
+        g.profiling = PROFILER.start()
+        if not g.profiling:
+            g.profile_skipped = True
+
+
+@app.after_request
+def attach_request_profile(response):
+    if g.pop("profile_skipped", False):
+        response.headers["X-Profile-Skipped"] = "another request is profiled or in flight"
+    if not g.pop("profiling", False):
+        return response
+    if response.is_streamed:
+        # The body is produced after this hook: profile it as it streams, the report goes to PROFILING_OUTPUT_DIR
+        response.headers["X-Profile-Id"] = PROFILER.profile_id
+        response.response = PROFILER.profile_stream(response.response)
+        return response
+    report = PROFILER.stop()
+    response.headers["X-Profile-Id"] = report["profile_id"]
+    data = response.get_json(silent=True) if response.is_json else None
+    if isinstance(data, dict):
+        data["profile"] = report
+        response.set_data(json.dumps(data))
+    return response
+
+
+@app.teardown_request
+def stop_request_profiling(error=None):
+    # after_request is skipped when a handler raises, make sure the profiler is released
+    if g.pop("profiling", False):
+        PROFILER.stop()
+    if g.pop("profiler_counted", False):
+        PROFILER.request_finished()
+
+
+@app.route("/admin/profile/samples", methods=["GET"])
+def get_profile_samples():
+    """Get sampled stacks of this worker in the folded format (flamegraph.pl, speedscope)."""
+    if not _is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if SAMPLER is None:
+        return jsonify({"error": "Sampling profiler is disabled, set PROFILING_SAMPLE_INTERVAL"}), 404
+    return Response(SAMPLER.folded(), mimetype="text/plain")
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/health", methods=["GET"])
@@ -61,16 +273,83 @@ def health_check():
     return jsonify({"status": "healthy", "service": "LLM Memory Calculator API", "version": "1.0.0"})
 
 
+@app.route("/ready", methods=["GET"])
+def readiness_check():
+    """
+    Readiness endpoint: 200 once the warmup requests succeeded, with the memory of this worker.
+
+    The warmup runs in the master before the fork; with PREFORK_WARMUP=0 each worker runs it on its first
+    probe instead. Returns 503 with the failed requests when the warmup failed.
+    """
+    if not PREFORK_WARMUP:
+        _warm_up_worker()
+    body = {**WARMUP, "pid": os.getpid(), "worker_memory": process_memory()}
+    return jsonify(body), 200 if WARMUP["ready"] else 503
+
+
 @app.route("/api/models", methods=["GET"])
 def list_models():
-    """Get list of available models."""
+    """
+    Get list of available models.
+
+    Without query parameters, returns every model name. Query parameters enable search and pagination:
+    - family, quantization, base_model: Facet filters (comma separated or repeated)
+    - moe: true/false
+    - min_params, max_params: Parameter count bounds in billions
+    - min_context, max_context: Context length bounds
+    - q: Full-text search over name tokens
+    - prefix: Model name prefix
+    - limit, cursor: Page size and the next_cursor of the previous page
+    """
     try:
-        models = get_available_models()
-        return jsonify({"models": models, "count": len(models)})
+        if not request.args:
+            return cached_json_response(("models",), _models_payload)
+        try:
+            query = _parse_catalog_query(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return cached_json_response(("models", query), lambda: _search_models_payload(query))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _parse_catalog_query(args) -> Dict[str, Any]:
+    filters: Dict[str, Any] = {}
+    for key in ("family", "quantization", "base_model"):
+        values = [v for value in args.getlist(key) for v in value.split(",") if v]
+        if values:
+            filters[key] = values
+    if "moe" in args:
+        if args["moe"].lower() not in ("true", "false", "1", "0"):
+            raise ValueError("moe must be true or false")
+        filters["is_moe"] = args["moe"].lower() in ("true", "1")
+    for key, cast in (("min_params", float), ("max_params", float), ("min_context", int), ("max_context", int)):
+        if key in args:
+            try:
+                filters[key] = cast(args[key])
+            except ValueError:
+                raise ValueError(f"{key} must be a number") from None
+    try:
+        limit = int(args.get("limit", 100))
+    except ValueError:
+        raise ValueError("limit must be an integer") from None
+    if args.get("cursor"):
+        decode_cursor(args["cursor"])
+    return {
+        "filters": filters,
+        "q": args.get("q"),
+        "prefix": args.get("prefix"),
+        "cursor": args.get("cursor"),
+        "limit": limit,
+    }
+
+
+def _search_models_payload(query: Dict[str, Any]) -> Dict[str, Any]:
+    result = CATALOG_INDEX.query(**query)
+    result["models"] = [item["name"] for item in result["items"]]
+    return result
+
+
 @app.route("/api/models/<model_name>", methods=["GET"])
 def get_model_info(model_name: str):
     """Get detailed information about a specific model."""
@@ -98,6 +377,7 @@ def calculate_inference():
     - kv_cache_precision: Data type precision for KV cache
     - use_flash_attention: Whether to use Flash Attention
     - use_page_attention: Whether to use Page Attention
+    - calibration_profile: Name of a calibration profile whose fitted coefficients replace the defaults
     """
     try:
         data = request.get_json()
@@ -115,33 +395,24 @@ def calculate_inference():
         model_name = data["model_name"]
         config = MODELS[model_name]
         params = extract_model_params(model_name, config)
-        for key in [
-            "precision",
-            "batch_size",
-            "sequence_length",
-            "kv_cache_precision",
-            "use_flash_attention",
-            "use_page_attention",
-        ]:
+        for key in INFERENCE_PARAMETERS:
             if key in data:
                 params[key] = data[key]
         if params.get("precision") not in DATA_TYPES:
             return jsonify({"error": f"Invalid precision. Must be one of: {DATA_TYPES}"}), 400
-        result = calculate_inference_memory(
-            model_size=params["model_size"],
-            precision=params["precision"],
-            batch_size=params["batch_size"],
-            sequence_length=params["sequence_length"],
-            kv_cache_precision=params["kv_cache_precision"],
-            num_hidden_layers=params["num_hidden_layers"],
-            hidden_size=params["hidden_size"],
-            num_attention_heads=params["num_attention_heads"],
-            head_dim=params["head_dim"],
-            num_key_value_heads=params["num_key_value_heads"],
-            use_flash_attention=params["use_flash_attention"],
-            use_page_attention=params["use_page_attention"],
+        try:
+            coefficients = _calibration_coefficients(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return cached_json_response(
+            ("inference", params, coefficients),
+            lambda: {
+                "calculation_type": "inference",
+                "parameters": params,
+                "calibration_profile": data.get("calibration_profile"),
+                "memory_requirements": run_inference_calculation(params, coefficients),
+            },
         )
-        return jsonify({"calculation_type": "inference", "parameters": params, "memory_requirements": result})
     except FileNotFoundError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
@@ -159,8 +430,15 @@ def calculate_training():
     - batch_size: Batch size for training
     - sequence_length: Input sequence length
     - optimizer: Optimizer type
-    - trainable_parameters: Percentage of trainable parameters
+    - trainable_parameters: Percentage of trainable parameters (SFT only)
     - use_flash_attention: Whether to use Flash Attention
+    - method: SFT (default), LoRA or QLoRA
+    - lora_rank, lora_alpha: LoRA rank (default: 16) and alpha (default: 32)
+    - target_modules: LoRA target modules or "all-linear" (default: attention projections)
+    - adapter_precision: Precision of the adapter weights and gradients (default: float32)
+    - double_quantization: QLoRA double quantization of the NF4 constants (default: true)
+    - paged_optimizer: Whether the optimizer state is paged (default: true for QLoRA)
+    - calibration_profile: Name of a calibration profile whose fitted coefficients replace the defaults
     """
     try:
         data = request.get_json()
@@ -174,58 +452,752 @@ def calculate_training():
             return jsonify({"error": "sequence_length is required"}), 400
         if "optimizer" not in data:
             return jsonify({"error": "optimizer is required"}), 400
-        if "trainable_parameters" not in data:
+        if "trainable_parameters" not in data and data.get("method", "SFT") not in PEFT_METHODS:
             return jsonify({"error": "trainable_parameters is required"}), 400
 
         model_name = data["model_name"]
         config = MODELS[model_name]
         params = extract_model_params(model_name, config)
-        for key in [
-            "precision",
-            "batch_size",
-            "sequence_length",
-            "optimizer",
-            "trainable_parameters",
-            "use_flash_attention",
-        ]:
+        for key in TRAINING_PARAMETERS:
             if key in data:
                 params[key] = data[key]
         if params.get("precision") not in DATA_TYPES:
             return jsonify({"error": f"Invalid precision. Must be one of: {DATA_TYPES}"}), 400
         if params.get("optimizer") not in OPTIMIZERS:
             return jsonify({"error": f"Invalid optimizer. Must be one of: {OPTIMIZERS}"}), 400
+        if params.get("method", "SFT") not in SFT_OR_PEFT:
+            return jsonify({"error": f"Invalid method. Must be one of: {SFT_OR_PEFT}"}), 400
+        if params.get("method") in PEFT_METHODS:
+            try:
+                resolve_peft_params(params, config)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        try:
+            coefficients = _calibration_coefficients(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        result = calculate_training_memory(
-            model_size=params["model_size"],
-            precision=params["precision"],
-            batch_size=params["batch_size"],
-            sequence_length=params["sequence_length"],
-            num_hidden_layers=params["num_hidden_layers"],
-            hidden_size=params["hidden_size"],
-            num_attention_heads=params["num_attention_heads"],
-            head_dim=params["head_dim"],
-            num_key_value_heads=params["num_key_value_heads"],
-            optimizer=params["optimizer"],
-            trainable_parameters=params["trainable_parameters"],
-            use_flash_attention=params["use_flash_attention"],
+        return cached_json_response(
+            ("training", params, coefficients),
+            lambda: {
+                "calculation_type": "training",
+                "parameters": params,
+                "calibration_profile": data.get("calibration_profile"),
+                "memory_requirements": run_training_calculation(params, coefficients),
+            },
         )
-        return jsonify({"calculation_type": "training", "parameters": params, "memory_requirements": result})
     except FileNotFoundError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _stream_grid(
+    calculation_type: str,
+    parameter_keys: List[str],
+    required: List[str],
+    calculate: Callable[[Dict[str, Any]], Dict[str, Any]],
+):
+    """Validate a grid request and stream one row per parameter combination."""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Request body is required"}), 400
+    grid = data.get("grid")
+    if not isinstance(grid, dict) or not grid:
+        return jsonify({"error": "grid is required"}), 400
+    for key, values in grid.items():
+        if key not in parameter_keys:
+            return jsonify({"error": f"Invalid grid key {key}. Must be one of: {parameter_keys}"}), 400
+        if not isinstance(values, list) or not values:
+            return jsonify({"error": f"grid.{key} must be a non-empty list"}), 400
+    # Every value is converted and checked up front: a row failing mid-stream would truncate a 200 response
+    try:
+        grid = {key: [coerce_parameter(key, value) for value in values] for key, values in grid.items()}
+        overrides = {key: coerce_parameter(key, data[key]) for key in parameter_keys if key in data}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    methods = grid.get("method", [overrides.get("method", "SFT")]) if "method" in parameter_keys else []
+    # LoRA / QLoRA rows derive trainable_parameters from the adapter shapes; SFT rows need it
+    peft_only = bool(methods) and all(method in PEFT_METHODS for method in methods)
+    for key in required:
+        if key not in data and key not in grid and not (peft_only and key == "trainable_parameters"):
+            return jsonify({"error": f"{key} is required"}), 400
+    rows = grid_size(grid)
+    if rows > MAX_GRID_ROWS:
+        return jsonify({"error": f"Grid too large: {rows} rows (max {MAX_GRID_ROWS})"}), 400
+
+    model_name = data["model_name"]
+    if model_name not in MODELS:
+        return jsonify({"error": f'Model "{model_name}" not found'}), 404
+    config = MODELS[model_name]
+    params = {**extract_model_params(model_name, config), **overrides}
+    if "precision" not in grid and params.get("precision") not in DATA_TYPES:
+        return jsonify({"error": f"Invalid precision. Must be one of: {DATA_TYPES}"}), 400
+    if "optimizer" in parameter_keys and "optimizer" not in grid and params.get("optimizer") not in OPTIMIZERS:
+        return jsonify({"error": f"Invalid optimizer. Must be one of: {OPTIMIZERS}"}), 400
+    if any(method in PEFT_METHODS for method in methods):
+        # Every adapter setting of the grid is checked before the first row is streamed
+        peft_grid = {key: grid[key] for key in ADAPTER_PARAMETERS if key in grid}
+        try:
+            for combination in iter_grid(params, peft_grid):
+                if combination.get("method") in PEFT_METHODS:
+                    resolve_peft_params(combination, config)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        calculate = functools.partial(calculate, config=config)
+    try:
+        coefficients = _calibration_coefficients(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if coefficients is not None:
+        calculate = functools.partial(calculate, coefficients=coefficients)
+
+    header = {"calculation_type": calculation_type, "parameters": params, "count": rows}
+    if coefficients is not None:
+        header["calibration_profile"] = data["calibration_profile"]
+    row_iter = iter_rows(params, grid, calculate)
+    accept = request.headers.get("Accept", "")
+    if request.args.get("format") == "ndjson" or NDJSON_MIMETYPE in accept:
+        return Response(ndjson_stream(header, row_iter), mimetype=NDJSON_MIMETYPE)
+    return Response(json_array_stream(header, row_iter), mimetype="application/json")
+
+
+@app.route("/api/memory/inference/grid", methods=["POST"])
+def calculate_inference_grid():
+    """
+    Stream inference memory requirements over a parameter grid.
+
+    Request body accepts the same fields as /api/memory/inference, plus:
+    - grid: Mapping of parameter name to a list of values, e.g. {"batch_size": [1, 8], "sequence_length": [2048, 8192]}
+
+    The response is a streamed JSON document with a "rows" array, or newline-delimited JSON
+    (header line, then one row per line) with ?format=ndjson or "Accept: application/x-ndjson".
+    """
+    try:
+        return _stream_grid(
+            "inference",
+            INFERENCE_PARAMETERS,
+            ["model_name", "batch_size", "sequence_length", "kv_cache_precision"],
+            run_inference_calculation,
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/memory/training/grid", methods=["POST"])
+def calculate_training_grid():
+    """
+    Stream training memory requirements over a parameter grid.
+
+    Request body accepts the same fields as /api/memory/training, plus a "grid" mapping
+    (see /api/memory/inference/grid for the response formats).
+    """
+    try:
+        return _stream_grid(
+            "training",
+            TRAINING_PARAMETERS,
+            ["model_name", "batch_size", "sequence_length", "optimizer", "trainable_parameters"],
+            run_training_calculation,
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/memory/inference/multi_lora", methods=["POST"])
+def calculate_multi_lora():
+    """
+    Calculate inference memory with many LoRA adapters served on one base model, and simulate the
+    LRU adapter cache in GPU memory.
+
+    Request body accepts the same fields as /api/memory/inference (kv_cache_precision defaults to the
+    model precision), plus:
+    - adapters: Adapter groups, e.g. [{"count": 100, "rank": 16, "target_modules": "all-linear"}] (at most
+      MAX_ADAPTERS adapters in total)
+    - popularity: "uniform" (default), "zipf", {"distribution": "zipf", "exponent": 1.2} or {"weights": [...]}
+    - max_loras: Adapters resident in GPU memory at once (default: all)
+    - adapter_precision: Precision of the adapter weights (default: the model precision)
+    - requests_per_second: Request rate, to report the swap bandwidth
+    - host_to_device_gbps: Host to GPU copy bandwidth in GB/s (default: 25)
+    - gpu: GPU id or name, or memory_budget_gb, to report the KV cache capacity lost to adapters
+    - num_gpus: Number of GPUs (default: 1)
+    - num_requests: Requests to simulate (default: 10000)
+    - seed: Seed of the simulated request stream (default: 0)
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        for key in ("model_name", "batch_size", "sequence_length", "adapters"):
+            if key not in data:
+                return jsonify({"error": f"{key} is required"}), 400
+        model_name = data["model_name"]
+        if model_name not in MODELS:
+            return jsonify({"error": f'Model "{model_name}" not found'}), 404
+        try:
+            scenario = {**data}
+            scenario.setdefault("kv_cache_precision", data.get("precision") or MODELS[model_name].get("torch_dtype"))
+            params = resolve_scenario("inference", scenario, MODELS)
+            gpu = get_gpu_spec(data["gpu"]) if "gpu" in data else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        num_gpus = int(data.get("num_gpus", 1))
+        memory_budget_gb = data.get("memory_budget_gb") or (gpu["memory_gb"] if gpu else None)
+
+        def compute():
+            result = plan_multi_lora(
+                params,
+                MODELS[model_name],
+                data["adapters"],
+                popularity=data.get("popularity"),
+                max_loras=data.get("max_loras"),
+                adapter_precision=data.get("adapter_precision"),
+                requests_per_second=data.get("requests_per_second"),
+                host_to_device_gbps=float(data.get("host_to_device_gbps", DEFAULT_HOST_TO_DEVICE_GBPS)),
+                memory_budget_gb=float(memory_budget_gb) * num_gpus if memory_budget_gb else None,
+                num_requests=int(data.get("num_requests", DEFAULT_SIMULATED_REQUESTS)),
+                seed=int(data.get("seed", 0)),
+            )
+            return {"calculation_type": "inference", "parameters": params, "gpu": gpu, **result}
+
+        try:
+            return cached_json_response(("multi_lora", data), compute)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/offload/plan", methods=["POST"])
+def plan_offload():
+    """
+    Plan the GPU/CPU layer split (llama.cpp n_gpu_layers) of a GGUF or MLX deployment.
+
+    Request body should contain:
+    - model_name: Catalog model; "-GGUF" names use the config of their base model
+    - sequence_length: Context length of the KV cache
+    - gpu: GPU id or name; Apple Silicon entries use the unified memory model
+    - or gpu_memory_gb and gpu_bandwidth_gbps, with unified_memory (default: false)
+    - ram_gb: System RAM in GB (required for discrete GPUs)
+    - ram_bandwidth_gbps: System RAM bandwidth in GB/s (default: 76.8)
+    Optional:
+    - batch_size: Concurrent sequences (default: 1)
+    - kv_cache_precision: KV cache precision (default: float16)
+    - gguf_quant: GGUF quantization type, e.g. Q4_K_M (default for GGUF models)
+    - bits_per_weight: Effective bits per weight, overrides the detected quantization
+    - runtime: "llama.cpp" or "mlx" (default: mlx for MLX models)
+    - gpu_memory_limit_gb: GPU working set limit on unified memory (default: the macOS default)
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        for key in ("model_name", "sequence_length"):
+            if key not in data:
+                return jsonify({"error": f"{key} is required"}), 400
+        if "gpu" not in data and (data.get("gpu_memory_gb") is None or data.get("gpu_bandwidth_gbps") is None):
+            return jsonify({"error": "gpu or gpu_memory_gb and gpu_bandwidth_gbps are required"}), 400
+        model_name = data["model_name"]
+        config_name = model_name if model_name in MODELS else base_model_name(model_name)
+        if config_name not in MODELS or not (model_name in MODELS or model_name.upper().endswith("-GGUF")):
+            return jsonify({"error": f'Model "{model_name}" not found'}), 404
+        config = MODELS[config_name]
+        try:
+            scenario = {"kv_cache_precision": "float16", "batch_size": 1, **data, "model_name": config_name}
+            params = resolve_scenario("inference", scenario, MODELS)
+            gpu = get_gpu_spec(data["gpu"]) if "gpu" in data else None
+            if "bits_per_weight" in data:
+                bits = float(data["bits_per_weight"])
+            else:
+                bits = weight_bits(model_name, config, data.get("gguf_quant"))
+            # Explicit values override the GPU spec, 0 included (rejected by plan_layer_split)
+            gpu_memory_gb = float(data["gpu_memory_gb"] if data.get("gpu_memory_gb") is not None else gpu["memory_gb"])
+            gpu_bandwidth_gbps = float(
+                data["gpu_bandwidth_gbps"] if data.get("gpu_bandwidth_gbps") is not None else gpu["bandwidth_gbps"]
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        unified = gpu["category"] == "Apple Silicon" if gpu else bool(data.get("unified_memory", False))
+
+        def compute():
+            plan = plan_layer_split(
+                params,
+                config,
+                bits,
+                gpu_memory_gb=gpu_memory_gb,
+                gpu_bandwidth_gbps=gpu_bandwidth_gbps,
+                ram_gb=float(data["ram_gb"]) if data.get("ram_gb") is not None else None,
+                ram_bandwidth_gbps=float(data.get("ram_bandwidth_gbps", DEFAULT_RAM_BANDWIDTH_GBPS)),
+                unified=unified,
+                gpu_memory_limit_gb=data.get("gpu_memory_limit_gb"),
+                runtime=data.get("runtime") or default_runtime(model_name),
+            )
+            return {"model_name": model_name, "parameters": params, "gpu": gpu, **plan}
+
+        try:
+            return cached_json_response(("offload_plan", data), compute)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/recommend/quantization", methods=["POST"])
+def recommend_quantization_options():
+    """
+    Recommend weight / KV cache precisions and attention options that fit a GPU or memory budget.
+
+    Request body should contain:
+    - model_name: Name of model configuration to use
+    - gpu: GPU id or name (see config/gpu.py), or
+    - memory_budget_gb: Memory available for the model in GB
+    - num_gpus: Number of GPUs (default: 1)
+    - batch_size: Target batch size
+    - sequence_length: Target context length
+    - include_all: Return every fitting combination instead of only the highest-fidelity ones
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        for key in ("model_name", "batch_size", "sequence_length"):
+            if key not in data:
+                return jsonify({"error": f"{key} is required"}), 400
+        if "gpu" not in data and "memory_budget_gb" not in data:
+            return jsonify({"error": "gpu or memory_budget_gb is required"}), 400
+
+        model_name = data["model_name"]
+        if model_name not in MODELS:
+            return jsonify({"error": f'Model "{model_name}" not found'}), 404
+        try:
+            gpu = get_gpu_spec(data["gpu"]) if "gpu" in data else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        num_gpus = int(data.get("num_gpus", 1))
+        memory_budget_gb = float(data.get("memory_budget_gb") or gpu["memory_gb"]) * num_gpus
+        params = extract_model_params(model_name, MODELS[model_name])
+        params.update(batch_size=int(data["batch_size"]), sequence_length=int(data["sequence_length"]))
+        if params["model_size"] is None:
+            return jsonify({"error": f'Cannot infer the parameter count of "{model_name}"'}), 400
+
+        def compute():
+            siblings = CATALOG_INDEX.query(
+                filters={"base_model": [base_model_name(model_name)]}, limit=MAX_PAGE_SIZE, with_facets=False
+            )["items"]
+            variants = find_variants(model_name, {s["name"]: s for s in siblings}, gpu["category"] if gpu else None)
+            result = recommend_quantization(
+                params,
+                memory_budget_gb,
+                bandwidth_gbps=gpu["bandwidth_gbps"] * num_gpus if gpu else None,
+                active_model_size=parse_active_size(model_name),
+                variants=variants,
+                include_all=bool(data.get("include_all", False)),
+            )
+            return {
+                "model_name": model_name,
+                "base_model": base_model_name(model_name),
+                "gpu": gpu,
+                "num_gpus": num_gpus,
+                "memory_budget_gb": memory_budget_gb,
+                "parameters": params,
+                "variants": variants,
+                **result,
+            }
+
+        return cached_json_response(("recommend_quantization", data), compute)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/capacity/plan", methods=["POST"])
+def plan_fleet_capacity():
+    """
+    Plan replicas and GPUs for a traffic profile over candidate models, GPUs and parallel layouts.
+
+    Request body should contain:
+    - qps: Peak requests per second
+    - prompt_tokens: Prompt length percentiles, e.g. {"p50": 512, "p99": 4096}
+    - output_tokens: Output length percentiles
+    - slo: Latency SLOs {"ttft_ms": ..., "tpot_ms": ...} (optional)
+    - models: Candidate model names (default: every non-quantized catalog model)
+    - gpus: Candidate GPU ids or names (default: every GPU in config/gpu.py)
+    - layouts: [tensor_parallel, pipeline_parallel] pairs (optional)
+    - kv_cache_precision: KV cache precision (default: the model precision)
+    - target_utilization: Highest acceptable load as a fraction of capacity (default: 0.8)
+    - best_layout_only: Keep only the best layout per model and GPU (default: true)
+    - include_infeasible: Also return rejected candidates with their reason (default: false)
+    - limit: Maximum number of plans returned (default: 100)
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        traffic = {key: data.get(key) for key in ("qps", "prompt_tokens", "output_tokens", "slo")}
+        try:
+            validate_traffic(traffic)
+            gpus = {spec["id"]: spec for spec in (get_gpu_spec(gpu) for gpu in data.get("gpus") or GPUS)}
+            layouts = [tuple(int(x) for x in layout) for layout in data.get("layouts") or DEFAULT_LAYOUTS]
+            if any(len(layout) != 2 or min(layout) < 1 for layout in layouts):
+                raise ValueError("layouts must be [tensor_parallel, pipeline_parallel] pairs of positive integers")
+            target_utilization = validate_target_utilization(data.get("target_utilization", TARGET_UTILIZATION))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        model_names = data.get("models") or CATALOG_INDEX.names({"quantization": ["none"]})
+        unknown = [name for name in model_names if name not in MODELS]
+        if unknown:
+            return jsonify({"error": f"Models not found: {unknown}"}), 404
+        kv_cache_precision = data.get("kv_cache_precision")
+        if kv_cache_precision is not None and kv_cache_precision not in DATA_TYPES:
+            return jsonify({"error": f"Invalid kv_cache_precision. Must be one of: {DATA_TYPES}"}), 400
+
+        def compute():
+            profiles = {}
+            for name in model_names:
+                params = extract_model_params(name, MODELS[name])
+                if params["model_size"] is None or params["precision"] not in DATA_TYPES:
+                    continue
+                profiles[name] = model_profile(
+                    params, kv_cache_precision or params["precision"], parse_active_size(name)
+                )
+            result = plan_capacity(
+                profiles,
+                {gpu_id: gpu for gpu_id, gpu in gpus.items() if gpu["memory_gb"] > 0},
+                traffic,
+                layouts,
+                target_utilization,
+                best_layout_only=bool(data.get("best_layout_only", True)),
+                include_infeasible=bool(data.get("include_infeasible", False)),
+            )
+            result["count"] = len(result["plans"])
+            result["plans"] = result["plans"][: int(data.get("limit", 100))]
+            return {"traffic": traffic, **result}
+
+        return cached_json_response(("capacity_plan", data), compute)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/capacity/disaggregated", methods=["POST"])
+def plan_disaggregated_serving():
+    """
+    Size separate prefill and decode pools for a traffic profile and compare them with co-located serving.
+
+    Request body should contain:
+    - model_name: Catalog model
+    - qps, prompt_tokens, output_tokens, slo: Traffic profile, as in /api/capacity/plan
+    - gpu: GPU id or name of both pools, or prefill_gpu and decode_gpu
+    Optional:
+    - prefill_tensor_parallel / decode_tensor_parallel: Tensor parallel degrees to evaluate (default: 1, 2, 4, 8)
+    - kv_transfer_gbps: KV transfer bandwidth of an instance in GB/s (default: 50)
+    - kv_cache_precision: KV cache precision (default: the model precision)
+    - target_utilization: Highest acceptable load as a fraction of capacity (default: 0.8)
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        if "model_name" not in data:
+            return jsonify({"error": "model_name is required"}), 400
+        model_name = data["model_name"]
+        if model_name not in MODELS:
+            return jsonify({"error": f'Model "{model_name}" not found'}), 404
+        traffic = {key: data.get(key) for key in ("qps", "prompt_tokens", "output_tokens", "slo")}
+        try:
+            validate_traffic(traffic)
+            target_utilization = validate_target_utilization(data.get("target_utilization", TARGET_UTILIZATION))
+            if "gpu" not in data and not ("prefill_gpu" in data and "decode_gpu" in data):
+                raise ValueError("gpu or prefill_gpu and decode_gpu are required")
+            prefill_gpu = get_gpu_spec(data.get("prefill_gpu") or data["gpu"])
+            decode_gpu = get_gpu_spec(data.get("decode_gpu") or data["gpu"])
+            tensor_parallel = {}
+            for pool in ("prefill", "decode"):
+                degrees = data.get(f"{pool}_tensor_parallel") or DEFAULT_TENSOR_PARALLEL
+                tensor_parallel[pool] = [int(tp) for tp in ([degrees] if isinstance(degrees, int) else degrees)]
+                if not tensor_parallel[pool] or min(tensor_parallel[pool]) < 1:
+                    raise ValueError(f"{pool}_tensor_parallel must be positive integers")
+            params = extract_model_params(model_name, MODELS[model_name])
+            kv_cache_precision = data.get("kv_cache_precision") or params["precision"]
+            if params["model_size"] is None:
+                raise ValueError("model_size cannot be parsed from the model name")
+            if kv_cache_precision not in DATA_TYPES or params["precision"] not in DATA_TYPES:
+                raise ValueError(f"Invalid kv_cache_precision. Must be one of: {DATA_TYPES}")
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        def compute():
+            result = plan_disaggregated(
+                model_profile(params, kv_cache_precision, parse_active_size(model_name)),
+                prefill_gpu,
+                decode_gpu,
+                traffic,
+                tensor_parallel["prefill"],
+                tensor_parallel["decode"],
+                kv_transfer_gbps=float(data.get("kv_transfer_gbps", DEFAULT_KV_TRANSFER_GBPS)),
+                target_utilization=target_utilization,
+            )
+            return {
+                "model_name": model_name,
+                "traffic": traffic,
+                "prefill_gpu": prefill_gpu,
+                "decode_gpu": decode_gpu,
+                **result,
+            }
+
+        try:
+            return cached_json_response(("disaggregated_plan", data), compute)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/training/estimate", methods=["POST"])
+def estimate_training():
+    """
+    Estimate training step time, throughput, wall-clock time and cost, next to the training memory.
+
+    Request body should contain the /api/memory/training fields, plus:
+    - gpu: GPU id or name (see config/gpu.py), or
+    - peak_tflops: Dense BF16/FP16 peak of one GPU in TFLOPS
+    - num_gpus: Data parallel size (default: 1)
+    - method: One of SFT_OR_PEFT, selects the default MFU (default: SFT)
+    - mfu: Model FLOPs utilization, overrides the method default
+    - gradient_accumulation_steps: Micro-batches per optimizer step (default: 1)
+    - dataset_tokens or dataset_samples: Dataset size per epoch (samples are sequence_length tokens each)
+    - epochs: Number of epochs (default: 1)
+    - activation_checkpointing: Whether activations are recomputed (default: false)
+    - allreduce_bandwidth_gbps: Gradient all-reduce bus bandwidth; omit to assume it overlaps with compute
+    - gpu_hour_price: Price of one GPU hour, for the cost estimate
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        if "model_name" in data and data["model_name"] not in MODELS:
+            return jsonify({"error": f'Model "{data["model_name"]}" not found'}), 404
+        method = data.get("method", "SFT")
+        try:
+            params = resolve_scenario("training", data, MODELS)
+            if method not in SFT_OR_PEFT:
+                raise ValueError(f"Invalid method. Must be one of: {SFT_OR_PEFT}")
+            if "peak_tflops" in data:
+                gpu, peak_tflops = None, float(data["peak_tflops"])
+            elif "gpu" in data:
+                gpu = get_gpu_spec(data["gpu"])
+                peak_tflops = gpu["fp16_tflops"]
+            else:
+                raise ValueError("gpu or peak_tflops is required")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        dataset_tokens = data.get("dataset_tokens")
+        if dataset_tokens is None and data.get("dataset_samples") is not None:
+            dataset_tokens = float(data["dataset_samples"]) * params["sequence_length"]
+
+        def compute():
+            estimate = estimate_training_time(
+                params,
+                peak_tflops,
+                data_parallel_size=int(data.get("num_gpus", 1)),
+                mfu=float(data.get("mfu", DEFAULT_MFU[method])),
+                gradient_accumulation_steps=int(data.get("gradient_accumulation_steps", 1)),
+                dataset_tokens=float(dataset_tokens) if dataset_tokens is not None else None,
+                epochs=float(data.get("epochs", 1)),
+                active_model_size=parse_active_size(data.get("model_name") or ""),
+                activation_checkpointing=bool(data.get("activation_checkpointing", False)),
+                allreduce_bandwidth_gbps=data.get("allreduce_bandwidth_gbps"),
+                gpu_hour_price=data.get("gpu_hour_price"),
+            )
+            return {
+                "calculation_type": "training_estimate",
+                "method": method,
+                "gpu": gpu,
+                "parameters": params,
+                "memory_requirements": run_training_calculation(params),
+                "performance": estimate,
+            }
+
+        return cached_json_response(("training_estimate", data), compute)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/training/timeline", methods=["POST"])
+def simulate_training_timeline():
+    """
+    Simulate the memory of one training step layer by layer and report its transient peak.
+
+    Request body should contain the /api/memory/training fields, plus:
+    - activation_checkpointing: Whether activations are recomputed in backward (default: false)
+    - zero_stage: ZeRO stage, 0 to 3 (default: 0)
+    - num_gpus: Data parallel size the ZeRO state is sharded across (default: 1)
+    - include_timeline: Return the memory-vs-time curve (default: true)
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        if "model_name" in data and data["model_name"] not in MODELS:
+            return jsonify({"error": f'Model "{data["model_name"]}" not found'}), 404
+        try:
+            params = resolve_scenario("training", data, MODELS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        config = MODELS.get(data.get("model_name"), {})
+
+        def compute():
+            simulation = simulate_training_step(
+                params,
+                activation_checkpointing=bool(data.get("activation_checkpointing", False)),
+                zero_stage=int(data.get("zero_stage", 0)),
+                data_parallel_size=int(data.get("num_gpus", 1)),
+                vocab_size=params.get("vocab_size", config.get("vocab_size")),
+            )
+            if not data.get("include_timeline", True):
+                simulation.pop("timeline")
+            return {
+                "calculation_type": "training_timeline",
+                "parameters": params,
+                "memory_requirements": run_training_calculation(params),
+                "simulation": simulation,
+            }
+
+        return cached_json_response(("training_timeline", data), compute)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/training/pipeline", methods=["POST"])
+def simulate_pipeline_schedule():
+    """
+    Simulate a pipeline parallel training step: per-stage peak memory, bubble fraction and step time.
+
+    Request body should contain the /api/memory/training fields (batch_size is the micro-batch size), plus:
+    - num_stages: Pipeline stages
+    - num_micro_batches: Micro-batches per step
+    - schedule: "gpipe", "1f1b" or "interleaved" (default: 1f1b)
+    - virtual_stages: Chunks per stage of the interleaved schedule (default: 2)
+    - gpu: GPU id or name, or peak_tflops
+    - mfu: Model FLOPs utilization (default: the SFT default)
+    - activation_checkpointing: Whether activations are recomputed (default: false)
+    - p2p_bandwidth_gbps: Bandwidth between stages; omit to ignore transfer time
+    - include_timeline: Return every op with its start and end time (default: false)
+    - global_batch_size: Sequences per step; searches the micro-batch count with the best throughput under
+      memory_cap_gb (default: the GPU memory) instead of using num_micro_batches and batch_size
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        if "num_stages" not in data:
+            return jsonify({"error": "num_stages is required"}), 400
+        if "model_name" in data and data["model_name"] not in MODELS:
+            return jsonify({"error": f'Model "{data["model_name"]}" not found'}), 404
+        search = data.get("global_batch_size") is not None
+        try:
+            scenario = {"batch_size": 1, **data} if search else data
+            params = resolve_scenario("training", scenario, MODELS)
+            if "peak_tflops" in data:
+                gpu, peak_tflops = None, float(data["peak_tflops"])
+            elif "gpu" in data:
+                gpu = get_gpu_spec(data["gpu"])
+                peak_tflops = gpu["fp16_tflops"]
+            else:
+                raise ValueError("gpu or peak_tflops is required")
+            if search and data.get("memory_cap_gb") is None and gpu is None:
+                raise ValueError("memory_cap_gb or gpu is required to search micro-batch counts")
+            if search:
+                memory_cap_gb = float(
+                    data["memory_cap_gb"] if data.get("memory_cap_gb") is not None else gpu["memory_gb"]
+                )
+            if not search and "num_micro_batches" not in data:
+                raise ValueError("num_micro_batches or global_batch_size is required")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        config = MODELS.get(data.get("model_name"), {})
+
+        def compute():
+            options = {
+                "peak_tflops": peak_tflops,
+                "mfu": float(data.get("mfu", DEFAULT_MFU["SFT"])),
+                "virtual_stages": int(data.get("virtual_stages", DEFAULT_VIRTUAL_STAGES)),
+                "activation_checkpointing": bool(data.get("activation_checkpointing", False)),
+                "p2p_bandwidth_gbps": data.get("p2p_bandwidth_gbps"),
+                "active_model_size": parse_active_size(data.get("model_name") or ""),
+                "include_timeline": bool(data.get("include_timeline", False)),
+            }
+            schedule = data.get("schedule", "1f1b")
+            result = {"calculation_type": "training_pipeline", "gpu": gpu, "parameters": params}
+            if search:
+                result["search"] = search_micro_batches(
+                    params,
+                    config,
+                    int(data["num_stages"]),
+                    int(data["global_batch_size"]),
+                    memory_cap_gb,
+                    schedule,
+                    **options,
+                )
+            else:
+                result["simulation"] = simulate_pipeline(
+                    params, config, int(data["num_stages"]), int(data["num_micro_batches"]), schedule, **options
+                )
+            return result
+
+        return cached_json_response(("training_pipeline", data), compute)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/live", methods=["GET"])
+def live_channel():
+    """
+    Live recalculation channel over WebSocket.
+
+    The client sends parameter deltas and receives recalculated results on one connection; rapid updates
+    are coalesced and superseded calculations dropped (see utils/live.py for the message format). Requires
+    uWSGI with http-websockets enabled. Returns 503 when LIVE_MAX_CHANNELS channels are already open in this
+    worker; the server closes a channel after LIVE_CHANNEL_SECONDS.
+    """
+    if uwsgi is None or "HTTP_SEC_WEBSOCKET_KEY" not in request.environ:
+        return jsonify({"error": "WebSocket upgrade required (served by uWSGI with http-websockets)"}), 426
+    if not LIVE_CHANNELS.acquire(blocking=False):
+        return jsonify({"error": f"Too many live channels (max {LIVE_MAX_CHANNELS} per worker)"}), 503
+    try:
+        uwsgi.websocket_handshake()
+        session = LiveSession(MODELS)
+        recv = receive_until(uwsgi.websocket_recv_nb, time.monotonic() + LIVE_CHANNEL_SECONDS)
+        serve_channel(session, recv, uwsgi.websocket_recv_nb, uwsgi.websocket_send)
+    finally:
+        LIVE_CHANNELS.release()
+    METRICS.inc("live_calculations_total", value=session.computed)
+    METRICS.inc("live_calculations_dropped_total", value=session.dropped)
+    return Response(status=200)
+
+
+@app.route("/api/calibration/profiles", methods=["GET"])
+def list_calibration_profiles():
+    """List the calibration profiles with their coefficients and residual errors."""
+    return jsonify(
+        {"default": DEFAULT_COEFFICIENTS, "profiles": CALIBRATION_PROFILES, "count": len(CALIBRATION_PROFILES)}
+    )
+
+
 @app.route("/api/config/options", methods=["GET"])
 def get_config_options():
     """Get available configuration options (data types, optimizers, etc.)."""
-    return jsonify(
-        {
+    return cached_json_response(
+        ("config_options",),
+        lambda: {
             "data_types": DATA_TYPES,
             "optimizers": OPTIMIZERS,
             "sft_or_peft": SFT_OR_PEFT,
             "available_models": get_available_models(),
-        }
+        },
     )
 
 
@@ -245,3 +1217,49 @@ def method_not_allowed(error):
 def internal_error(error):
     """Handle 500 errors."""
     return jsonify({"error": "Internal server error"}), 500
+
+
+# Requests served in the master before the fork, one per hot path, so that workers start warm
+WARMUP_MODEL = MODEL_NAMES[0] if MODEL_NAMES else None
+WARMUP_REQUESTS = [
+    ("GET", "/health", None),
+    ("GET", "/api/models", None),
+    ("GET", "/api/config/options", None),
+]
+if WARMUP_MODEL:
+    WARMUP_REQUESTS += [
+        ("GET", f"/api/models/{WARMUP_MODEL}", None),
+        ("GET", "/api/models?family=qwen3&limit=10", None),
+        (
+            "POST",
+            "/api/memory/inference",
+            {"model_name": WARMUP_MODEL, "batch_size": 1, "sequence_length": 4096, "kv_cache_precision": "bfloat16"},
+        ),
+        (
+            "POST",
+            "/api/memory/training",
+            {
+                "model_name": WARMUP_MODEL,
+                "batch_size": 1,
+                "sequence_length": 4096,
+                "optimizer": "AdamW",
+                "trainable_parameters": 100,
+            },
+        ),
+    ]
+_WORKER_WARMUP_LOCK = threading.Lock()
+
+
+def _warm_up_worker():
+    with _WORKER_WARMUP_LOCK:
+        if "requests" not in WARMUP:
+            WARMUP.update(warm_up(app.test_client, WARMUP_REQUESTS))
+            WARMUP["ready"] = not WARMUP["failed"]
+
+
+if PREFORK_WARMUP:
+    try:
+        WARMUP.update(prepare_for_fork(MODELS, app.test_client, WARMUP_REQUESTS))
+    except Exception as e:
+        WARMUP.update(requests=len(WARMUP_REQUESTS), failed=[{"error": str(e)}])
+    WARMUP["ready"] = not WARMUP["failed"]
@@ -0,0 +1,524 @@
+"""GPU specifications used by the planners.
+
+Ids and names mirror ``frontend/lib/gpu-data.ts``. Bandwidth (GB/s) and dense FP16 tensor throughput (TFLOPS)
+are approximate vendor figures; they only feed throughput estimates, never the memory math.
+"""
+
+GPU_SPECS = {
+    # NVIDIA GPUs
+    "3060_12": {
+        "name": "RTX 3060 (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 360,
+        "fp16_tflops": 51,
+        "category": "Nvidia GPU",
+    },
+    "3060ti_8": {
+        "name": "RTX 3060 Ti (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 448,
+        "fp16_tflops": 65,
+        "category": "Nvidia GPU",
+    },
+    "3070_8": {
+        "name": "RTX 3070 (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 448,
+        "fp16_tflops": 81,
+        "category": "Nvidia GPU",
+    },
+    "3070ti_8": {
+        "name": "RTX 3070 Ti (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 608,
+        "fp16_tflops": 87,
+        "category": "Nvidia GPU",
+    },
+    "3080_10": {
+        "name": "RTX 3080 (10GB)",
+        "memory_gb": 10,
+        "bandwidth_gbps": 760,
+        "fp16_tflops": 119,
+        "category": "Nvidia GPU",
+    },
+    "3080_12": {
+        "name": "RTX 3080 (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 912,
+        "fp16_tflops": 122,
+        "category": "Nvidia GPU",
+    },
+    "3080ti_12": {
+        "name": "RTX 3080 Ti (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 912,
+        "fp16_tflops": 136,
+        "category": "Nvidia GPU",
+    },
+    "3090_24": {
+        "name": "RTX 3090 (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 936,
+        "fp16_tflops": 142,
+        "category": "Nvidia GPU",
+    },
+    "3090ti_24": {
+        "name": "RTX 3090 Ti (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 1008,
+        "fp16_tflops": 160,
+        "category": "Nvidia GPU",
+    },
+    "4060_8": {
+        "name": "RTX 4060 (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 272,
+        "fp16_tflops": 60,
+        "category": "Nvidia GPU",
+    },
+    "4060ti_8": {
+        "name": "RTX 4060 Ti (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 288,
+        "fp16_tflops": 88,
+        "category": "Nvidia GPU",
+    },
+    "4060ti_16": {
+        "name": "RTX 4060 Ti (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 288,
+        "fp16_tflops": 88,
+        "category": "Nvidia GPU",
+    },
+    "4070_12": {
+        "name": "RTX 4070 (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 504,
+        "fp16_tflops": 117,
+        "category": "Nvidia GPU",
+    },
+    "4070ti_12": {
+        "name": "RTX 4070 Ti (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 504,
+        "fp16_tflops": 160,
+        "category": "Nvidia GPU",
+    },
+    "4070tisuper_16": {
+        "name": "RTX 4070 Ti SUPER (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 672,
+        "fp16_tflops": 177,
+        "category": "Nvidia GPU",
+    },
+    "4070super_12": {
+        "name": "RTX 4070 SUPER (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 504,
+        "fp16_tflops": 142,
+        "category": "Nvidia GPU",
+    },
+    "4080_16": {
+        "name": "RTX 4080 (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 717,
+        "fp16_tflops": 195,
+        "category": "Nvidia GPU",
+    },
+    "4080super_16": {
+        "name": "RTX 4080 SUPER (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 736,
+        "fp16_tflops": 209,
+        "category": "Nvidia GPU",
+    },
+    "4090_24": {
+        "name": "RTX 4090 (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 1008,
+        "fp16_tflops": 330,
+        "category": "Nvidia GPU",
+    },
+    "5060_8": {
+        "name": "RTX 5060 (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 448,
+        "fp16_tflops": 76,
+        "category": "Nvidia GPU",
+    },
+    "5060ti_8": {
+        "name": "RTX 5060 Ti (8GB)",
+        "memory_gb": 8,
+        "bandwidth_gbps": 448,
+        "fp16_tflops": 96,
+        "category": "Nvidia GPU",
+    },
+    "5060ti_16": {
+        "name": "RTX 5060 Ti (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 448,
+        "fp16_tflops": 96,
+        "category": "Nvidia GPU",
+    },
+    "5070_12": {
+        "name": "RTX 5070 (12GB)",
+        "memory_gb": 12,
+        "bandwidth_gbps": 672,
+        "fp16_tflops": 123,
+        "category": "Nvidia GPU",
+    },
+    "5070ti_16": {
+        "name": "RTX 5070 Ti (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 896,
+        "fp16_tflops": 176,
+        "category": "Nvidia GPU",
+    },
+    "5080_16": {
+        "name": "RTX 5080 (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 960,
+        "fp16_tflops": 225,
+        "category": "Nvidia GPU",
+    },
+    "5090_32": {
+        "name": "RTX 5090 (32GB)",
+        "memory_gb": 32,
+        "bandwidth_gbps": 1792,
+        "fp16_tflops": 419,
+        "category": "Nvidia GPU",
+    },
+    "rtx_2000_ada_16": {
+        "name": "RTX 2000 Ada Generation (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 224,
+        "fp16_tflops": 48,
+        "category": "Nvidia GPU",
+    },
+    "rtx_a4000_16": {
+        "name": "RTX A4000 (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 448,
+        "fp16_tflops": 77,
+        "category": "Nvidia GPU",
+    },
+    "rtx_a5000_24": {
+        "name": "RTX A5000 (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 768,
+        "fp16_tflops": 111,
+        "category": "Nvidia GPU",
+    },
+    "rtx_a6000_48": {
+        "name": "RTX A6000 (48GB)",
+        "memory_gb": 48,
+        "bandwidth_gbps": 768,
+        "fp16_tflops": 155,
+        "category": "Nvidia GPU",
+    },
+    "rtx_4000_blackwell_24": {
+        "name": "RTX 4000 Blackwell SFF (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 432,
+        "fp16_tflops": 150,
+        "category": "Nvidia GPU",
+    },
+    "rtx_4500_blackwell_32": {
+        "name": "RTX 4500 Blackwell (32GB)",
+        "memory_gb": 32,
+        "bandwidth_gbps": 896,
+        "fp16_tflops": 200,
+        "category": "Nvidia GPU",
+    },
+    "rtx_5000_blackwell_48": {
+        "name": "RTX 5000 Blackwell (48GB)",
+        "memory_gb": 48,
+        "bandwidth_gbps": 1344,
+        "fp16_tflops": 260,
+        "category": "Nvidia GPU",
+    },
+    "rtx_6000_blackwell_96": {
+        "name": "RTX 6000 Blackwell (96GB)",
+        "memory_gb": 96,
+        "bandwidth_gbps": 1792,
+        "fp16_tflops": 500,
+        "category": "Nvidia GPU",
+    },
+    "l40_48": {
+        "name": "L40 (48GB)",
+        "memory_gb": 48,
+        "bandwidth_gbps": 864,
+        "fp16_tflops": 181,
+        "category": "Nvidia GPU",
+    },
+    "l40s_48": {
+        "name": "L40S (48GB)",
+        "memory_gb": 48,
+        "bandwidth_gbps": 864,
+        "fp16_tflops": 362,
+        "category": "Nvidia GPU",
+    },
+    "a2_16": {"name": "A2 (16GB)", "memory_gb": 16, "bandwidth_gbps": 200, "fp16_tflops": 18, "category": "Nvidia GPU"},
+    "a16_64": {
+        "name": "A16 (64GB)",
+        "memory_gb": 64,
+        "bandwidth_gbps": 800,
+        "fp16_tflops": 72,
+        "category": "Nvidia GPU",
+    },
+    "a30_24": {
+        "name": "A30 (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 933,
+        "fp16_tflops": 165,
+        "category": "Nvidia GPU",
+    },
+    "a40_48": {
+        "name": "A40 (48GB)",
+        "memory_gb": 48,
+        "bandwidth_gbps": 696,
+        "fp16_tflops": 150,
+        "category": "Nvidia GPU",
+    },
+    "a100_40": {
+        "name": "A100 (40GB)",
+        "memory_gb": 40,
+        "bandwidth_gbps": 1555,
+        "fp16_tflops": 312,
+        "category": "Nvidia GPU",
+    },
+    "a100_80": {
+        "name": "A100 (80GB)",
+        "memory_gb": 80,
+        "bandwidth_gbps": 2039,
+        "fp16_tflops": 312,
+        "category": "Nvidia GPU",
+    },
+    "a800_40": {
+        "name": "A800 (40GB)",
+        "memory_gb": 40,
+        "bandwidth_gbps": 1555,
+        "fp16_tflops": 312,
+        "category": "Nvidia GPU",
+    },
+    "a800_80": {
+        "name": "A800 (80GB)",
+        "memory_gb": 80,
+        "bandwidth_gbps": 2039,
+        "fp16_tflops": 312,
+        "category": "Nvidia GPU",
+    },
+    "h100_80": {
+        "name": "H100 (80GB)",
+        "memory_gb": 80,
+        "bandwidth_gbps": 3350,
+        "fp16_tflops": 989,
+        "category": "Nvidia GPU",
+    },
+    "h100nvl_188": {
+        "name": "H100 NVL (188GB)",
+        "memory_gb": 188,
+        "bandwidth_gbps": 7800,
+        "fp16_tflops": 1671,
+        "category": "Nvidia GPU",
+    },
+    "h200_141": {
+        "name": "H200 (141GB)",
+        "memory_gb": 141,
+        "bandwidth_gbps": 4800,
+        "fp16_tflops": 989,
+        "category": "Nvidia GPU",
+    },
+    "h800_80": {
+        "name": "H800 (80GB)",
+        "memory_gb": 80,
+        "bandwidth_gbps": 3350,
+        "fp16_tflops": 989,
+        "category": "Nvidia GPU",
+    },
+    "b100_192": {
+        "name": "B100 (192GB)",
+        "memory_gb": 192,
+        "bandwidth_gbps": 8000,
+        "fp16_tflops": 1750,
+        "category": "Nvidia GPU",
+    },
+    "b200_192": {
+        "name": "B200 (192GB)",
+        "memory_gb": 192,
+        "bandwidth_gbps": 8000,
+        "fp16_tflops": 2250,
+        "category": "Nvidia GPU",
+    },
+    # Apple Silicon (unified memory shared by CPU and GPU)
+    "m2_pro_16": {
+        "name": "M2 Pro (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 200,
+        "fp16_tflops": 14,
+        "category": "Apple Silicon",
+    },
+    "m2_max_32": {
+        "name": "M2 Max (32GB)",
+        "memory_gb": 32,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 27,
+        "category": "Apple Silicon",
+    },
+    "m2_max_64": {
+        "name": "M2 Max (64GB)",
+        "memory_gb": 64,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 27,
+        "category": "Apple Silicon",
+    },
+    "m2_max_96": {
+        "name": "M2 Max (96GB)",
+        "memory_gb": 96,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 27,
+        "category": "Apple Silicon",
+    },
+    "m2_ultra_64": {
+        "name": "M2 Ultra (64GB)",
+        "memory_gb": 64,
+        "bandwidth_gbps": 800,
+        "fp16_tflops": 54,
+        "category": "Apple Silicon",
+    },
+    "m2_ultra_128": {
+        "name": "M2 Ultra (128GB)",
+        "memory_gb": 128,
+        "bandwidth_gbps": 800,
+        "fp16_tflops": 54,
+        "category": "Apple Silicon",
+    },
+    "m2_ultra_192": {
+        "name": "M2 Ultra (192GB)",
+        "memory_gb": 192,
+        "bandwidth_gbps": 800,
+        "fp16_tflops": 54,
+        "category": "Apple Silicon",
+    },
+    "m3_pro_18": {
+        "name": "M3 Pro (18GB)",
+        "memory_gb": 18,
+        "bandwidth_gbps": 150,
+        "fp16_tflops": 14,
+        "category": "Apple Silicon",
+    },
+    "m3_pro_36": {
+        "name": "M3 Pro (36GB)",
+        "memory_gb": 36,
+        "bandwidth_gbps": 150,
+        "fp16_tflops": 14,
+        "category": "Apple Silicon",
+    },
+    "m3_max_36": {
+        "name": "M3 Max (36GB)",
+        "memory_gb": 36,
+        "bandwidth_gbps": 300,
+        "fp16_tflops": 28,
+        "category": "Apple Silicon",
+    },
+    "m3_max_48": {
+        "name": "M3 Max (48GB)",
+        "memory_gb": 48,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 28,
+        "category": "Apple Silicon",
+    },
+    "m3_max_64": {
+        "name": "M3 Max (64GB)",
+        "memory_gb": 64,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 28,
+        "category": "Apple Silicon",
+    },
+    "m3_max_96": {
+        "name": "M3 Max (96GB)",
+        "memory_gb": 96,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 28,
+        "category": "Apple Silicon",
+    },
+    "m3_max_128": {
+        "name": "M3 Max (128GB)",
+        "memory_gb": 128,
+        "bandwidth_gbps": 400,
+        "fp16_tflops": 28,
+        "category": "Apple Silicon",
+    },
+    "m3_ultra_256": {
+        "name": "M3 Ultra (256GB)",
+        "memory_gb": 256,
+        "bandwidth_gbps": 819,
+        "fp16_tflops": 56,
+        "category": "Apple Silicon",
+    },
+    "m3_ultra_512": {
+        "name": "M3 Ultra (512GB)",
+        "memory_gb": 512,
+        "bandwidth_gbps": 819,
+        "fp16_tflops": 56,
+        "category": "Apple Silicon",
+    },
+    "m4_16": {
+        "name": "M4 (16GB)",
+        "memory_gb": 16,
+        "bandwidth_gbps": 120,
+        "fp16_tflops": 9,
+        "category": "Apple Silicon",
+    },
+    "m4_24": {
+        "name": "M4 (24GB)",
+        "memory_gb": 24,
+        "bandwidth_gbps": 120,
+        "fp16_tflops": 9,
+        "category": "Apple Silicon",
+    },
+    "m4_32": {
+        "name": "M4 (32GB)",
+        "memory_gb": 32,
+        "bandwidth_gbps": 120,
+        "fp16_tflops": 9,
+        "category": "Apple Silicon",
+    },
+    "m4_pro_32": {
+        "name": "M4 Pro (32GB)",
+        "memory_gb": 32,
+        "bandwidth_gbps": 273,
+        "fp16_tflops": 18,
+        "category": "Apple Silicon",
+    },
+    "m4_pro_64": {
+        "name": "M4 Pro (64GB)",
+        "memory_gb": 64,
+        "bandwidth_gbps": 273,
+        "fp16_tflops": 18,
+        "category": "Apple Silicon",
+    },
+    "m4_max_64": {
+        "name": "M4 Max (64GB)",
+        "memory_gb": 64,
+        "bandwidth_gbps": 546,
+        "fp16_tflops": 34,
+        "category": "Apple Silicon",
+    },
+    "m4_max_96": {
+        "name": "M4 Max (96GB)",
+        "memory_gb": 96,
+        "bandwidth_gbps": 546,
+        "fp16_tflops": 34,
+        "category": "Apple Silicon",
+    },
+    "m4_max_128": {
+        "name": "M4 Max (128GB)",
+        "memory_gb": 128,
+        "bandwidth_gbps": 546,
+        "fp16_tflops": 34,
+        "category": "Apple Silicon",
+    },
+}
+# Available GPU ids
+GPUS = list(GPU_SPECS.keys())
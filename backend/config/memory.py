@@ -45,3 +45,32 @@ PARAMETERS = {
     "head_dim": "head_dim",
     "num_key_value_heads": "num_key_value_heads",
 }
+# LoRA target modules of a decoder layer ("all-linear" selects all of them)
+LORA_TARGET_MODULES = ["q_proj", "k_proj", "v_proj", "o_proj", "gate_proj", "up_proj", "down_proj"]
+# Default LoRA target modules: the attention projections
+DEFAULT_LORA_TARGET_MODULES = ["q_proj", "k_proj", "v_proj", "o_proj"]
+# QLoRA NF4 quantization: 64 weights share one absmax constant; with double quantization the absmax constants
+# are stored in 8 bits and 256 of them share one float32 constant
+QLORA_BLOCK_SIZE = 64
+QLORA_DOUBLE_QUANT_BLOCK_SIZE = 256
+# Empirical coefficients of the memory calculator, replaced by fitted calibration profiles (see utils/calibration.py)
+DEFAULT_COEFFICIENTS = {
+    "inference_overhead_gb": 1.04,
+    "training_overhead_gb": 1.54,
+    "paged_attention_factor": 0.14,  # Page Attention typically reduces KV cache memory by ~86%
+    "flash_attention_factor": 20,
+}
+# Effective bits per weight of llama.cpp GGUF quantization types, including block scales
+# (K-quant mixes such as Q4_K_M keep some tensors at higher precision)
+GGUF_QUANT_BITS = {
+    "F16": 16,
+    "BF16": 16,
+    "Q8_0": 8.5,
+    "Q6_K": 6.5625,
+    "Q5_K_M": 5.69,
+    "Q5_0": 5.5,
+    "Q4_K_M": 4.89,
+    "Q4_0": 4.5,
+    "Q3_K_M": 3.91,
+    "Q2_K": 2.96,
+}
@@ -0,0 +1,102 @@
+"""
+Benchmark: admission decisions per second of the AdmissionController on one core.
+
+Replays a stream of (prompt_len, max_new_tokens) requests drawn from a log-normal-ish length mix against a
+controller built from the catalog. ``can_admit`` is the lock-free check; ``reserve/release`` reserves the
+request if it fits and releases the oldest in-flight request once ``--in_flight`` are held, so the budget
+stays contended and both outcomes occur. With ``--threads`` > 1 the same stream is split across threads
+sharing the controller (throughput is still bounded by one core under the GIL). Exits with status 1 when a
+rate falls below ``--min_rate``.
+
+Usage:
+    python scripts/bench_admission.py --model Qwen3-8B --gpu h100_80 --requests 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+# Run as a file, not a module: make the backend packages importable from any working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.admission import admission_controller  # noqa: E402
+
+
+def request_stream(n_requests: int, seed: int):
+    rng = random.Random(seed)
+    return [(int(rng.lognormvariate(6.5, 1.0)) + 1, int(rng.lognormvariate(5.5, 0.8)) + 1) for _ in range(n_requests)]
+
+
+def bench_can_admit(controller, stream) -> float:
+    can_admit = controller.can_admit
+    start = time.perf_counter()
+    for prompt_len, max_new_tokens in stream:
+        can_admit(prompt_len, max_new_tokens)
+    return len(stream) / (time.perf_counter() - start)
+
+
+def _reserve_release(controller, stream, in_flight: int):
+    try_reserve, release = controller.try_reserve, controller.release
+    held = deque()
+    for prompt_len, max_new_tokens in stream:
+        blocks = try_reserve(prompt_len, max_new_tokens)
+        if blocks:
+            held.append(blocks)
+            if len(held) > in_flight:
+                release(held.popleft())
+    while held:
+        release(held.popleft())
+
+
+def bench_reserve_release(controller, stream, in_flight: int, threads: int) -> float:
+    shares = [stream[i::threads] for i in range(threads)]
+    workers = [
+        threading.Thread(target=_reserve_release, args=(controller, share, in_flight // threads)) for share in shares
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(stream) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admission control decision-rate benchmark")
+    parser.add_argument("--model", default="Qwen3-8B")
+    parser.add_argument("--gpu", default="h100_80")
+    parser.add_argument("--requests", type=int, default=1000000)
+    parser.add_argument("--in_flight", type=int, default=256, help="Requests held before the oldest is released")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--min_rate", type=float, default=200000, help="Decisions/s each run must sustain")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stream = request_stream(args.requests, args.seed)
+    controller = admission_controller(args.model, gpu=args.gpu)
+    profile = controller.profile
+    print(f"{args.model} on {args.gpu}: {profile['kv_budget_tokens']} KV tokens in {profile['total_blocks']} blocks")
+    rates = {"can_admit": bench_can_admit(controller, stream)}
+    for threads in args.threads:
+        rates[f"reserve/release x{threads}"] = bench_reserve_release(controller, stream, args.in_flight, threads)
+    stats = controller.stats()
+    print(f"{'benchmark':>22} {'decisions/s':>14}")
+    for name, rate in rates.items():
+        print(f"{name:>22} {rate:>14,.0f}")
+    print(f"admitted {stats['admitted']}, rejected {stats['rejected']}, free blocks {stats['free_blocks']}")
+    if stats["free_blocks"] != stats["total_blocks"]:
+        print("budget leaked: not every reserved block was released", file=sys.stderr)
+        return 1
+    slow = [name for name, rate in rates.items() if rate < args.min_rate]
+    if slow:
+        print(f"below {args.min_rate:,.0f} decisions/s: {slow}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Benchmark: hit rate of per-process caches vs the shared cache with several uwsgi-like workers.
+
+Each worker receives a random share of a Zipf-distributed stream of calculation requests. The
+per-process tier gives every worker its own LRU of ``capacity`` entries; the shared tier maps one
+SharedCache of the same ``capacity`` from all worker processes.
+
+Usage:
+    python scripts/bench_shared_cache.py --requests 200000 --workers 1 4 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+# Run as a file, not a module: make the backend packages importable from any working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.shared_cache import SharedCache, make_key  # noqa: E402
+
+
+def zipf_stream(n_requests: int, n_keys: int, skew: float, seed: int):
+    rng = random.Random(seed)
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, n_keys + 1):
+        total += 1 / rank**skew
+        cum_weights.append(total)
+    return rng.choices(range(n_keys), cum_weights=cum_weights, k=n_requests)
+
+
+def split_stream(stream, workers: int, seed: int):
+    rng = random.Random(seed)
+    shares = [[] for _ in range(workers)]
+    for key in stream:
+        shares[rng.randrange(workers)].append(key)
+    return shares
+
+
+def per_process_hits(shares, capacity: int) -> int:
+    hits = 0
+    for share in shares:
+        lru = OrderedDict()
+        for key in share:
+            if key in lru:
+                lru.move_to_end(key)
+                hits += 1
+            else:
+                lru[key] = True
+                if len(lru) > capacity:
+                    lru.popitem(last=False)
+    return hits
+
+
+def _shared_worker(path: str, buckets: int, ways: int, share, queue):
+    cache = SharedCache(path, buckets=buckets, ways=ways, slot_size=512)
+    payload = json.dumps({"memory_requirements": {"inference_memory": "17.04 GB"}}).encode()
+    for key in share:
+        cache_key = make_key("bench", key)
+        if cache.get(cache_key) is None:
+            cache.set(cache_key, payload)
+    queue.put(cache.hits)
+
+
+def shared_hits(shares, capacity: int, ways: int = 8) -> int:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "cache")
+        buckets = max(1, capacity // ways)
+        SharedCache(path, buckets=buckets, ways=ways, slot_size=512)._open()
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_shared_worker, args=(path, buckets, ways, share, queue)) for share in shares
+        ]
+        for p in processes:
+            p.start()
+        hits = sum(queue.get() for _ in processes)
+        for p in processes:
+            p.join()
+        return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared cache hit-rate benchmark")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=50000, help="Distinct request payloads")
+    parser.add_argument("--capacity", type=int, default=8192, help="Entries per cache")
+    parser.add_argument("--skew", type=float, default=0.9, help="Zipf exponent")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stream = zipf_stream(args.requests, args.keys, args.skew, args.seed)
+    print(f"{'workers':>8} {'per-process':>12} {'shared':>8} {'shared time':>12}")
+    for workers in args.workers:
+        shares = split_stream(stream, workers, args.seed)
+        local = per_process_hits(shares, args.capacity) / args.requests
+        start = time.perf_counter()
+        shared = shared_hits(shares, args.capacity) / args.requests
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {local:>12.1%} {shared:>8.1%} {elapsed:>11.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -121,6 +121,10 @@ test_health_check() {
     make_request "GET" "/health" "" "Health Check"
 }
 
+test_readiness_check() {
+    make_request "GET" "/ready" "" "Readiness Check"
+}
+
 test_models_list() {
     make_request "GET" "/api/models" "" "List Available Models"
 }
@@ -145,6 +149,61 @@ test_memory_training() {
     make_request "POST" "/api/memory/training" "$payload" "TrainingMemory Calculation"
 }
 
+test_memory_inference_grid() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "kv_cache_precision": "bfloat16", "grid": {"batch_size": [1, 8], "sequence_length": [2048, 8192]}}'
+    print_header "Inference Memory Grid (NDJSON)"
+    if ! curl -sN -X POST -H "$HEADERS" -d "$payload" "$BASE_URL/api/memory/inference/grid?format=ndjson" | jq -c .; then
+        print_error "Failed to Inference Memory Grid"
+        return 1
+    fi
+    print_success "Inference Memory Grid completed"
+}
+
+test_recommend_quantization() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "gpu": "4090_24", "batch_size": 4, "sequence_length": 8192}'
+    make_request "POST" "/api/recommend/quantization" "$payload" "Quantization Recommendation"
+}
+
+test_capacity_plan() {
+    local payload='{"qps": 50, "prompt_tokens": {"p50": 1024, "p99": 8192}, "output_tokens": {"p50": 256, "p99": 2048}, "slo": {"ttft_ms": 2000, "tpot_ms": 50}, "models": ["'"${MODEL_NAME}"'"], "limit": 5}'
+    make_request "POST" "/api/capacity/plan" "$payload" "Capacity Plan"
+}
+
+test_disaggregated_plan() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "qps": 50, "prompt_tokens": {"p50": 2048, "p99": 8192}, "output_tokens": {"p50": 256, "p99": 1024}, "slo": {"ttft_ms": 2000, "tpot_ms": 50}, "gpu": "h100_80"}'
+    make_request "POST" "/api/capacity/disaggregated" "$payload" "Disaggregated Prefill/Decode Plan"
+}
+
+test_training_estimate() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "batch_size": 4, "sequence_length": 4096, "optimizer": "AdamW", "trainable_parameters": 100, "gpu": "h100_80", "num_gpus": 8, "dataset_samples": 100000, "gpu_hour_price": 2.5}'
+    make_request "POST" "/api/training/estimate" "$payload" "Training Time Estimate"
+}
+
+test_memory_training_qlora() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "batch_size": 1, "sequence_length": 2048, "optimizer": "AdamW", "method": "QLoRA", "lora_rank": 16, "target_modules": "all-linear", "use_flash_attention": true}'
+    make_request "POST" "/api/memory/training" "$payload" "Training Memory Calculation (QLoRA)"
+}
+
+test_memory_inference_multi_lora() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "batch_size": 8, "sequence_length": 4096, "adapters": [{"count": 100, "rank": 16}], "popularity": {"distribution": "zipf", "exponent": 1.0}, "max_loras": 8, "requests_per_second": 20, "gpu": "h100_80"}'
+    make_request "POST" "/api/memory/inference/multi_lora" "$payload" "Multi-LoRA Inference Memory"
+}
+
+test_training_timeline() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "batch_size": 1, "sequence_length": 4096, "optimizer": "AdamW", "trainable_parameters": 100, "use_flash_attention": true, "activation_checkpointing": true, "zero_stage": 2, "num_gpus": 8, "include_timeline": false}'
+    make_request "POST" "/api/training/timeline" "$payload" "Training Step Memory Timeline"
+}
+
+test_training_pipeline() {
+    local payload='{"model_name": "'"${MODEL_NAME}"'", "batch_size": 1, "sequence_length": 4096, "optimizer": "AdamW", "trainable_parameters": 100, "use_flash_attention": true, "activation_checkpointing": true, "num_stages": 4, "num_micro_batches": 16, "schedule": "interleaved", "gpu": "h100_80"}'
+    make_request "POST" "/api/training/pipeline" "$payload" "Pipeline Parallel Schedule"
+}
+
+test_offload_plan() {
+    local payload='{"model_name": "Qwen3-32B-GGUF", "sequence_length": 8192, "gguf_quant": "Q4_K_M", "gpu": "4090_24", "ram_gb": 64}'
+    make_request "POST" "/api/offload/plan" "$payload" "GPU/CPU Layer Split Plan"
+}
+
 # =============================================================================
 # Main Execution
 # =============================================================================
@@ -157,11 +216,22 @@ main() {
     
     # Run all tests
     test_health_check
+    test_readiness_check
     test_models_list
     test_model_details
     test_config_options
     test_memory_inference
     test_memory_training
+    test_memory_inference_grid
+    test_recommend_quantization
+    test_capacity_plan
+    test_disaggregated_plan
+    test_training_estimate
+    test_memory_training_qlora
+    test_memory_inference_multi_lora
+    test_training_timeline
+    test_training_pipeline
+    test_offload_plan
     
     echo ""
     print_success "All API tests completed successfully! 🎉"
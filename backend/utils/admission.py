@@ -0,0 +1,226 @@
+"""Constant-time admission control for serving gateways, on the memory model of the calculator.
+
+A router decides per request whether a replica can take it without running out of KV cache. Everything that
+does not depend on the request is computed once from the catalog and ``utils/memory.py``: the weights, the
+runtime overhead, the activation peak of one scheduler step and the KV bytes per token, which leave a KV
+budget counted in blocks of ``block_size`` tokens (as vLLM's paged KV cache). A request needs
+``ceil((prompt_len + max_new_tokens) / block_size)`` blocks, so a decision is one division and a comparison,
+and reserving or releasing blocks is one locked integer update.
+
+Example::
+
+    from utils.admission import admission_controller
+
+    controller = admission_controller("Qwen3-8B", gpu="h100_80")
+    blocks = controller.try_reserve(prompt_len, max_new_tokens)
+    if blocks:
+        ...  # serve the request
+        controller.release(blocks)
+"""
+
+import threading
+from typing import Any, Dict
+
+from config.memory import DATA_TYPES, DEFAULT_COEFFICIENTS
+from utils.batch import DEFAULT_MODELS_DIR, DEFAULT_STORE_DIR
+from utils.capacity import GPU_MEMORY_UTILIZATION
+from utils.help import get_gpu_spec, load_catalog
+from utils.memory import _get_activation_memory, _get_kv_cache, _get_model_weights
+from utils.scenario import extract_model_params
+
+DEFAULT_BLOCK_SIZE = 16
+# Tokens one scheduler step processes at most (vLLM's max_num_batched_tokens), which bounds the activations
+DEFAULT_MAX_BATCHED_TOKENS = 8192
+
+
+def admission_profile(
+    params: Dict[str, Any],
+    memory_gb: float,
+    num_gpus: int = 1,
+    kv_cache_precision: str | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    max_batched_tokens: int = DEFAULT_MAX_BATCHED_TOKENS,
+    gpu_memory_utilization: float = GPU_MEMORY_UTILIZATION,
+    coefficients: Dict[str, float] | None = None,
+) -> Dict[str, Any]:
+    """Precompute the request-independent memory of a replica and its KV budget in blocks.
+
+    Args:
+        params: Model parameters (model_size, precision, architecture, use_flash_attention), e.g. from
+            ``extract_model_params``
+        memory_gb: Memory of one GPU
+        num_gpus: GPUs of the replica
+        kv_cache_precision: KV cache precision (default: the model precision)
+        block_size: Tokens per KV cache block
+        max_batched_tokens: Tokens per scheduler step, which sizes the activation reserve
+        gpu_memory_utilization: Fraction of the memory the serving engine may use
+        coefficients: Calibrated coefficients (default: ``DEFAULT_COEFFICIENTS``)
+
+    Raises:
+        ValueError: When the weights and reserves leave no room for a single block
+    """
+    coefficients = {**DEFAULT_COEFFICIENTS, **(coefficients or {})}
+    kv_cache_precision = kv_cache_precision or params["precision"]
+    if params["precision"] not in DATA_TYPES or kv_cache_precision not in DATA_TYPES:
+        raise ValueError(f"Invalid precision. Must be one of: {DATA_TYPES}")
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    kv_bytes_per_token = round(
+        _get_kv_cache(
+            kv_cache_precision,
+            1,
+            1,
+            params["num_hidden_layers"],
+            params["hidden_size"],
+            params["num_attention_heads"],
+            params["head_dim"],
+            params["num_key_value_heads"],
+        )
+        * 1e9
+    )
+    weights_gb = _get_model_weights(params["model_size"], params["precision"])
+    activation_gb = _get_activation_memory(
+        params["precision"],
+        1,
+        max_batched_tokens,
+        params["head_dim"],
+        params.get("use_flash_attention", True),
+        coefficients["flash_attention_factor"],
+    )
+    overhead_gb = coefficients["inference_overhead_gb"] * num_gpus
+    kv_budget_gb = memory_gb * num_gpus * gpu_memory_utilization - weights_gb - activation_gb - overhead_gb
+    total_blocks = int(kv_budget_gb * 1e9 // (kv_bytes_per_token * block_size)) if kv_budget_gb > 0 else 0
+    if total_blocks < 1:
+        raise ValueError(
+            f"The weights and reserves ({weights_gb + activation_gb + overhead_gb:.2f} GB) leave no KV cache"
+        )
+    return {
+        "kv_bytes_per_token": kv_bytes_per_token,
+        "weights_gb": round(weights_gb, 4),
+        "activation_gb": round(activation_gb, 4),
+        "overhead_gb": round(overhead_gb, 4),
+        "kv_budget_gb": round(kv_budget_gb, 4),
+        "block_size": block_size,
+        "total_blocks": total_blocks,
+        "kv_budget_tokens": total_blocks * block_size,
+    }
+
+
+class AdmissionController:
+    """Thread-safe KV block budget of one replica, with O(1) admission decisions.
+
+    ``can_admit`` reads the free block count without locking, so it is advisory under concurrency; use
+    ``try_reserve``, which checks and reserves atomically, when the decision commits the request.
+    """
+
+    __slots__ = ("block_size", "total_blocks", "profile", "admitted", "rejected", "_free", "_lock")
+
+    def __init__(self, total_blocks: int, block_size: int = DEFAULT_BLOCK_SIZE, profile: Dict[str, Any] | None = None):
+        if total_blocks < 1 or block_size < 1:
+            raise ValueError("total_blocks and block_size must be at least 1")
+        self.block_size = block_size
+        self.total_blocks = total_blocks
+        self.profile = profile
+        self.admitted = 0
+        self.rejected = 0
+        self._free = total_blocks
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_profile(cls, profile: Dict[str, Any]) -> "AdmissionController":
+        return cls(profile["total_blocks"], profile["block_size"], profile)
+
+    def blocks_for(self, prompt_len: int, max_new_tokens: int) -> int:
+        """KV blocks a request holds at its longest.
+
+        Raises:
+            ValueError: When a length is negative or the request has no tokens
+        """
+        if prompt_len < 0 or max_new_tokens < 0 or not prompt_len + max_new_tokens:
+            raise ValueError("prompt_len and max_new_tokens must be non-negative with at least one token")
+        return -(-(prompt_len + max_new_tokens) // self.block_size)
+
+    def can_admit(self, prompt_len: int, max_new_tokens: int) -> bool:
+        """Whether the request fits in the free KV budget right now (lengths validated as ``blocks_for``)."""
+        return self.blocks_for(prompt_len, max_new_tokens) <= self._free
+
+    def try_reserve(self, prompt_len: int, max_new_tokens: int) -> int:
+        """Reserve the blocks of a request if they fit; return the reserved blocks, 0 when rejected.
+
+        Raises:
+            ValueError: As ``blocks_for``; invalid requests are neither admitted nor counted
+        """
+        blocks = self.blocks_for(prompt_len, max_new_tokens)
+        with self._lock:
+            if blocks > self._free:
+                self.rejected += 1
+                return 0
+            self._free -= blocks
+            self.admitted += 1
+        return blocks
+
+    def release(self, blocks: int):
+        """Return the blocks reserved by ``try_reserve`` once the request finishes."""
+        if blocks < 1:
+            raise ValueError("blocks must be a positive number of reserved blocks")
+        with self._lock:
+            if self._free + blocks > self.total_blocks:
+                raise ValueError("Released more blocks than were reserved")
+            self._free += blocks
+
+    @property
+    def free_blocks(self) -> int:
+        return self._free
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget usage and decision counts."""
+        with self._lock:
+            free = self._free
+            admitted, rejected = self.admitted, self.rejected
+        return {
+            "total_blocks": self.total_blocks,
+            "free_blocks": free,
+            "free_tokens": free * self.block_size,
+            "utilization": round(1 - free / self.total_blocks, 4),
+            "admitted": admitted,
+            "rejected": rejected,
+        }
+
+
+def admission_controller(
+    model_name: str,
+    gpu: str | None = None,
+    memory_gb: float | None = None,
+    num_gpus: int = 1,
+    models: Dict[str, Dict[str, Any]] | None = None,
+    models_dir: str | None = None,
+    precision: str | None = None,
+    **kwargs,
+) -> AdmissionController:
+    """Build the admission controller of a catalog model on a replica.
+
+    Args:
+        model_name: Catalog model
+        gpu: GPU id or name (see config/gpu.py), or memory_gb
+        memory_gb: Memory of one GPU
+        num_gpus: GPUs of the replica
+        models: The model catalog (default: loaded from ``models_dir``)
+        models_dir: Model config directory (default: the bundled models)
+        precision: Weight precision (default: the model's torch_dtype)
+        **kwargs: Other ``admission_profile`` arguments
+    """
+    if models is None:
+        models = load_catalog(models_dir or DEFAULT_MODELS_DIR, None if models_dir else DEFAULT_STORE_DIR)
+    if model_name not in models:
+        raise ValueError(f'Model "{model_name}" not found')
+    if memory_gb is None:
+        if gpu is None:
+            raise ValueError("gpu or memory_gb is required")
+        memory_gb = get_gpu_spec(gpu)["memory_gb"]
+    params = extract_model_params(model_name, models[model_name])
+    if params["model_size"] is None:
+        raise ValueError("model_size cannot be parsed from the model name")
+    params["use_flash_attention"] = True
+    if precision is not None:
+        params["precision"] = precision
+    return AdmissionController.from_profile(admission_profile(params, memory_gb, num_gpus, **kwargs))
@@ -0,0 +1,124 @@
+import threading
+import time
+import unittest
+
+from utils.admission import AdmissionController, admission_controller, admission_profile
+
+QWEN3_8B = {
+    "model_size": 8,
+    "precision": "bfloat16",
+    "num_hidden_layers": 36,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+    "use_flash_attention": True,
+}
+QWEN3_8B_CONFIG = {
+    "num_hidden_layers": 36,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+    "torch_dtype": "bfloat16",
+}
+
+
+class TestAdmission(unittest.TestCase):
+    """Test cases for the admission controller."""
+
+    def test_profile_budget(self):
+        """The KV budget is the usable memory minus weights and reserves, counted in whole blocks."""
+        profile = admission_profile(QWEN3_8B, 80)
+        self.assertEqual(profile["kv_bytes_per_token"], 2 * 36 * 8 * 128 * 2)
+        reserved = profile["weights_gb"] + profile["activation_gb"] + profile["overhead_gb"]
+        self.assertAlmostEqual(profile["kv_budget_gb"], 80 * 0.9 - reserved, places=2)
+        self.assertEqual(
+            profile["total_blocks"], int(profile["kv_budget_gb"] * 1e9 // (profile["kv_bytes_per_token"] * 16))
+        )
+        self.assertEqual(profile["kv_budget_tokens"], profile["total_blocks"] * 16)
+        int8 = admission_profile(QWEN3_8B, 80, kv_cache_precision="int8")
+        self.assertAlmostEqual(int8["total_blocks"] / profile["total_blocks"], 2, delta=0.01)
+        with self.assertRaises(ValueError):
+            admission_profile(QWEN3_8B, 16)
+
+    def test_reserve_and_release(self):
+        """Requests are rounded up to blocks, rejected once the budget is spent and admitted again after release."""
+        controller = AdmissionController(10, 16)
+        self.assertEqual(controller.blocks_for(100, 28), 8)
+        self.assertEqual(controller.blocks_for(100, 29), 9)
+        self.assertTrue(controller.can_admit(100, 60))
+        self.assertEqual(controller.try_reserve(100, 28), 8)
+        self.assertFalse(controller.can_admit(30, 5))
+        self.assertEqual(controller.try_reserve(30, 5), 0)
+        self.assertEqual(controller.try_reserve(20, 12), 2)
+        controller.release(8)
+        self.assertEqual(controller.free_blocks, 8)
+        stats = controller.stats()
+        self.assertEqual((stats["admitted"], stats["rejected"]), (2, 1))
+        self.assertEqual(stats["utilization"], 0.2)
+        with self.assertRaises(ValueError):
+            controller.release(3)
+
+    def test_invalid_lengths(self):
+        """Negative lengths and empty requests are rejected without touching the budget or the counts."""
+        controller = AdmissionController(10, 16)
+        for prompt_len, max_new_tokens in ((-200, 0), (0, 0), (5, -1)):
+            with self.assertRaises(ValueError):
+                controller.try_reserve(prompt_len, max_new_tokens)
+            with self.assertRaises(ValueError):
+                controller.can_admit(prompt_len, max_new_tokens)
+        self.assertEqual(controller.try_reserve(0, 1), 1)
+        with self.assertRaises(ValueError):
+            controller.release(-5)
+        stats = controller.stats()
+        self.assertEqual((stats["free_blocks"], stats["admitted"], stats["rejected"]), (9, 1, 0))
+
+    def test_concurrent_reservations(self):
+        """Threads sharing a controller never overcommit the budget and leave it whole when done."""
+        controller = AdmissionController(64, 16)
+        overcommitted = []
+
+        def worker():
+            for i in range(2000):
+                blocks = controller.try_reserve(16 * (i % 7), 16)
+                if blocks:
+                    if controller.free_blocks < 0:
+                        overcommitted.append(blocks)
+                    controller.release(blocks)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(overcommitted, [])
+        stats = controller.stats()
+        self.assertEqual(stats["free_blocks"], 64)
+        self.assertEqual(stats["admitted"] + stats["rejected"], 16000)
+
+    def test_controller_from_catalog(self):
+        """The factory resolves the model and GPU and rejects unknown models and replicas without room."""
+        models = {"Qwen3-8B": QWEN3_8B_CONFIG}
+        controller = admission_controller("Qwen3-8B", gpu="h100_80", models=models)
+        self.assertEqual(controller.profile, admission_profile(QWEN3_8B, 80))
+        two_gpus = admission_controller("Qwen3-8B", memory_gb=80, num_gpus=2, models=models)
+        self.assertGreater(two_gpus.total_blocks, 2 * controller.total_blocks)
+        with self.assertRaises(ValueError):
+            admission_controller("Unknown-8B", gpu="h100_80", models=models)
+        with self.assertRaises(ValueError):
+            admission_controller("Qwen3-8B", gpu="4090_24", models=models, precision="float32")
+
+    def test_decision_rate(self):
+        """Reserve/release pairs run at well over 100k per second on one thread."""
+        controller = AdmissionController(1000, 16)
+        start = time.perf_counter()
+        for i in range(100000):
+            blocks = controller.try_reserve(i % 4096, 256)
+            if blocks:
+                controller.release(blocks)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+"""Offline bulk memory calculations, without the Flask server.
+
+Scenarios are read as a stream from JSONL or CSV (a file or stdin), evaluated in chunks across a process
+pool and written in input order as JSONL or CSV. At most ``2 * workers`` chunks are in flight, so memory use
+is bounded by the chunk size, not by the input size. Every output row carries its input row number and
+either the memory requirements or the error of that row; one bad row never fails the run.
+
+Example::
+
+    llm-memory-batch --input sweep.csv --output results.jsonl --type inference --workers 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+from utils.help import load_catalog
+from utils.scenario import (
+    ARCHITECTURE_PARAMETERS,
+    INFERENCE_PARAMETERS,
+    TRAINING_PARAMETERS,
+    resolve_scenario,
+    run_scenario,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODELS_DIR = os.path.join(BACKEND_DIR, "models")
+DEFAULT_STORE_DIR = os.environ.get("CONFIG_STORE_DIR", os.path.join(BACKEND_DIR, "store"))
+FORMATS = ("jsonl", "csv")
+# Memory fields of both calculators, in output column order
+MEMORY_COLUMNS = [
+    "model_weights_memory",
+    "kv_cache_memory",
+    "activation_memory",
+    "optimizer_memory",
+    "gradients_memory",
+    "overhead_memory",
+    "inference_memory",
+    "training_memory",
+    "warnings",
+]
+SCENARIO_COLUMNS = ["calculation_type", "model_name"] + list(
+    dict.fromkeys(ARCHITECTURE_PARAMETERS + INFERENCE_PARAMETERS + TRAINING_PARAMETERS)
+)
+CSV_COLUMNS = ["row", "status", "error"] + SCENARIO_COLUMNS + MEMORY_COLUMNS
+
+# Catalog of the current worker process, loaded once by _init_worker
+_MODELS: Dict[str, Dict[str, Any]] = {}
+
+
+def _init_worker(models_dir: str, store_dir: str | None):
+    global _MODELS
+    _MODELS = load_catalog(models_dir, store_dir)
+
+
+def detect_format(path: str, default: str = "jsonl") -> str:
+    """Guess the format from a file extension ("-" is stdin/stdout)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return default
+
+
+def read_scenarios(stream: TextIO, input_format: str) -> Iterator[Tuple[int, Dict[str, Any] | str]]:
+    """Yield (row number, scenario) pairs, or (row number, error message) for unparsable rows.
+
+    Row numbers start at 1 and count data rows (blank JSONL lines and the CSV header are skipped).
+    """
+    if input_format == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, row
+        return
+    row_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            scenario = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, f"Invalid JSON: {e}"
+            continue
+        yield row_number, scenario if isinstance(scenario, dict) else "Each JSONL line must be an object"
+
+
+def evaluate_chunk(
+    calculation_type: str, rows: List[Tuple[int, Dict[str, Any] | str]], models: Dict[str, Dict[str, Any]] | None = None
+) -> List[Dict[str, Any]]:
+    """Evaluate one chunk of scenarios; errors are reported per row instead of raised."""
+    models = _MODELS if models is None else models
+    results = []
+    for row_number, scenario in rows:
+        if isinstance(scenario, str):
+            results.append({"row": row_number, "status": "error", "error": scenario})
+            continue
+        row_type = scenario.get("calculation_type") or calculation_type
+        try:
+            params = resolve_scenario(row_type, scenario, models)
+            memory = run_scenario(row_type, params)
+        except Exception as e:
+            results.append({"row": row_number, "status": "error", "error": str(e), "scenario": scenario})
+            continue
+        results.append(
+            {
+                "row": row_number,
+                "status": "ok",
+                "calculation_type": row_type,
+                "scenario": scenario,
+                "parameters": params,
+                "memory_requirements": memory,
+            }
+        )
+    return results
+
+
+class _JsonlWriter:
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, results: List[Dict[str, Any]]):
+        self.stream.write("".join(json.dumps(result) + "\n" for result in results))
+
+
+class _CsvWriter:
+    def __init__(self, stream: TextIO):
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, results: List[Dict[str, Any]]):
+        for result in results:
+            row = {"row": result["row"], "status": result["status"], "error": result.get("error", "")}
+            row.update(result.get("scenario", {}))
+            row.update(result.get("parameters", {}))
+            if "calculation_type" in result:
+                row["calculation_type"] = result["calculation_type"]
+            memory = dict(result.get("memory_requirements", {}))
+            if "warnings" in memory:
+                memory["warnings"] = "; ".join(memory["warnings"])
+            row.update(memory)
+            self.writer.writerow(row)
+
+
+class _InlineExecutor(Executor):
+    """Runs chunks in the calling process (``--workers 0``), e.g. for debugging or tests."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def run_batch(
+    input_stream: TextIO,
+    output_stream: TextIO,
+    calculation_type: str = "inference",
+    input_format: str = "jsonl",
+    output_format: str = "jsonl",
+    workers: int | None = None,
+    chunk_size: int = 1000,
+    models_dir: str = DEFAULT_MODELS_DIR,
+    store_dir: str | None = DEFAULT_STORE_DIR,
+    progress_stream: TextIO | None = None,
+    progress_interval: float = 5.0,
+) -> Dict[str, Any]:
+    """Evaluate every scenario of ``input_stream`` and write the results to ``output_stream``.
+
+    Args:
+        input_stream: Scenarios, one per JSONL line or CSV row
+        output_stream: Destination of the results, in input order
+        calculation_type: Default calculation type for rows without a ``calculation_type`` field
+        input_format: "jsonl" or "csv"
+        output_format: "jsonl" or "csv"
+        workers: Worker processes (default: CPU count); 0 evaluates in the calling process
+        chunk_size: Scenarios per task sent to a worker
+        models_dir: Model config directory
+        store_dir: Config store directory, used instead of ``models_dir`` once it has a snapshot
+        progress_stream: Where progress lines are written (e.g. stderr), None to disable
+        progress_interval: Seconds between progress lines
+
+    Returns:
+        Run statistics: rows, ok, errors, seconds, rows_per_second
+    """
+    if input_format not in FORMATS or output_format not in FORMATS:
+        raise ValueError(f"Invalid format. Must be one of: {list(FORMATS)}")
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    writer = _CsvWriter(output_stream) if output_format == "csv" else _JsonlWriter(output_stream)
+    stats = {"rows": 0, "ok": 0, "errors": 0}
+    start = last_progress = time.perf_counter()
+
+    def drain(future: Future):
+        nonlocal last_progress
+        results = future.result()
+        writer.write(results)
+        errors = sum(result["status"] == "error" for result in results)
+        stats["rows"] += len(results)
+        stats["errors"] += errors
+        stats["ok"] += len(results) - errors
+        now = time.perf_counter()
+        if progress_stream is not None and now - last_progress >= progress_interval:
+            last_progress = now
+            progress_stream.write(
+                f"processed {stats['rows']} rows ({stats['errors']} errors), "
+                f"{stats['rows'] / (now - start):.0f} rows/s\n"
+            )
+            progress_stream.flush()
+
+    if workers == 0:
+        _init_worker(models_dir, store_dir)
+        executor: Executor = _InlineExecutor()
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(models_dir, store_dir))
+    with executor:
+        pending: deque = deque()
+        for chunk in _chunks(read_scenarios(input_stream, input_format), chunk_size):
+            pending.append(executor.submit(evaluate_chunk, calculation_type, chunk))
+            # Bounded in-flight work keeps memory flat and the output in input order
+            if len(pending) >= 2 * max(workers, 1):
+                drain(pending.popleft())
+        while pending:
+            drain(pending.popleft())
+    output_stream.flush()
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["rows_per_second"] = round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线批量计算 LLM 显存需求")
+    parser.add_argument("--input", default="-", help="场景输入文件（JSONL 或 CSV），- 表示标准输入")
+    parser.add_argument("--output", default="-", help="结果输出文件（JSONL 或 CSV），- 表示标准输出")
+    parser.add_argument("--input_format", choices=FORMATS, default=None, help="输入格式，默认按扩展名判断")
+    parser.add_argument("--output_format", choices=FORMATS, default=None, help="输出格式，默认按扩展名判断")
+    parser.add_argument("--type", choices=("inference", "training"), default="inference", help="默认计算类型")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为 CPU 核数，0 表示不使用进程池")
+    parser.add_argument("--chunk_size", type=int, default=1000, help="每个任务包含的场景数")
+    parser.add_argument("--models_dir", default=DEFAULT_MODELS_DIR, help="模型配置文件目录")
+    parser.add_argument("--store_dir", default=DEFAULT_STORE_DIR, help="配置存储根目录")
+    parser.add_argument("--progress_interval", type=float, default=5.0, help="进度输出间隔（秒）")
+    args = parser.parse_args()
+
+    input_format = args.input_format or detect_format(args.input)
+    output_format = args.output_format or detect_format(args.output)
+    input_stream = sys.stdin if args.input == "-" else open(args.input, newline="")
+    output_stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        stats = run_batch(
+            input_stream,
+            output_stream,
+            calculation_type=args.type,
+            input_format=input_format,
+            output_format=output_format,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            models_dir=args.models_dir,
+            store_dir=args.store_dir,
+            progress_stream=sys.stderr,
+            progress_interval=args.progress_interval,
+        )
+    finally:
+        for stream in (input_stream, output_stream):
+            if stream not in (sys.stdin, sys.stdout):
+                stream.close()
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["rows"] and not stats["ok"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
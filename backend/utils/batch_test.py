@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import os
+import unittest
+
+from utils.batch import detect_format, evaluate_chunk, read_scenarios, run_batch
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
+
+
+class TestBatch(unittest.TestCase):
+    """Test cases for the offline bulk calculation CLI."""
+
+    def _run(self, text: str, **kwargs):
+        output = io.StringIO()
+        stats = run_batch(io.StringIO(text), output, models_dir=MODELS_DIR, store_dir=None, **kwargs)
+        return stats, output.getvalue()
+
+    def test_detect_format(self):
+        """Formats are detected from the file extension."""
+        self.assertEqual(detect_format("sweep.csv"), "csv")
+        self.assertEqual(detect_format("sweep.jsonl"), "jsonl")
+        self.assertEqual(detect_format("-"), "jsonl")
+
+    def test_per_row_errors(self):
+        """Bad rows are reported in place and do not stop the run."""
+        lines = [
+            {"model_name": "Qwen3-8B", "batch_size": 1, "sequence_length": 1024, "kv_cache_precision": "bfloat16"},
+            {"model_name": "Missing", "batch_size": 1, "sequence_length": 1024, "kv_cache_precision": "bfloat16"},
+            {"model_name": "Qwen3-8B", "batch_size": 1, "sequence_length": 1024},
+        ]
+        text = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n\n[1]\n"
+        stats, output = self._run(text, workers=0)
+        results = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual((stats["rows"], stats["ok"], stats["errors"]), (5, 1, 4))
+        self.assertEqual([r["row"] for r in results], [1, 2, 3, 4, 5])
+        self.assertEqual(results[0]["memory_requirements"]["model_weights_memory"], "16.00 GB")
+        self.assertIn("not found", results[1]["error"])
+        self.assertEqual(results[2]["error"], "kv_cache_precision is required")
+        self.assertIn("Invalid JSON", results[3]["error"])
+
+    def test_csv_round_trip(self):
+        """CSV cells are coerced to numbers and booleans, and explicit architectures need no model."""
+        text = (
+            "calculation_type,model_name,model_size,precision,num_hidden_layers,hidden_size,num_attention_heads,"
+            "head_dim,num_key_value_heads,batch_size,sequence_length,optimizer,trainable_parameters,"
+            "use_flash_attention\n"
+            "training,Qwen3-8B,,,,,,,,2,2048,AdamW,100,true\n"
+            "training,,7,bfloat16,32,4096,32,128,8,1,1024,SGD,50,false\n"
+        )
+        stats, output = self._run(text, input_format="csv", output_format="csv", workers=0)
+        rows = list(csv.DictReader(io.StringIO(output)))
+        self.assertEqual(stats["errors"], 0, rows)
+        self.assertEqual(rows[0]["optimizer_memory"], "64.00 GB")
+        self.assertEqual(rows[0]["use_flash_attention"], "True")
+        self.assertEqual(rows[1]["model_weights_memory"], "14.00 GB")
+        self.assertEqual(rows[1]["gradients_memory"], "7.00 GB")
+
+    def test_process_pool_keeps_order(self):
+        """Chunks evaluated by worker processes are written in input order."""
+        lines = [
+            json.dumps(
+                {
+                    "model_name": "Qwen3-8B",
+                    "batch_size": 1 + i % 8,
+                    "sequence_length": 512,
+                    "kv_cache_precision": "int8",
+                }
+            )
+            for i in range(500)
+        ]
+        stats, output = self._run("\n".join(lines), workers=2, chunk_size=37)
+        self.assertEqual(stats["ok"], 500)
+        self.assertEqual([json.loads(line)["row"] for line in output.splitlines()], list(range(1, 501)))
+
+    def test_matches_inline_evaluation(self):
+        """A scenario gives the same result as evaluating its chunk directly."""
+        scenario = {"model_name": "Qwen3-8B", "batch_size": 4, "sequence_length": 4096, "kv_cache_precision": "int8"}
+        with open(os.path.join(MODELS_DIR, "Qwen3-8B.json")) as fr:
+            models = {"Qwen3-8B": json.load(fr)}
+        expected = evaluate_chunk("inference", [(1, scenario)], models)[0]
+        _, output = self._run(json.dumps(scenario), workers=0)
+        self.assertEqual(json.loads(output)["memory_requirements"], expected["memory_requirements"])
+        self.assertEqual(list(read_scenarios(io.StringIO(json.dumps(scenario)), "jsonl")), [(1, scenario)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,246 @@
+"""Calibrate the empirical coefficients of the memory calculator against measured peak memory.
+
+Measurements are scenarios (as accepted by the batch CLI) plus the measured peak memory of the run, e.g. a
+``torch.cuda.max_memory_reserved()`` or nvidia-smi export joined with the launch parameters, and optionally
+the framework and GPU they were taken on. Every estimate is linear in the coefficients of
+``DEFAULT_COEFFICIENTS`` (the inference and training overheads, the Page Attention factor and the Flash
+Attention factor), so each row is evaluated once with all coefficients at zero and once per coefficient,
+which gives the design matrix of a least squares fit per (framework, GPU) group. Coefficients are constrained
+to be non-negative, as the calculator drops non-positive terms: a coefficient that the unconstrained fit
+drives below zero is fixed at zero and the others are refitted. Residuals are those of the calculator itself
+run with the fitted coefficients. Fits are saved as named calibration profiles that the API applies per
+request.
+
+Example::
+
+    llm-memory-calibrate --input measurements.csv --profiles store/calibration_profiles.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from config.memory import DEFAULT_COEFFICIENTS
+from utils.batch import DEFAULT_MODELS_DIR, DEFAULT_STORE_DIR, FORMATS, detect_format, read_scenarios
+from utils.config_store import _write_atomic
+from utils.help import load_catalog
+from utils.scenario import resolve_scenario, run_scenario
+
+COEFFICIENT_NAMES = list(DEFAULT_COEFFICIENTS)
+DEFAULT_PROFILES_PATH = os.path.join(DEFAULT_STORE_DIR, "calibration_profiles.json")
+# Accepted measurement fields and their scale to GB
+MEASUREMENT_FIELDS = {"measured_memory_gb": 1, "measured_memory_mib": 2**20 / 1e9, "measured_memory_bytes": 1e-9}
+# Coefficient value used to probe each column; large enough that the 0.01 GB rounding of the estimate vanishes
+_PROBE = 1000.0
+
+
+def _estimate_gb(memory: Dict[str, Any]) -> float:
+    total = memory.get("inference_memory") or memory["training_memory"]
+    return float(total.split()[0])
+
+
+def measured_gb(row: Dict[str, Any]) -> float:
+    """Return the measured peak memory of a row in GB."""
+    for field, scale in MEASUREMENT_FIELDS.items():
+        if row.get(field) not in (None, ""):
+            return float(row[field]) * scale
+    raise ValueError(f"One of {list(MEASUREMENT_FIELDS)} is required")
+
+
+def design_row(calculation_type: str, params: Dict[str, Any]) -> Tuple[float, List[float]]:
+    """Split the estimate of a scenario into its coefficient-free part and one column per coefficient."""
+    zero = dict.fromkeys(COEFFICIENT_NAMES, 0.0)
+    base = _estimate_gb(run_scenario(calculation_type, params, zero))
+    columns = [
+        (_estimate_gb(run_scenario(calculation_type, params, {**zero, name: _PROBE})) - base) / _PROBE
+        for name in COEFFICIENT_NAMES
+    ]
+    return base, columns
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """Solve a small linear system by Gaussian elimination with partial pivoting."""
+    n = len(vector)
+    augmented = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(augmented[r][col]))
+        if abs(augmented[pivot][col]) < 1e-12:
+            raise ValueError("Measurements do not determine every coefficient (collinear scenarios)")
+        augmented[col], augmented[pivot] = augmented[pivot], augmented[col]
+        for r in range(col + 1, n):
+            factor = augmented[r][col] / augmented[col][col]
+            for c in range(col, n + 1):
+                augmented[r][c] -= factor * augmented[col][c]
+    solution = [0.0] * n
+    for r in reversed(range(n)):
+        solution[r] = (augmented[r][n] - sum(augmented[r][c] * solution[c] for c in range(r + 1, n))) / augmented[r][r]
+    return solution
+
+
+def residual_stats(measured: List[float], predicted: List[float]) -> Dict[str, float]:
+    """Error of the predictions against the measurements, in GB and relative."""
+    errors = [p - m for m, p in zip(measured, predicted)]
+    return {
+        "rmse_gb": round(math.sqrt(sum(e * e for e in errors) / len(errors)), 3),
+        "mae_gb": round(sum(abs(e) for e in errors) / len(errors), 3),
+        "max_abs_gb": round(max(abs(e) for e in errors), 3),
+        "mean_bias_gb": round(sum(errors) / len(errors), 3),
+        "mape": round(sum(abs(e) / m for e, m in zip(errors, measured) if m) / len(errors), 4),
+    }
+
+
+def _least_squares(rows: List[Tuple[float, List[float], float]], free: List[int], targets: List[float]) -> List[float]:
+    """Solve the normal equations X^T X b = X^T y over the ``free`` columns."""
+    normal = [[sum(columns[i] * columns[j] for _, columns, _ in rows) for j in free] for i in free]
+    moments = [sum(columns[i] * y for (_, columns, _), y in zip(rows, targets)) for i in free]
+    return _solve(normal, moments) if free else []
+
+
+def fit_coefficients(
+    rows: List[Tuple[float, List[float], float]],
+    scenarios: List[Tuple[str, Dict[str, Any]]] | None = None,
+) -> Dict[str, Any]:
+    """Non-negative least squares fit of the coefficients on (base, columns, measured) rows.
+
+    Coefficients without any signal in the rows (e.g. the Page Attention factor when no scenario uses it)
+    keep their default value and are reported as not fitted; fitted coefficients that would be negative are
+    fixed at zero and reported as clamped.
+
+    Args:
+        rows: (coefficient-free estimate, column per coefficient, measured GB) per measurement
+        scenarios: (calculation type, resolved parameters) per row, to compute the residuals with the
+            calculator; without them the residuals use the linear model of the rows
+    """
+    active = [j for j in range(len(COEFFICIENT_NAMES)) if any(abs(columns[j]) > 1e-9 for _, columns, _ in rows)]
+    if len(rows) < len(active):
+        raise ValueError(f"At least {len(active)} measurements are required, got {len(rows)}")
+    coefficients = dict(DEFAULT_COEFFICIENTS)
+    inactive_offsets = [
+        sum(columns[j] * coefficients[COEFFICIENT_NAMES[j]] for j in range(len(COEFFICIENT_NAMES)) if j not in active)
+        for _, columns, _ in rows
+    ]
+    targets = [measured - base - offset for (base, _, measured), offset in zip(rows, inactive_offsets)]
+    # Clamp the most negative coefficient at zero and refit the others until every one is non-negative
+    free, clamped = list(active), []
+    solution = _least_squares(rows, free, targets)
+    while solution and min(solution) < 0:
+        clamped.append(free.pop(solution.index(min(solution))))
+        solution = _least_squares(rows, free, targets)
+    for j, value in [*zip(free, solution), *((j, 0.0) for j in clamped)]:
+        coefficients[COEFFICIENT_NAMES[j]] = round(value, 4)
+
+    def predict(values: Dict[str, float]) -> List[float]:
+        if scenarios is not None:
+            return [_estimate_gb(run_scenario(row_type, params, values)) for row_type, params in scenarios]
+        return [
+            base + sum(c * values[name] for c, name in zip(columns, COEFFICIENT_NAMES)) for base, columns, _ in rows
+        ]
+
+    measured = [m for _, _, m in rows]
+    return {
+        "coefficients": coefficients,
+        "fitted": [COEFFICIENT_NAMES[j] for j in active],
+        "clamped": [COEFFICIENT_NAMES[j] for j in sorted(clamped)],
+        "rows": len(rows),
+        "residuals": residual_stats(measured, predict(coefficients)),
+        "default_residuals": residual_stats(measured, predict(DEFAULT_COEFFICIENTS)),
+    }
+
+
+def profile_name(framework: str, gpu: str) -> str:
+    return f"{framework}-{gpu}".replace(" ", "_")
+
+
+def calibrate(
+    measurements: Iterable[Tuple[int, Dict[str, Any] | str]],
+    models: Dict[str, Dict[str, Any]],
+    calculation_type: str = "inference",
+) -> Dict[str, Any]:
+    """Fit one profile per (framework, GPU) group of the measurements.
+
+    Args:
+        measurements: (row number, scenario with a measured memory field) pairs, see ``read_scenarios``
+        models: The model catalog
+        calculation_type: Default calculation type for rows without a ``calculation_type`` field
+
+    Returns:
+        {"profiles": {name: profile}, "errors": [{"row", "error"}]}; groups that cannot be fitted are
+        reported in "errors" with their profile name
+    """
+    groups: Dict[Tuple[str, str], List[Tuple[float, List[float], float]]] = {}
+    group_scenarios: Dict[Tuple[str, str], List[Tuple[str, Dict[str, Any]]]] = {}
+    errors = []
+    for row_number, row in measurements:
+        if isinstance(row, str):
+            errors.append({"row": row_number, "error": row})
+            continue
+        try:
+            row_type = row.get("calculation_type") or calculation_type
+            params = resolve_scenario(row_type, row, models)
+            base, columns = design_row(row_type, params)
+            key = (row.get("framework") or "default", row.get("gpu") or "default")
+            groups.setdefault(key, []).append((base, columns, measured_gb(row)))
+            group_scenarios.setdefault(key, []).append((row_type, params))
+        except Exception as e:
+            errors.append({"row": row_number, "error": str(e)})
+    profiles = {}
+    for (framework, gpu), rows in sorted(groups.items()):
+        name = profile_name(framework, gpu)
+        try:
+            fit = fit_coefficients(rows, group_scenarios[(framework, gpu)])
+            profiles[name] = {"framework": framework, "gpu": gpu, **fit}
+        except ValueError as e:
+            errors.append({"profile": name, "error": str(e)})
+    return {"profiles": profiles, "errors": errors}
+
+
+def load_profiles(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load the saved calibration profiles, {} when there are none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_profiles(path: str, profiles: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Add or replace ``profiles`` in the profile file; return every saved profile."""
+    saved = load_profiles(path)
+    created_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    for name, profile in profiles.items():
+        saved[name] = {**profile, "created_at": created_at}
+    _write_atomic(path, json.dumps(saved, indent=2, sort_keys=True).encode())
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据实测显存拟合显存计算系数并保存校准配置")
+    parser.add_argument("--input", default="-", help="实测数据文件（JSONL 或 CSV），- 表示标准输入")
+    parser.add_argument("--input_format", choices=FORMATS, default=None, help="输入格式，默认按扩展名判断")
+    parser.add_argument("--type", choices=("inference", "training"), default="inference", help="默认计算类型")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_PATH, help="校准配置文件路径")
+    parser.add_argument("--models_dir", default=DEFAULT_MODELS_DIR, help="模型配置文件目录")
+    parser.add_argument("--store_dir", default=DEFAULT_STORE_DIR, help="配置存储根目录")
+    parser.add_argument("--dry_run", action="store_true", help="只输出拟合结果，不保存校准配置")
+    args = parser.parse_args()
+
+    input_format = args.input_format or detect_format(args.input)
+    input_stream = sys.stdin if args.input == "-" else open(args.input, newline="")
+    try:
+        report = calibrate(
+            read_scenarios(input_stream, input_format), load_catalog(args.models_dir, args.store_dir), args.type
+        )
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+    if report["profiles"] and not args.dry_run:
+        save_profiles(args.profiles, report["profiles"])
+    print(json.dumps(report, indent=2))
+    return 0 if report["profiles"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
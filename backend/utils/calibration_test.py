@@ -0,0 +1,162 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from config.memory import DEFAULT_COEFFICIENTS
+from utils.batch import read_scenarios
+from utils.calibration import calibrate, design_row, fit_coefficients, load_profiles, save_profiles
+from utils.scenario import resolve_scenario, run_scenario
+
+MODELS = {
+    "Qwen3-8B": {
+        "torch_dtype": "bfloat16",
+        "num_hidden_layers": 36,
+        "hidden_size": 4096,
+        "num_attention_heads": 32,
+        "head_dim": 128,
+        "num_key_value_heads": 8,
+    }
+}
+TRUE_COEFFICIENTS = {
+    "inference_overhead_gb": 2.5,
+    "training_overhead_gb": 3.2,
+    "paged_attention_factor": 0.4,
+    "flash_attention_factor": 35,
+}
+
+
+def _measurements(coefficients, framework="vllm", gpu="h100_80"):
+    """Scenarios with the peak memory the calculator predicts for ``coefficients``."""
+    rows = []
+    for batch_size in (1, 4, 16):
+        for sequence_length in (2048, 8192):
+            for flash, paged in ((False, False), (True, False), (False, True), (True, True)):
+                rows.append(
+                    {
+                        "calculation_type": "inference",
+                        "model_name": "Qwen3-8B",
+                        "batch_size": batch_size,
+                        "sequence_length": sequence_length,
+                        "kv_cache_precision": "bfloat16",
+                        "use_flash_attention": flash,
+                        "use_page_attention": paged,
+                    }
+                )
+            rows.append(
+                {
+                    "calculation_type": "training",
+                    "model_name": "Qwen3-8B",
+                    "batch_size": batch_size,
+                    "sequence_length": sequence_length,
+                    "optimizer": "AdamW",
+                    "trainable_parameters": 100,
+                    "use_flash_attention": True,
+                }
+            )
+    for row in rows:
+        params = resolve_scenario(row["calculation_type"], row, MODELS)
+        memory = run_scenario(row["calculation_type"], params, coefficients)
+        total = memory.get("inference_memory") or memory["training_memory"]
+        row.update(measured_memory_gb=float(total.split()[0]), framework=framework, gpu=gpu)
+    return rows
+
+
+class TestCalibration(unittest.TestCase):
+    """Test cases for the calibration of the memory calculator coefficients."""
+
+    def test_design_row_is_linear(self):
+        """The base plus the columns weighted by the coefficients reproduce the estimate."""
+        scenario = {
+            "model_name": "Qwen3-8B",
+            "batch_size": 4,
+            "sequence_length": 4096,
+            "kv_cache_precision": "bfloat16",
+        }
+        params = resolve_scenario(
+            "inference", {**scenario, "use_page_attention": True, "use_flash_attention": True}, MODELS
+        )
+        base, columns = design_row("inference", params)
+        estimate = base + sum(c * DEFAULT_COEFFICIENTS[name] for c, name in zip(columns, DEFAULT_COEFFICIENTS))
+        self.assertAlmostEqual(
+            estimate, float(run_scenario("inference", params)["inference_memory"].split()[0]), places=1
+        )
+        self.assertAlmostEqual(columns[0], 1, places=4)
+        self.assertEqual(columns[1], 0)
+
+    def test_fit_recovers_coefficients(self):
+        """Measurements generated from known coefficients are fitted back with a small residual."""
+        rows = _measurements(TRUE_COEFFICIENTS)
+        report = calibrate(enumerate(rows, start=1), MODELS)
+        self.assertEqual(report["errors"], [])
+        profile = report["profiles"]["vllm-h100_80"]
+        for name, value in TRUE_COEFFICIENTS.items():
+            self.assertAlmostEqual(profile["coefficients"][name], value, delta=0.05 * value)
+        self.assertLess(profile["residuals"]["rmse_gb"], 0.05)
+        self.assertGreater(profile["default_residuals"]["rmse_gb"], profile["residuals"]["rmse_gb"])
+
+    def test_unobserved_coefficients_keep_defaults(self):
+        """Coefficients without signal in the measurements are not fitted."""
+        rows = [row for row in _measurements(TRUE_COEFFICIENTS) if row["calculation_type"] == "training"]
+        report = calibrate(enumerate(rows, start=1), MODELS)
+        profile = report["profiles"]["vllm-h100_80"]
+        self.assertEqual(profile["fitted"], ["training_overhead_gb", "flash_attention_factor"])
+        self.assertEqual(
+            profile["coefficients"]["paged_attention_factor"], DEFAULT_COEFFICIENTS["paged_attention_factor"]
+        )
+        with self.assertRaises(ValueError):
+            fit_coefficients(rows=[(1.0, [0.0, 1.0, 0.0, 1.0], 2.0)])
+
+    def test_fit_is_non_negative(self):
+        """Measurements below the weights push the overhead negative; it is clamped and the rest refitted."""
+        rows = [row for row in _measurements(TRUE_COEFFICIENTS) if row["calculation_type"] == "inference"]
+        for row in rows:
+            row["measured_memory_gb"] -= 3.0
+        report = calibrate(enumerate(rows, start=1), MODELS)
+        profile = report["profiles"]["vllm-h100_80"]
+        self.assertEqual(profile["clamped"], ["inference_overhead_gb"])
+        self.assertEqual(profile["coefficients"]["inference_overhead_gb"], 0)
+        self.assertTrue(all(value >= 0 for value in profile["coefficients"].values()))
+        # Residuals are those of the calculator with the saved coefficients
+        errors = []
+        for row in rows:
+            params = resolve_scenario("inference", row, MODELS)
+            memory = run_scenario("inference", params, profile["coefficients"])
+            errors.append(float(memory["inference_memory"].split()[0]) - row["measured_memory_gb"])
+        self.assertAlmostEqual(profile["residuals"]["max_abs_gb"], max(abs(e) for e in errors), places=3)
+        self.assertAlmostEqual(profile["residuals"]["mean_bias_gb"], sum(errors) / len(errors), places=3)
+
+    def test_csv_measurements_and_profiles(self):
+        """CSV exports with nvidia-smi MiB values are read, bad rows reported and profiles saved."""
+        rows = _measurements(TRUE_COEFFICIENTS, framework="sglang", gpu="4090_24")
+        lines = [
+            "calculation_type,model_name,batch_size,sequence_length,kv_cache_precision,framework,gpu,measured_memory_mib"
+        ]
+        for row in rows:
+            if (
+                row["calculation_type"] == "inference"
+                and not row["use_flash_attention"]
+                and not row["use_page_attention"]
+            ):
+                mib = row["measured_memory_gb"] * 1e9 / 2**20
+                lines.append(
+                    f"inference,Qwen3-8B,{row['batch_size']},{row['sequence_length']},bfloat16,sglang,4090_24,{mib}"
+                )
+        lines.append("inference,Unknown-1B,1,1,bfloat16,sglang,4090_24,1000")
+        report = calibrate(read_scenarios(io.StringIO("\n".join(lines)), "csv"), MODELS)
+        self.assertEqual([error["row"] for error in report["errors"]], [7])
+        self.assertAlmostEqual(
+            report["profiles"]["sglang-4090_24"]["coefficients"]["inference_overhead_gb"], 2.5, delta=0.05
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "calibration_profiles.json")
+            save_profiles(path, report["profiles"])
+            save_profiles(path, {"other": {"coefficients": TRUE_COEFFICIENTS}})
+            self.assertEqual(sorted(load_profiles(path)), ["other", "sglang-4090_24"])
+            with open(path) as f:
+                self.assertIn("created_at", json.load(f)["other"])
+
+
+if __name__ == "__main__":
+    unittest.main()
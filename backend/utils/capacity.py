@@ -0,0 +1,264 @@
+"""Fleet capacity planning: from a traffic profile and latency SLOs to replicas and GPUs.
+
+Every (model, GPU, parallel layout) candidate is sized in closed form:
+
+- memory: weights and per-GPU overhead come first, and what is left of the usable memory holds KV cache,
+  which bounds the number of sequences a replica can keep in flight;
+- latency: a decode step reads the weights and the KV cache of the batch (bandwidth bound) or is compute
+  bound for large batches; the TPOT SLO bounds the batch size, and the prefill of a tail-length prompt must
+  fit in the TTFT SLO;
+- throughput: a replica serving ``r`` requests/s spends ``r * prefill`` seconds per second on prefill and
+  needs ``r * output_tokens`` decode tokens/s, which gives its request rate at the chosen batch size.
+
+Tensor parallelism divides weights, bandwidth and compute across the GPUs of a stage; pipeline parallelism
+divides memory and multiplies throughput (one micro-batch per stage) but does not shorten a decode step.
+Interconnect traffic is not modeled, so layouts over PCIe-only GPUs are optimistic.
+"""
+
+import math
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+from config.memory import DATA_TYPE_SIZES, DEFAULT_COEFFICIENTS
+from utils.memory import _get_kv_cache
+
+# Fraction of GPU memory the serving engine may use (as vLLM's gpu_memory_utilization)
+GPU_MEMORY_UTILIZATION = 0.9
+# Achievable fraction of peak memory bandwidth and of peak FLOPS
+BANDWIDTH_EFFICIENCY = 0.8
+MODEL_FLOPS_UTILIZATION = 0.5
+# Default utilization target: replicas are added until the load is at most this fraction of capacity
+TARGET_UTILIZATION = 0.8
+MAX_BATCH_SIZE = 512
+# (tensor parallel, pipeline parallel) layouts evaluated by default
+DEFAULT_LAYOUTS = [(1, 1), (2, 1), (4, 1), (8, 1), (8, 2)]
+_PERCENTILE_PATTERN = re.compile(r"^p\d+(\.\d+)?$")
+
+
+def validate_traffic(traffic: Dict[str, Any]):
+    """Raise ValueError unless the traffic profile is usable by ``size_layout``."""
+    if not traffic.get("qps") or float(traffic["qps"]) <= 0:
+        raise ValueError("qps must be a positive number")
+    for key in ("prompt_tokens", "output_tokens"):
+        percentiles = traffic.get(key)
+        if not isinstance(percentiles, dict) or not percentiles:
+            raise ValueError(f'{key} must be an object of percentiles, e.g. {{"p50": 512, "p99": 4096}}')
+        for name, value in percentiles.items():
+            if not _PERCENTILE_PATTERN.match(name) or not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f"Invalid {key} percentile {name}: {value}")
+    for name, value in (traffic.get("slo") or {}).items():
+        if name not in ("ttft_ms", "tpot_ms") or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"Invalid SLO {name}: {value}")
+
+
+def validate_target_utilization(value: Any) -> float:
+    """Parse a target utilization, raising ValueError unless it is in (0, 1]."""
+    target_utilization = float(value)
+    if not 0 < target_utilization <= 1:
+        raise ValueError("target_utilization must be in (0, 1]")
+    return target_utilization
+
+
+def _tail(percentiles: Dict[str, float]) -> float:
+    """Largest percentile given, e.g. p99 out of {"p50", "p90", "p99"}."""
+    return percentiles[max(percentiles, key=lambda p: float(p.lstrip("p")))]
+
+
+def _typical(percentiles: Dict[str, float]) -> float:
+    return percentiles.get("p50", _tail(percentiles))
+
+
+def model_profile(params: Dict[str, Any], kv_cache_precision: str, active_model_size: float | None) -> Dict[str, Any]:
+    """Per-model constants of the capacity model (sizes in GB, compute in FLOPs)."""
+    kv_gb_per_token = _get_kv_cache(
+        kv_cache_precision,
+        1,
+        1,
+        params["num_hidden_layers"],
+        params["hidden_size"],
+        params["num_attention_heads"],
+        params["head_dim"],
+        params["num_key_value_heads"],
+    )
+    return {
+        "weights_gb": params["model_size"] * DATA_TYPE_SIZES[params["precision"]],
+        "bytes_per_param": DATA_TYPE_SIZES[params["precision"]],
+        "model_size": params["model_size"],
+        "active_size": active_model_size or params["model_size"],
+        "kv_gb_per_token": kv_gb_per_token,
+        "num_attention_heads": params["num_attention_heads"],
+        # Causal attention score and value products per token pair, summed over layers
+        "attention_flops_per_token_pair": 2
+        * params["num_hidden_layers"]
+        * params["num_attention_heads"]
+        * params["head_dim"],
+    }
+
+
+def _prefill_seconds(model: Dict[str, Any], prompt_tokens: float, flops: float) -> float:
+    linear = 2 * model["active_size"] * 1e9 * prompt_tokens
+    attention = model["attention_flops_per_token_pair"] * prompt_tokens * prompt_tokens
+    return (linear + attention) / flops
+
+
+def _decode_step_seconds(model: Dict[str, Any], batch: int, context: float, bandwidth: float, flops: float) -> float:
+    # A MoE batch touches at most every expert once, however many tokens route to it
+    weights_read = min(model["model_size"], model["active_size"] * batch) * model["bytes_per_param"] * 1e9
+    kv_read = model["kv_gb_per_token"] * 1e9 * context * batch
+    compute = 2 * model["active_size"] * 1e9 * batch
+    return max((weights_read + kv_read) / bandwidth, compute / flops)
+
+
+def _decode_batch(
+    model: Dict[str, Any],
+    kv_budget_gb: float,
+    typical_context: float,
+    bandwidth: float,
+    flops: float,
+    tpot_slo: float | None,
+) -> Tuple[int, str] | None:
+    """Largest decode batch that fits the KV budget and the TPOT SLO, with what limits it; None if none does."""
+    memory_batch = min(MAX_BATCH_SIZE, int(kv_budget_gb / (model["kv_gb_per_token"] * typical_context)))
+    batch, limited_by = max(memory_batch, 1), "memory"
+    if tpot_slo is not None:
+        if _decode_step_seconds(model, 1, typical_context, bandwidth, flops) * 1000 > tpot_slo:
+            return None
+        if _decode_step_seconds(model, batch, typical_context, bandwidth, flops) * 1000 > tpot_slo:
+            # Step time grows monotonically with the batch: binary search the largest batch within the SLO
+            lo, hi = 1, batch
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if _decode_step_seconds(model, mid, typical_context, bandwidth, flops) * 1000 <= tpot_slo:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            batch, limited_by = lo, "latency"
+    return batch, limited_by
+
+
+def size_layout(
+    model: Dict[str, Any],
+    gpu: Dict[str, Any],
+    tensor_parallel: int,
+    pipeline_parallel: int,
+    traffic: Dict[str, Any],
+    target_utilization: float = TARGET_UTILIZATION,
+) -> Dict[str, Any]:
+    """Size one (model, GPU, layout) candidate.
+
+    Args:
+        model: ``model_profile`` output
+        gpu: GPU spec (memory_gb, bandwidth_gbps, fp16_tflops)
+        tensor_parallel: Tensor parallel degree
+        pipeline_parallel: Pipeline parallel degree
+        traffic: {"qps", "prompt_tokens": percentiles, "output_tokens": percentiles, "slo": {"ttft_ms", "tpot_ms"}}
+        target_utilization: Highest acceptable load as a fraction of capacity
+
+    Returns:
+        The sizing, with ``feasible`` False and a ``reason`` when the layout cannot meet the SLOs
+    """
+    gpus_per_replica = tensor_parallel * pipeline_parallel
+    result = {"tensor_parallel": tensor_parallel, "pipeline_parallel": pipeline_parallel}
+    result["gpus_per_replica"] = gpus_per_replica
+    if model["num_attention_heads"] % tensor_parallel:
+        return {**result, "feasible": False, "reason": "attention heads not divisible by tensor_parallel"}
+
+    usable_gb = gpu["memory_gb"] * GPU_MEMORY_UTILIZATION * gpus_per_replica
+    kv_budget_gb = usable_gb - model["weights_gb"] - DEFAULT_COEFFICIENTS["inference_overhead_gb"] * gpus_per_replica
+    prompt, output = traffic["prompt_tokens"], traffic["output_tokens"]
+    tail_context = _tail(prompt) + _tail(output)
+    # Average KV held by a sequence in flight: its prompt plus half of its output
+    typical_context = _typical(prompt) + _typical(output) / 2
+    if kv_budget_gb < model["kv_gb_per_token"] * tail_context:
+        return {**result, "feasible": False, "reason": "weights and a tail-length sequence do not fit in memory"}
+
+    bandwidth = gpu["bandwidth_gbps"] * 1e9 * BANDWIDTH_EFFICIENCY * tensor_parallel
+    flops = gpu["fp16_tflops"] * 1e12 * MODEL_FLOPS_UTILIZATION * tensor_parallel
+    slo = traffic.get("slo") or {}
+    ttft = _prefill_seconds(model, _tail(prompt), flops)
+    if slo.get("ttft_ms") is not None and ttft * 1000 > slo["ttft_ms"]:
+        return {
+            **result,
+            "feasible": False,
+            "reason": "tail prompt prefill exceeds the TTFT SLO",
+            "ttft_ms": ttft * 1000,
+        }
+
+    # Each pipeline stage works on its own micro-batch, so the KV budget is shared by pp micro-batches in flight
+    kv_budget_per_micro_batch = kv_budget_gb / pipeline_parallel
+    decode_batch = _decode_batch(
+        model, kv_budget_per_micro_batch, typical_context, bandwidth, flops, slo.get("tpot_ms")
+    )
+    if decode_batch is None:
+        return {**result, "feasible": False, "reason": "a single sequence exceeds the TPOT SLO"}
+    micro_batch, limited_by = decode_batch
+    batch = micro_batch * pipeline_parallel
+
+    # A micro-batch token crosses all pp stages, each running 1/pp of the layers: one full-model step per
+    # token, during which every micro-batch in flight advances by one token
+    step = _decode_step_seconds(model, micro_batch, typical_context, bandwidth, flops)
+    seconds_per_request = _prefill_seconds(model, _typical(prompt), flops) + _typical(output) * step / batch
+    replica_rps = 1 / seconds_per_request
+    replicas = max(1, math.ceil(traffic["qps"] / (replica_rps * target_utilization)))
+    return {
+        **result,
+        "feasible": True,
+        "replicas": replicas,
+        "total_gpus": replicas * gpus_per_replica,
+        "utilization": round(traffic["qps"] / (replicas * replica_rps), 3),
+        "replica_requests_per_second": round(replica_rps, 3),
+        "batch_size": batch,
+        "micro_batch_size": micro_batch,
+        "limited_by": limited_by,
+        "kv_cache_tokens": int(kv_budget_gb / model["kv_gb_per_token"]),
+        "ttft_ms": round(ttft * 1000, 1),
+        "tpot_ms": round(step * 1000, 2),
+    }
+
+
+def _rank(plan: Dict[str, Any]) -> tuple:
+    return (plan["total_gpus"], -plan["utilization"], plan["gpus_per_replica"], plan["model_name"], plan["gpu"])
+
+
+def plan_capacity(
+    models: Dict[str, Dict[str, Any]],
+    gpus: Dict[str, Dict[str, Any]],
+    traffic: Dict[str, Any],
+    layouts: Iterable[Tuple[int, int]] = DEFAULT_LAYOUTS,
+    target_utilization: float = TARGET_UTILIZATION,
+    best_layout_only: bool = True,
+    include_infeasible: bool = False,
+) -> Dict[str, Any]:
+    """Size every (model, GPU, layout) combination and rank the feasible ones by total GPUs.
+
+    Args:
+        models: Model name -> ``model_profile``
+        gpus: GPU id -> GPU spec
+        traffic: Traffic profile and SLOs, see ``size_layout``
+        layouts: (tensor parallel, pipeline parallel) pairs
+        target_utilization: Highest acceptable load as a fraction of capacity
+        best_layout_only: Keep only the layout needing the fewest GPUs for each (model, GPU) pair
+        include_infeasible: Also return the rejected candidates with their reason
+    """
+    layouts = list(layouts)
+    plans: List[Dict[str, Any]] = []
+    rejected: List[Dict[str, Any]] = []
+    for model_name, model in models.items():
+        for gpu_id, gpu in gpus.items():
+            for tensor_parallel, pipeline_parallel in layouts:
+                plan = size_layout(model, gpu, tensor_parallel, pipeline_parallel, traffic, target_utilization)
+                plan = {"model_name": model_name, "gpu": gpu_id, **plan}
+                (plans if plan["feasible"] else rejected).append(plan)
+    evaluated = len(plans) + len(rejected)
+    if best_layout_only:
+        best: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for plan in plans:
+            key = (plan["model_name"], plan["gpu"])
+            if key not in best or _rank(plan) < _rank(best[key]):
+                best[key] = plan
+        plans = list(best.values())
+    plans.sort(key=_rank)
+    result = {"plans": plans, "evaluated": evaluated}
+    if include_infeasible:
+        result["infeasible"] = rejected
+    return result
@@ -0,0 +1,102 @@
+import time
+import unittest
+
+from config.gpu import GPU_SPECS
+from config.memory import DEFAULT_COEFFICIENTS
+from utils.capacity import GPU_MEMORY_UTILIZATION, model_profile, plan_capacity, size_layout, validate_traffic
+
+QWEN3_32B = {
+    "model_size": 32,
+    "precision": "bfloat16",
+    "num_hidden_layers": 64,
+    "hidden_size": 5120,
+    "num_attention_heads": 64,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+}
+TRAFFIC = {
+    "qps": 50,
+    "prompt_tokens": {"p50": 1024, "p99": 8192},
+    "output_tokens": {"p50": 256, "p99": 2048},
+    "slo": {"ttft_ms": 2000, "tpot_ms": 50},
+}
+
+
+class TestCapacity(unittest.TestCase):
+    """Test cases for the fleet capacity planner."""
+
+    def setUp(self):
+        self.model = model_profile(QWEN3_32B, "bfloat16", None)
+
+    def test_memory_infeasible(self):
+        """A 64 GB model does not fit on one 24 GB GPU."""
+        plan = size_layout(self.model, GPU_SPECS["4090_24"], 1, 1, TRAFFIC)
+        self.assertFalse(plan["feasible"])
+        self.assertIn("memory", plan["reason"])
+
+    def test_replicas_cover_load(self):
+        """Replicas times per-replica capacity covers the QPS at the target utilization."""
+        plan = size_layout(self.model, GPU_SPECS["h100_80"], 2, 1, TRAFFIC)
+        self.assertTrue(plan["feasible"])
+        self.assertEqual(plan["total_gpus"], plan["replicas"] * 2)
+        self.assertGreaterEqual(plan["replicas"] * plan["replica_requests_per_second"] * 0.8, TRAFFIC["qps"])
+        self.assertLessEqual(plan["utilization"], 0.8)
+        self.assertLessEqual(plan["tpot_ms"], 50)
+
+    def test_latency_slo_limits_batch(self):
+        """A tight TPOT SLO caps the batch size below the memory limit."""
+        loose = size_layout(self.model, GPU_SPECS["h100_80"], 4, 1, TRAFFIC)
+        tight = size_layout(self.model, GPU_SPECS["h100_80"], 4, 1, {**TRAFFIC, "slo": {"tpot_ms": 12}})
+        self.assertEqual(tight["limited_by"], "latency")
+        self.assertLess(tight["batch_size"], loose["batch_size"])
+        self.assertLessEqual(tight["tpot_ms"], 12)
+        impossible = size_layout(self.model, GPU_SPECS["h100_80"], 4, 1, {**TRAFFIC, "slo": {"ttft_ms": 1}})
+        self.assertFalse(impossible["feasible"])
+
+    def test_without_slo(self):
+        """The SLO is optional: without one the batch is limited by memory only."""
+        plan = size_layout(self.model, GPU_SPECS["h100_80"], 2, 1, {**TRAFFIC, "slo": None})
+        self.assertTrue(plan["feasible"])
+        self.assertEqual(plan["limited_by"], "memory")
+        validate_traffic({**TRAFFIC, "slo": None})
+
+    def test_pipeline_parallel_shares_kv_budget(self):
+        """At a fixed KV budget, pp=2 splits the batch into micro-batches instead of doubling throughput."""
+        pp2_gpu = GPU_SPECS["h100_80"]
+        pp2 = size_layout(self.model, pp2_gpu, 1, 2, {**TRAFFIC, "slo": None})
+        # One GPU with the same bandwidth and compute, sized for the same KV budget as the pp=2 replica
+        usable_per_gpu = pp2_gpu["memory_gb"] * GPU_MEMORY_UTILIZATION
+        overhead = DEFAULT_COEFFICIENTS["inference_overhead_gb"]
+        pp1_gpu = {**pp2_gpu, "memory_gb": (2 * usable_per_gpu - overhead) / GPU_MEMORY_UTILIZATION}
+        pp1 = size_layout(self.model, pp1_gpu, 1, 1, {**TRAFFIC, "slo": None})
+        self.assertEqual(pp1["kv_cache_tokens"], pp2["kv_cache_tokens"])
+        self.assertEqual(pp2["micro_batch_size"] * 2, pp2["batch_size"])
+        self.assertLessEqual(pp2["batch_size"], pp1["batch_size"])
+        self.assertLess(pp2["replica_requests_per_second"], 1.5 * pp1["replica_requests_per_second"])
+
+    def test_validate_traffic(self):
+        """Malformed traffic profiles are rejected."""
+        validate_traffic(TRAFFIC)
+        for bad in (
+            {**TRAFFIC, "qps": 0},
+            {**TRAFFIC, "prompt_tokens": [512]},
+            {**TRAFFIC, "output_tokens": {"median": 5}},
+            {**TRAFFIC, "slo": {"e2e_ms": 5}},
+        ):
+            with self.assertRaises(ValueError):
+                validate_traffic(bad)
+
+    def test_plan_whole_space_is_fast(self):
+        """Thousands of (model, GPU, layout) candidates are planned interactively."""
+        models = {f"model-{i}": model_profile({**QWEN3_32B, "model_size": 1 + i}, "bfloat16", None) for i in range(50)}
+        start = time.perf_counter()
+        result = plan_capacity(models, GPU_SPECS, TRAFFIC)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(result["evaluated"], 50 * len(GPU_SPECS) * 5)
+        totals = [plan["total_gpus"] for plan in result["plans"]]
+        self.assertEqual(totals, sorted(totals))
+        self.assertEqual(len({(p["model_name"], p["gpu"]) for p in result["plans"]}), len(result["plans"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+"""SQLite-backed model catalog index with faceted filters, search and cursor pagination.
+
+The index stores one row of derived metadata per model (see ``utils.model_info.describe_model``) and a
+FTS5 table over model names (sharing the model rowid) for token search. It is updated incrementally: each row remembers a version
+token of its source (file mtime/size, or config store blob hashes), and only rows whose token changed are
+re-derived. Queries use keyset pagination on the unique name index, so page cost does not grow with the offset.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from utils.model_info import describe_model
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    version TEXT NOT NULL,
+    base_model TEXT,
+    family TEXT,
+    params_b REAL,
+    active_params_b REAL,
+    is_moe INTEGER,
+    context_length INTEGER,
+    torch_dtype TEXT,
+    quantization TEXT,
+    weight_bits REAL
+);
+CREATE INDEX IF NOT EXISTS idx_models_family ON models (family, name);
+CREATE INDEX IF NOT EXISTS idx_models_quantization ON models (quantization, name);
+CREATE INDEX IF NOT EXISTS idx_models_base ON models (base_model);
+"""
+# Bumped whenever _SCHEMA changes; the index is derived data, so an outdated one is simply rebuilt
+SCHEMA_VERSION = 2
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5(name, tokenize = 'unicode61')"
+
+_COLUMNS = (
+    "name",
+    "base_model",
+    "family",
+    "params_b",
+    "active_params_b",
+    "is_moe",
+    "context_length",
+    "torch_dtype",
+    "quantization",
+    "weight_bits",
+)
+# Facets returned with every query, with their counts under the current filters
+FACETS = ("family", "quantization", "is_moe")
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _fts_query(text: str) -> str:
+    # Every whitespace separated word must match a name token prefix: "inst 2507" -> "inst"* "2507"*
+    words = [w.replace('"', '""') for w in text.replace("-", " ").split()]
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class CatalogIndex:
+    """Embedded SQLite index over the model catalog."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if db_path == ":memory:":
+            # A private in-memory database must be shared by all threads of the process
+            self._shared = sqlite3.connect(db_path, check_same_thread=False)
+            self._read_lock = self._write_lock
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._shared = None
+            self._read_lock = nullcontext()
+        conn = self._conn()
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS models; DROP TABLE IF EXISTS models_fts;")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(_SCHEMA)
+        try:
+            conn.execute(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE matching
+            self.has_fts = False
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            # One connection per thread and per forked worker
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def sync(self, entries: Iterable[Tuple[str, str, Callable[[], Dict[str, Any]]]]) -> Dict[str, int]:
+        """Bring the index in line with a catalog.
+
+        Args:
+            entries: (model name, version token, config loader) triples. The loader is only called for
+                models whose version token changed since the last sync.
+
+        Returns:
+            Counts of added, updated, removed and unchanged models
+        """
+        with self._write_lock:
+            conn = self._conn()
+            known = {
+                name: (model_id, version)
+                for model_id, name, version in conn.execute("SELECT id, name, version FROM models")
+            }
+            next_id = (conn.execute("SELECT MAX(id) FROM models").fetchone()[0] or 0) + 1
+            stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+            rows = []
+            seen = set()
+            for name, version, load_config in entries:
+                seen.add(name)
+                model_id, known_version = known.get(name, (None, None))
+                if known_version == version:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if model_id else "added"] += 1
+                info = describe_model(name, load_config())
+                rows.append([model_id, name, version, *(info[c] for c in _COLUMNS[1:])])
+            # Ids are assigned here so that the FTS rows can be written by key, and in name order so that
+            # a bulk load appends to the name index instead of splitting pages all over it
+            rows.sort(key=lambda row: row[1])
+            for row in rows:
+                if row[0] is None:
+                    row[0] = next_id
+                    next_id += 1
+            removed = [known[name][0] for name in known.keys() - seen]
+            stats["removed"] = len(removed)
+            placeholders = ", ".join("?" * (len(_COLUMNS) + 2))
+            updates = ", ".join(f"{c} = excluded.{c}" for c in ("version",) + _COLUMNS[1:])
+            with conn:
+                if self.has_fts:
+                    stale = [(row[0],) for row in rows if row[1] in known] + [(model_id,) for model_id in removed]
+                    conn.executemany("DELETE FROM models_fts WHERE rowid = ?", stale)
+                conn.executemany(
+                    f"INSERT INTO models (id, name, version, {', '.join(_COLUMNS[1:])}) VALUES ({placeholders}) "
+                    f"ON CONFLICT (id) DO UPDATE SET {updates}",
+                    rows,
+                )
+                conn.executemany("DELETE FROM models WHERE id = ?", [(model_id,) for model_id in removed])
+                if self.has_fts:
+                    conn.executemany("INSERT INTO models_fts (rowid, name) VALUES (?, ?)", [row[:2] for row in rows])
+            return stats
+
+    def sync_directory(self, models_dir: str) -> Dict[str, int]:
+        """Sync from a directory of ``*.json`` configs, using mtime and size as the version token."""
+
+        def entries():
+            with os.scandir(models_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json") or entry.name.startswith("."):
+                        continue
+                    stat = entry.stat()
+
+                    def load(path=entry.path):
+                        with open(path) as fr:
+                            return json.load(fr)
+
+                    yield entry.name[:-5], f"{stat.st_mtime_ns}:{stat.st_size}", load
+
+        return self.sync(entries())
+
+    def sync_models(self, models: Dict[str, Dict[str, Any]], versions: Dict[str, str]) -> Dict[str, int]:
+        """Sync from an in-memory catalog with explicit version tokens (e.g. config store blob hashes)."""
+        return self.sync((name, versions[name], lambda config=config: config) for name, config in models.items())
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _where(self, filters: Dict[str, Any], q: str | None, prefix: str | None) -> Tuple[List[str], List[Any]]:
+        clauses, args = [], []
+        for column in ("family", "quantization", "base_model"):
+            values = filters.get(column)
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                args.extend(values)
+        if filters.get("is_moe") is not None:
+            clauses.append("is_moe = ?")
+            args.append(int(bool(filters["is_moe"])))
+        for column, key, op in (
+            ("params_b", "min_params", ">="),
+            ("params_b", "max_params", "<="),
+            ("context_length", "min_context", ">="),
+            ("context_length", "max_context", "<="),
+        ):
+            if filters.get(key) is not None:
+                clauses.append(f"{column} {op} ?")
+                args.append(filters[key])
+        if prefix:
+            # Range scan on the primary key instead of LIKE, which cannot use the index
+            clauses.append("name >= ? AND name < ?")
+            args.extend([prefix, prefix + "\U0010ffff"])
+        if q:
+            if self.has_fts:
+                clauses.append("id IN (SELECT rowid FROM models_fts WHERE models_fts MATCH ?)")
+                args.append(_fts_query(q))
+            else:
+                clauses.append("name LIKE ? ESCAPE '\\'")
+                args.append("%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        return clauses, args
+
+    def query(
+        self,
+        filters: Dict[str, Any] | None = None,
+        q: str | None = None,
+        prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+        with_facets: bool = True,
+    ) -> Dict[str, Any]:
+        """Return one page of models matching the filters, ordered by name.
+
+        Args:
+            filters: Facet filters: family/quantization/base_model (lists), is_moe, min_params, max_params,
+                min_context, max_context
+            q: Full-text search over name tokens (prefix match per word)
+            prefix: Model name prefix
+            cursor: Opaque cursor from a previous page
+            limit: Page size (at most MAX_PAGE_SIZE)
+            with_facets: Whether to compute facet counts for the filtered set
+        """
+        filters = filters or {}
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, args = self._where(filters, q, prefix)
+        with self._read_lock:
+            return self._query(clauses, args, cursor, limit, with_facets)
+
+    def _query(
+        self, clauses: List[str], args: List[Any], cursor: str | None, limit: int, with_facets: bool
+    ) -> Dict[str, Any]:
+        conn = self._conn()
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        total = conn.execute(f"SELECT COUNT(*) FROM models {where}", args).fetchone()[0]
+
+        page_clauses, page_args = list(clauses), list(args)
+        if cursor:
+            page_clauses.append("name > ?")
+            page_args.append(decode_cursor(cursor))
+        page_where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM models {page_where} ORDER BY name LIMIT ?", page_args + [limit + 1]
+        ).fetchall()
+        items = [dict(zip(_COLUMNS, row)) for row in rows[:limit]]
+        for item in items:
+            item["is_moe"] = bool(item["is_moe"])
+        result = {
+            "items": items,
+            "count": total,
+            "next_cursor": encode_cursor(items[-1]["name"]) if len(rows) > limit else None,
+        }
+        if with_facets:
+            result["facets"] = {}
+            for facet in FACETS:
+                counts = conn.execute(
+                    f"SELECT {facet}, COUNT(*) FROM models {where} GROUP BY {facet} ORDER BY {facet}", args
+                ).fetchall()
+                result["facets"][facet] = {str(bool(k)).lower() if facet == "is_moe" else k: n for k, n in counts}
+        return result
+
+    def names(self, filters: Dict[str, Any] | None = None) -> List[str]:
+        """Return the model names matching the facet filters (all by default) in sorted order."""
+        clauses, args = self._where(filters or {}, None, None)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._read_lock:
+            return [row[0] for row in self._conn().execute(f"SELECT name FROM models {where} ORDER BY name", args)]
+
+    def get(self, name: str) -> Dict[str, Any] | None:
+        with self._read_lock:
+            row = self._conn().execute(f"SELECT {', '.join(_COLUMNS)} FROM models WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        item = dict(zip(_COLUMNS, row))
+        item["is_moe"] = bool(item["is_moe"])
+        return item
@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from utils.catalog_index import CatalogIndex
+from utils.help import load_predefined_models
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
+
+
+def _synthetic_catalog(n: int):
+    models, versions = {}, {}
+    for i in range(n):
+        moe = i % 5 == 0
+        name = f"Family{i % 7}-{(i % 70) + 1}B{'-A3B' if moe else ''}-v{i:06d}{'-FP8' if i % 3 == 0 else ''}"
+        config = {
+            "model_type": f"family{i % 7}{'_moe' if moe else ''}",
+            "max_position_embeddings": 4096 * (1 + i % 64),
+            "torch_dtype": "bfloat16",
+        }
+        if moe:
+            config["num_experts"] = 64
+        if i % 3 == 0:
+            config["quantization_config"] = {"quant_method": "fp8"}
+        models[name] = config
+        versions[name] = "v1"
+    return models, versions
+
+
+class TestCatalogIndex(unittest.TestCase):
+    """Test cases for the SQLite catalog index."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = CatalogIndex(os.path.join(self.tmp_dir.name, "catalog.sqlite"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sync_directory_is_incremental(self):
+        """Only changed, added and removed configs are touched on re-sync."""
+        models_dir = os.path.join(self.tmp_dir.name, "models")
+        os.makedirs(models_dir)
+        for name in ("Qwen3-8B", "Qwen3-14B"):
+            with open(os.path.join(models_dir, f"{name}.json"), "w") as fw:
+                json.dump({"model_type": "qwen3", "max_position_embeddings": 40960}, fw)
+        self.assertEqual(self.index.sync_directory(models_dir)["added"], 2)
+        self.assertEqual(self.index.sync_directory(models_dir)["unchanged"], 2)
+
+        with open(os.path.join(models_dir, "Qwen3-8B.json"), "w") as fw:
+            json.dump({"model_type": "qwen3", "max_position_embeddings": 131072}, fw)
+        os.remove(os.path.join(models_dir, "Qwen3-14B.json"))
+        stats = self.index.sync_directory(models_dir)
+        self.assertEqual((stats["updated"], stats["removed"]), (1, 1))
+        self.assertEqual(self.index.get("Qwen3-8B")["context_length"], 131072)
+        self.assertEqual(self.index.names(), ["Qwen3-8B"])
+        self.assertEqual(self.index.query(q="14b")["count"], 0)
+
+    def test_outdated_schema_is_rebuilt(self):
+        """An index file written with an older schema is dropped and rebuilt."""
+        db_path = os.path.join(self.tmp_dir.name, "old.sqlite")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE models (name TEXT PRIMARY KEY, version TEXT NOT NULL) WITHOUT ROWID")
+        conn.commit()
+        conn.close()
+        index = CatalogIndex(db_path)
+        self.assertEqual(index.sync_models({"Qwen3-8B": {"model_type": "qwen3"}}, {"Qwen3-8B": "v1"})["added"], 1)
+        self.assertEqual(index.names(), ["Qwen3-8B"])
+
+    def test_facets_and_search_on_bundled_catalog(self):
+        """Facet filters, full-text search and prefix search on the bundled configs."""
+        self.index.sync_directory(MODELS_DIR)
+        self.assertEqual(self.index.names(), sorted(load_predefined_models(MODELS_DIR)))
+
+        result = self.index.query({"is_moe": True, "quantization": ["fp8"]})
+        self.assertEqual(result["count"], 6)
+        self.assertEqual(result["facets"]["family"], {"qwen3_moe": 6})
+
+        result = self.index.query({"family": ["qwen3"], "max_params": 2}, q="mlx")
+        self.assertEqual(result["count"], 8)
+        self.assertEqual(result["facets"]["quantization"]["mlx-4bit"], 2)
+
+        names = [item["name"] for item in self.index.query(prefix="Qwen3-8B-MLX")["items"]]
+        self.assertEqual(names, ["Qwen3-8B-MLX-4bit", "Qwen3-8B-MLX-6bit", "Qwen3-8B-MLX-8bit", "Qwen3-8B-MLX-bf16"])
+
+        item = self.index.get("Qwen3-30B-A3B-GPTQ-Int4")
+        self.assertEqual(item["base_model"], "Qwen3-30B-A3B")
+        self.assertEqual((item["params_b"], item["active_params_b"], item["weight_bits"]), (30, 3, 4))
+
+    def test_cursor_pagination(self):
+        """Walking the cursor visits every match exactly once, in order."""
+        self.index.sync_directory(MODELS_DIR)
+        names, cursor = [], None
+        while True:
+            page = self.index.query({"family": ["qwen3"]}, cursor=cursor, limit=7, with_facets=False)
+            names.extend(item["name"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), page["count"])
+        self.assertEqual(len(set(names)), len(names))
+
+    def test_large_catalog(self):
+        """Queries stay fast with 100k configs."""
+        models, versions = _synthetic_catalog(100_000)
+        self.index.sync_models(models, versions)
+        self.assertEqual(self.index.sync_models(models, versions)["unchanged"], 100_000)
+
+        start = time.perf_counter()
+        page = self.index.query({"is_moe": True, "quantization": ["fp8"], "min_context": 100_000}, limit=50)
+        deep = self.index.query(prefix="Family3-", q="v0999", limit=50, with_facets=False)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(page["items"]), 50)
+        self.assertGreater(deep["count"], 0)
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,249 @@
+"""Content-addressed, deduplicated store for model configurations.
+
+Layout::
+
+    {root}/blobs/ab/abcdef....json   canonical JSON, named by its sha256
+    {root}/manifests/{snapshot}.json  model name -> blob hashes + metadata (fetch time, upstream ETag)
+                                      snapshot ids are {UTC time to the microsecond}-{content hash}
+    {root}/CURRENT                    id of the active snapshot
+
+Each config is split into a base blob and an optional overlay blob holding the quantization keys, so
+variants that only differ in ``quantization_config`` (FP8/AWQ/MLX siblings) share the base blob. Blobs are
+immutable and parsed at most once per process. A snapshot is an immutable manifest, so rolling the catalog
+back is just pointing ``CURRENT`` at an older manifest.
+"""
+
+import argparse
+import calendar
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+# Keys stored in the overlay blob instead of the shared base blob
+OVERLAY_KEYS = ("quantization_config", "quantization")
+CURRENT_FILE = "CURRENT"
+_SNAPSHOT_TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def canonical_json(obj: Any) -> bytes:
+    """Serialize to a canonical form so that formatting differences do not defeat deduplication."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per thread: the downloader writes the shared base blob of sibling variants concurrently
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as fw:
+        fw.write(data)
+    os.replace(tmp_path, path)
+
+
+class ConfigStore:
+    """Content-addressed config blobs plus snapshot manifests."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.manifests_dir = os.path.join(root, "manifests")
+        self._blob_cache: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Blobs
+    # ------------------------------------------------------------------
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs_dir, digest[:2], f"{digest}.json")
+
+    def put_blob(self, obj: Any) -> str:
+        data = canonical_json(obj)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        return digest
+
+    def get_blob(self, digest: str) -> Any:
+        obj = self._blob_cache.get(digest)
+        if obj is None:
+            with open(self._blob_path(digest), "rb") as fr:
+                obj = json.loads(fr.read())
+            self._blob_cache[digest] = obj
+        return obj
+
+    def put_config(self, config: Dict[str, Any]) -> Dict[str, str]:
+        """Store a config as base + overlay blobs and return the manifest blob references."""
+        base = {k: v for k, v in config.items() if k not in OVERLAY_KEYS}
+        overlay = {k: config[k] for k in OVERLAY_KEYS if k in config}
+        refs = {"blob": self.put_blob(base)}
+        if overlay:
+            refs["overlay"] = self.put_blob(overlay)
+        return refs
+
+    def get_config(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        config = dict(self.get_blob(entry["blob"]))
+        if "overlay" in entry:
+            config.update(self.get_blob(entry["overlay"]))
+        return config
+
+    # ------------------------------------------------------------------
+    # Manifests and snapshots
+    # ------------------------------------------------------------------
+
+    def current_snapshot(self) -> str | None:
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as fr:
+                return fr.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def snapshots(self) -> List[str]:
+        """Return snapshot ids, oldest first."""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.manifests_dir) if name.endswith(".json"))
+
+    def read_manifest(self, snapshot: str | None = None) -> Dict[str, Any]:
+        snapshot = snapshot or self.current_snapshot()
+        if snapshot is None:
+            return {"snapshot": None, "models": {}}
+        with open(os.path.join(self.manifests_dir, f"{snapshot}.json")) as fr:
+            return json.load(fr)
+
+    def commit(self, models: Dict[str, Dict[str, Any]], activate: bool = True) -> str:
+        """Write a new immutable snapshot manifest and optionally make it current.
+
+        Args:
+            models: Model name -> manifest entry ({"blob", "overlay"?, "etag"?, "fetched_at"?, ...})
+            activate: Whether to point CURRENT at the new snapshot
+        """
+        body = canonical_json(models)
+        # Ids sort in commit order: microseconds, and never before the newest snapshot if the clock stepped back
+        snapshots = self.snapshots()
+        micros = time.time_ns() // 1000
+        if snapshots:
+            micros = max(micros, _snapshot_micros(snapshots[-1]) + 1)
+        seconds, fraction = divmod(micros, 1_000_000)
+        snapshot = (
+            f"{time.strftime(_SNAPSHOT_TIME_FORMAT, time.gmtime(seconds))}{fraction:06d}-"
+            f"{hashlib.sha256(body).hexdigest()[:12]}"
+        )
+        manifest = {"snapshot": snapshot, "created_at": time.time(), "models": models}
+        _write_atomic(os.path.join(self.manifests_dir, f"{snapshot}.json"), canonical_json(manifest))
+        if activate:
+            self.activate(snapshot)
+        return snapshot
+
+    def activate(self, snapshot: str):
+        """Point CURRENT at an existing snapshot (used for rollback)."""
+        if not os.path.exists(os.path.join(self.manifests_dir, f"{snapshot}.json")):
+            raise FileNotFoundError(f'Snapshot "{snapshot}" not found')
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), snapshot.encode())
+
+    def load_models(self, snapshot: str | None = None) -> Dict[str, Dict[str, Any]]:
+        """Materialize the model catalog of a snapshot (the current one by default)."""
+        manifest = self.read_manifest(snapshot)
+        return {name: self.get_config(entry) for name, entry in manifest["models"].items()}
+
+    def import_directory(self, models_dir: str, etags: Dict[str, str] | None = None) -> str:
+        """Import every ``*.json`` config of a directory as a new current snapshot."""
+        etags = etags or {}
+        previous = self.read_manifest()["models"]
+        models = {}
+        for model_file in sorted(os.listdir(models_dir)):
+            if not model_file.endswith(".json") or model_file.startswith("."):
+                continue
+            name = model_file[:-5]
+            path = os.path.join(models_dir, model_file)
+            with open(path) as fr:
+                entry = self.put_config(json.load(fr))
+            old = previous.get(name, {})
+            unchanged = old.get("blob") == entry["blob"] and old.get("overlay") == entry.get("overlay")
+            entry["fetched_at"] = old.get("fetched_at") if unchanged else os.path.getmtime(path)
+            if etags.get(name) or old.get("etag"):
+                entry["etag"] = etags.get(name) or old.get("etag")
+            models[name] = entry
+        return self.commit(models)
+
+    def gc(self, keep: int | None = None) -> int:
+        """Delete old snapshots (keeping the newest ``keep`` and the current one) and unreferenced blobs.
+
+        Returns:
+            Number of blobs removed
+        """
+        snapshots = self.snapshots()
+        current = self.current_snapshot()
+        if keep is not None:
+            for snapshot in snapshots[: max(0, len(snapshots) - keep)]:
+                if snapshot != current:
+                    os.remove(os.path.join(self.manifests_dir, f"{snapshot}.json"))
+        referenced = set()
+        for snapshot in self.snapshots():
+            for entry in self.read_manifest(snapshot)["models"].values():
+                referenced.add(entry["blob"])
+                if "overlay" in entry:
+                    referenced.add(entry["overlay"])
+        removed = 0
+        if os.path.isdir(self.blobs_dir):
+            for prefix in os.listdir(self.blobs_dir):
+                for name in os.listdir(os.path.join(self.blobs_dir, prefix)):
+                    if name.endswith(".json") and name[:-5] not in referenced:
+                        os.remove(os.path.join(self.blobs_dir, prefix, name))
+                        removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        manifest = self.read_manifest()
+        blobs = set()
+        for entry in manifest["models"].values():
+            blobs.add(entry["blob"])
+            if "overlay" in entry:
+                blobs.add(entry["overlay"])
+        return {"models": len(manifest["models"]), "blobs": len(blobs), "snapshots": len(self.snapshots())}
+
+
+def _snapshot_micros(snapshot: str) -> int:
+    """Commit time of a snapshot id in microseconds; ids written before sub-second ids have none."""
+    stamp = snapshot.split("-", 1)[0]
+    seconds = calendar.timegm(time.strptime(stamp[:15], _SNAPSHOT_TIME_FORMAT))
+    return seconds * 1_000_000 + int(stamp[15:] or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="管理内容寻址的模型配置存储")
+    parser.add_argument("--store_dir", required=True, help="配置存储根目录")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="将模型配置目录导入为新的快照")
+    import_parser.add_argument("--models_dir", required=True, help="模型配置文件目录")
+    subparsers.add_parser("snapshots", help="列出所有快照")
+    rollback_parser = subparsers.add_parser("rollback", help="将当前快照切换到指定快照")
+    rollback_parser.add_argument("snapshot", help="快照 ID")
+    gc_parser = subparsers.add_parser("gc", help="清理旧快照和未被引用的配置")
+    gc_parser.add_argument("--keep", type=int, default=None, help="保留最近的快照数量")
+    args = parser.parse_args()
+
+    store = ConfigStore(args.store_dir)
+    if args.command == "import":
+        etags_path = os.path.join(args.models_dir, ".etags.json")
+        etags = {}
+        if os.path.exists(etags_path):
+            with open(etags_path) as fr:
+                etags = json.load(fr)
+        snapshot = store.import_directory(args.models_dir, etags)
+        print(f"Imported snapshot {snapshot}: {store.stats()}")
+    elif args.command == "snapshots":
+        current = store.current_snapshot()
+        for snapshot in store.snapshots():
+            print(f"{'*' if snapshot == current else ' '} {snapshot}")
+    elif args.command == "rollback":
+        store.activate(args.snapshot)
+        print(f"Current snapshot is now {args.snapshot}")
+    elif args.command == "gc":
+        print(f"Removed {store.gc(args.keep)} unreferenced blobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from utils.config_store import ConfigStore, _write_atomic, canonical_json
+from utils.help import load_catalog, load_predefined_models
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
+
+
+class TestConfigStore(unittest.TestCase):
+    """Test cases for the content-addressed config store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = ConfigStore(os.path.join(self.tmp_dir, "store"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_import_roundtrip_and_dedup(self):
+        """Importing the bundled catalog dedupes blobs and loads identical configs."""
+        self.store.import_directory(MODELS_DIR)
+        expected = load_predefined_models(MODELS_DIR)
+        self.assertEqual(self.store.load_models(), expected)
+        stats = self.store.stats()
+        self.assertEqual(stats["models"], len(expected))
+        # MLX/FP8/AWQ siblings share their base blob.
+        manifest = self.store.read_manifest()["models"]
+        self.assertEqual(manifest["Qwen3-14B-MLX-4bit"]["blob"], manifest["Qwen3-14B-MLX-8bit"]["blob"])
+        self.assertNotEqual(manifest["Qwen3-14B-MLX-4bit"]["overlay"], manifest["Qwen3-14B-MLX-8bit"]["overlay"])
+        self.assertLess(stats["blobs"], len(expected))
+
+    def test_snapshot_rollback_and_gc(self):
+        """Snapshots can be rolled back and unreferenced blobs are collected."""
+        first = self.store.commit({"a": self.store.put_config({"hidden_size": 1})})
+        second = self.store.commit({"a": self.store.put_config({"hidden_size": 2})})
+        self.assertEqual(self.store.load_models()["a"]["hidden_size"], 2)
+
+        self.store.activate(first)
+        self.assertEqual(self.store.load_models()["a"]["hidden_size"], 1)
+        self.assertEqual(self.store.snapshots(), [first, second])
+
+        self.assertEqual(self.store.gc(keep=0), 1)
+        self.assertEqual(self.store.snapshots(), [first])
+        self.assertEqual(self.store.load_models()["a"]["hidden_size"], 1)
+        with self.assertRaises(FileNotFoundError):
+            self.store.activate(second)
+
+    def test_snapshots_sort_in_commit_order(self):
+        """Snapshots committed within one second, or after an older-format id, keep their commit order."""
+        legacy = "99990101T000000-ffffffffffff"
+        _write_atomic(os.path.join(self.store.manifests_dir, f"{legacy}.json"), canonical_json({"models": {}}))
+        committed = [self.store.commit({"a": self.store.put_config({"hidden_size": size})}) for size in range(20)]
+        self.assertEqual(self.store.snapshots(), [legacy, *committed])
+
+    def test_import_keeps_metadata_of_unchanged_configs(self):
+        """Re-importing keeps the fetch time and ETag of unchanged configs."""
+        models_dir = os.path.join(self.tmp_dir, "models")
+        os.makedirs(models_dir)
+        for name, size in (("a", 1), ("b", 2)):
+            with open(os.path.join(models_dir, f"{name}.json"), "w") as fw:
+                json.dump({"hidden_size": size}, fw, indent=4)
+        self.store.import_directory(models_dir, {"a": '"etag-a"'})
+        before = self.store.read_manifest()["models"]
+        with open(os.path.join(models_dir, "b.json"), "w") as fw:
+            json.dump({"hidden_size": 3}, fw)
+        os.utime(os.path.join(models_dir, "b.json"), (0, 0))
+        after = self.store.read_manifest(self.store.import_directory(models_dir))["models"]
+        self.assertEqual(after["a"], before["a"])
+        self.assertEqual(after["a"]["etag"], '"etag-a"')
+        self.assertEqual(after["b"]["fetched_at"], 0)
+
+    def test_concurrent_identical_blobs(self):
+        """Threads writing the same blob at once all succeed (sibling variants share their base blob)."""
+        config = {"hidden_size": 4096, "num_hidden_layers": 36}
+        barrier = threading.Barrier(8)
+        errors = []
+
+        def put():
+            barrier.wait()
+            try:
+                for _ in range(20):
+                    _write_atomic(os.path.join(self.tmp_dir, "blob.json"), canonical_json(config))
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=put) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with open(os.path.join(self.tmp_dir, "blob.json"), "rb") as f:
+            self.assertEqual(f.read(), canonical_json(config))
+
+    def test_load_catalog_fallback(self):
+        """The catalog loader falls back to the models directory without a snapshot."""
+        self.assertEqual(len(load_catalog(MODELS_DIR, self.store.root)), len(load_predefined_models(MODELS_DIR)))
+        self.store.commit({"only": self.store.put_config({"hidden_size": 1})})
+        self.assertEqual(list(load_catalog(MODELS_DIR, self.store.root)), ["only"])
+
+
+if __name__ == "__main__":
+    unittest.main()
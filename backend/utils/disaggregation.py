@@ -0,0 +1,264 @@
+"""Disaggregated prefill/decode serving: size the two pools separately and compare with co-location.
+
+With disaggregation (DistServe, Splitwise, Mooncake) prefill instances only run prompts and decode instances
+only generate, so each pool is sized for its own bottleneck with the closed-form models of ``utils.capacity``:
+
+- prefill is compute bound: an instance runs one prompt at a time, and the tail prompt plus the transfer of
+  its KV cache to the decode pool must fit in the TTFT SLO;
+- decode is bound by KV memory and bandwidth: an instance keeps as many sequences in flight as its KV budget
+  and the TPOT SLO allow, and never stalls for a prefill.
+
+The KV cache of every prompt crosses the interconnect once, ``kv bytes per token * prompt tokens``. In a
+co-located deployment prefills run between decode steps of the same replica, so the time spent on prefill
+stretches every decode step: at ``r`` requests/s per replica the effective TPOT is ``step / (1 - r * prefill)``.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List
+
+from config.memory import DEFAULT_COEFFICIENTS
+from utils.capacity import (
+    BANDWIDTH_EFFICIENCY,
+    GPU_MEMORY_UTILIZATION,
+    MODEL_FLOPS_UTILIZATION,
+    TARGET_UTILIZATION,
+    _decode_batch,
+    _decode_step_seconds,
+    _prefill_seconds,
+    _tail,
+    _typical,
+    size_layout,
+)
+
+# Tensor parallel degrees evaluated for each pool by default
+DEFAULT_TENSOR_PARALLEL = (1, 2, 4, 8)
+# Effective KV transfer bandwidth between a prefill and a decode instance: one 400 Gb/s RDMA NIC
+DEFAULT_KV_TRANSFER_GBPS = 50
+
+
+def _instance(model: Dict[str, Any], gpu: Dict[str, Any], tensor_parallel: int) -> Dict[str, Any] | None:
+    """Memory, bandwidth and compute of one tensor parallel instance; None when heads do not divide."""
+    if model["num_attention_heads"] % tensor_parallel:
+        return None
+    usable_gb = gpu["memory_gb"] * GPU_MEMORY_UTILIZATION * tensor_parallel
+    return {
+        "kv_budget_gb": usable_gb
+        - model["weights_gb"]
+        - DEFAULT_COEFFICIENTS["inference_overhead_gb"] * tensor_parallel,
+        "bandwidth": gpu["bandwidth_gbps"] * 1e9 * BANDWIDTH_EFFICIENCY * tensor_parallel,
+        "flops": gpu["fp16_tflops"] * 1e12 * MODEL_FLOPS_UTILIZATION * tensor_parallel,
+    }
+
+
+def size_prefill_pool(
+    model: Dict[str, Any],
+    gpu: Dict[str, Any],
+    tensor_parallel: int,
+    traffic: Dict[str, Any],
+    kv_transfer_gbps: float = DEFAULT_KV_TRANSFER_GBPS,
+    target_utilization: float = TARGET_UTILIZATION,
+) -> Dict[str, Any]:
+    """Size the prefill pool for one tensor parallel degree.
+
+    Args:
+        model: ``model_profile`` output
+        gpu: GPU spec of the prefill instances
+        tensor_parallel: Tensor parallel degree of an instance
+        traffic: Traffic profile and SLOs, see ``utils.capacity.size_layout``
+        kv_transfer_gbps: KV transfer bandwidth of an instance in GB/s
+        target_utilization: Highest acceptable load as a fraction of capacity
+    """
+    result: Dict[str, Any] = {"tensor_parallel": tensor_parallel}
+    instance = _instance(model, gpu, tensor_parallel)
+    if instance is None:
+        return {**result, "feasible": False, "reason": "attention heads not divisible by tensor_parallel"}
+    prompt = traffic["prompt_tokens"]
+    # The KV cache of a prompt stays on the prefill instance until it has been sent
+    if instance["kv_budget_gb"] < model["kv_gb_per_token"] * _tail(prompt):
+        return {**result, "feasible": False, "reason": "weights and a tail-length prompt do not fit in memory"}
+    transfer = model["kv_gb_per_token"] * _tail(prompt) / kv_transfer_gbps
+    ttft = _prefill_seconds(model, _tail(prompt), instance["flops"]) + transfer
+    ttft_slo = (traffic.get("slo") or {}).get("ttft_ms")
+    if ttft_slo is not None and ttft * 1000 > ttft_slo:
+        return {
+            **result,
+            "feasible": False,
+            "reason": "tail prompt prefill and KV transfer exceed the TTFT SLO",
+            "ttft_ms": round(ttft * 1000, 1),
+        }
+    instance_rps = 1 / _prefill_seconds(model, _typical(prompt), instance["flops"])
+    instances = max(1, math.ceil(traffic["qps"] / (instance_rps * target_utilization)))
+    return {
+        **result,
+        "feasible": True,
+        "instances": instances,
+        "total_gpus": instances * tensor_parallel,
+        "utilization": round(traffic["qps"] / (instances * instance_rps), 3),
+        "instance_requests_per_second": round(instance_rps, 3),
+        "ttft_ms": round(ttft * 1000, 1),
+        "kv_transfer_ms": round(transfer * 1000, 2),
+    }
+
+
+def size_decode_pool(
+    model: Dict[str, Any],
+    gpu: Dict[str, Any],
+    tensor_parallel: int,
+    traffic: Dict[str, Any],
+    target_utilization: float = TARGET_UTILIZATION,
+) -> Dict[str, Any]:
+    """Size the decode pool for one tensor parallel degree (arguments as ``size_prefill_pool``)."""
+    result: Dict[str, Any] = {"tensor_parallel": tensor_parallel}
+    instance = _instance(model, gpu, tensor_parallel)
+    if instance is None:
+        return {**result, "feasible": False, "reason": "attention heads not divisible by tensor_parallel"}
+    prompt, output = traffic["prompt_tokens"], traffic["output_tokens"]
+    if instance["kv_budget_gb"] < model["kv_gb_per_token"] * (_tail(prompt) + _tail(output)):
+        return {**result, "feasible": False, "reason": "weights and a tail-length sequence do not fit in memory"}
+    typical_context = _typical(prompt) + _typical(output) / 2
+    bandwidth, flops = instance["bandwidth"], instance["flops"]
+    decode_batch = _decode_batch(
+        model, instance["kv_budget_gb"], typical_context, bandwidth, flops, (traffic.get("slo") or {}).get("tpot_ms")
+    )
+    if decode_batch is None:
+        return {**result, "feasible": False, "reason": "a single sequence exceeds the TPOT SLO"}
+    batch, limited_by = decode_batch
+    step = _decode_step_seconds(model, batch, typical_context, bandwidth, flops)
+    instance_rps = batch / (_typical(output) * step)
+    instances = max(1, math.ceil(traffic["qps"] / (instance_rps * target_utilization)))
+    return {
+        **result,
+        "feasible": True,
+        "instances": instances,
+        "total_gpus": instances * tensor_parallel,
+        "utilization": round(traffic["qps"] / (instances * instance_rps), 3),
+        "instance_requests_per_second": round(instance_rps, 3),
+        "batch_size": batch,
+        "limited_by": limited_by,
+        "kv_cache_tokens": int(instance["kv_budget_gb"] / model["kv_gb_per_token"]),
+        "tpot_ms": round(step * 1000, 2),
+    }
+
+
+def _cheapest(plans: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+    feasible = [plan for plan in plans if plan["feasible"]]
+    return min(feasible, key=lambda plan: (plan["total_gpus"], plan["tensor_parallel"]), default=None)
+
+
+def size_colocated(
+    model: Dict[str, Any],
+    gpu: Dict[str, Any],
+    tensor_parallel: Iterable[int],
+    traffic: Dict[str, Any],
+    target_utilization: float = TARGET_UTILIZATION,
+) -> Dict[str, Any] | None:
+    """Cheapest co-located deployment, with its decode steps stretched by the prefills they wait for."""
+    plan = _cheapest(
+        [size_layout(model, gpu, tp, 1, traffic, target_utilization) for tp in tensor_parallel],
+    )
+    if plan is None:
+        return None
+    flops = gpu["fp16_tflops"] * 1e12 * MODEL_FLOPS_UTILIZATION * plan["tensor_parallel"]
+    prefill_share = (
+        traffic["qps"] / plan["replicas"] * _prefill_seconds(model, _typical(traffic["prompt_tokens"]), flops)
+    )
+    if prefill_share >= 1:
+        # The replicas would spend all their time on prefills and never decode
+        return {
+            **plan,
+            "feasible": False,
+            "reason": "prefills saturate the co-located replicas",
+            "prefill_time_share": round(prefill_share, 3),
+            "effective_tpot_ms": None,
+            "meets_tpot_slo": False,
+        }
+    effective_tpot = plan["tpot_ms"] / (1 - prefill_share)
+    tpot_slo = (traffic.get("slo") or {}).get("tpot_ms")
+    return {
+        **plan,
+        "prefill_time_share": round(prefill_share, 3),
+        "effective_tpot_ms": round(effective_tpot, 2),
+        "meets_tpot_slo": tpot_slo is None or effective_tpot <= tpot_slo,
+    }
+
+
+def plan_disaggregated(
+    model: Dict[str, Any],
+    prefill_gpu: Dict[str, Any],
+    decode_gpu: Dict[str, Any],
+    traffic: Dict[str, Any],
+    prefill_tensor_parallel: Iterable[int] = DEFAULT_TENSOR_PARALLEL,
+    decode_tensor_parallel: Iterable[int] = DEFAULT_TENSOR_PARALLEL,
+    kv_transfer_gbps: float = DEFAULT_KV_TRANSFER_GBPS,
+    target_utilization: float = TARGET_UTILIZATION,
+) -> Dict[str, Any]:
+    """Size the prefill and decode pools independently and compare them with a co-located deployment.
+
+    Args:
+        model: ``model_profile`` output
+        prefill_gpu: GPU spec of the prefill pool
+        decode_gpu: GPU spec of the decode pool, also used for the co-located deployment
+        traffic: Traffic profile and SLOs, see ``utils.capacity.size_layout``
+        prefill_tensor_parallel: Tensor parallel degrees evaluated for the prefill pool
+        decode_tensor_parallel: Tensor parallel degrees evaluated for the decode pool and the co-located replicas
+        kv_transfer_gbps: KV transfer bandwidth of an instance in GB/s
+        target_utilization: Highest acceptable load as a fraction of capacity
+
+    Returns:
+        The cheapest feasible layout of each pool (None with the rejected candidates when there is none), the
+        KV transfer volume and the comparison with the cheapest co-located deployment
+    """
+    if kv_transfer_gbps <= 0:
+        raise ValueError("kv_transfer_gbps must be positive")
+    # The route passes slo None when the client omits it
+    traffic = {**traffic, "slo": traffic.get("slo") or {}}
+    prefill_candidates = [
+        size_prefill_pool(model, prefill_gpu, tp, traffic, kv_transfer_gbps, target_utilization)
+        for tp in prefill_tensor_parallel
+    ]
+    decode_tensor_parallel = list(decode_tensor_parallel)
+    decode_candidates = [
+        size_decode_pool(model, decode_gpu, tp, traffic, target_utilization) for tp in decode_tensor_parallel
+    ]
+    prefill, decode = _cheapest(prefill_candidates), _cheapest(decode_candidates)
+
+    prompt = traffic["prompt_tokens"]
+    transfer_gbps = traffic["qps"] * model["kv_gb_per_token"] * _typical(prompt)
+    kv_transfer: Dict[str, Any] = {
+        "bytes_per_token": round(model["kv_gb_per_token"] * 1e9),
+        "gb_per_request": round(model["kv_gb_per_token"] * _typical(prompt), 4),
+        "tail_gb_per_request": round(model["kv_gb_per_token"] * _tail(prompt), 4),
+        "aggregate_gbps": round(transfer_gbps, 3),
+        "link_gbps": kv_transfer_gbps,
+    }
+    if prefill and decode:
+        # Every prompt's KV cache leaves one prefill instance and enters one decode instance
+        kv_transfer["prefill_link_utilization"] = round(transfer_gbps / prefill["instances"] / kv_transfer_gbps, 4)
+        kv_transfer["decode_link_utilization"] = round(transfer_gbps / decode["instances"] / kv_transfer_gbps, 4)
+
+    colocated = size_colocated(model, decode_gpu, decode_tensor_parallel, traffic, target_utilization)
+    disaggregated: Dict[str, Any] = {"feasible": bool(prefill and decode)}
+    if prefill and decode:
+        disaggregated.update(
+            total_gpus=prefill["total_gpus"] + decode["total_gpus"],
+            ttft_ms=prefill["ttft_ms"],
+            tpot_ms=decode["tpot_ms"],
+        )
+    comparison: Dict[str, Any] = {"disaggregated": disaggregated, "colocated": None}
+    if colocated and colocated["feasible"]:
+        comparison["colocated"] = {
+            "total_gpus": colocated["total_gpus"],
+            "ttft_ms": colocated["ttft_ms"],
+            "tpot_ms": colocated["effective_tpot_ms"],
+            "meets_tpot_slo": colocated["meets_tpot_slo"],
+        }
+        if disaggregated["feasible"]:
+            comparison["gpu_savings"] = colocated["total_gpus"] - disaggregated["total_gpus"]
+            comparison["tpot_speedup"] = round(colocated["effective_tpot_ms"] / disaggregated["tpot_ms"], 3)
+    return {
+        "prefill": prefill or {"feasible": False, "candidates": prefill_candidates},
+        "decode": decode or {"feasible": False, "candidates": decode_candidates},
+        "kv_transfer": kv_transfer,
+        "colocated": colocated,
+        "comparison": comparison,
+    }
@@ -0,0 +1,101 @@
+import unittest
+
+from config.gpu import GPU_SPECS
+from utils.capacity import model_profile, validate_target_utilization
+from utils.disaggregation import plan_disaggregated, size_colocated, size_decode_pool, size_prefill_pool
+
+QWEN3_32B = {
+    "model_size": 32,
+    "precision": "bfloat16",
+    "num_hidden_layers": 64,
+    "hidden_size": 5120,
+    "num_attention_heads": 64,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+}
+TRAFFIC = {
+    "qps": 50,
+    "prompt_tokens": {"p50": 2048, "p99": 8192},
+    "output_tokens": {"p50": 256, "p99": 1024},
+    "slo": {"ttft_ms": 2000, "tpot_ms": 50},
+}
+
+
+class TestDisaggregation(unittest.TestCase):
+    """Test cases for the disaggregated prefill/decode planner."""
+
+    def setUp(self):
+        self.model = model_profile(QWEN3_32B, "bfloat16", None)
+        self.h100 = GPU_SPECS["h100_80"]
+
+    def test_prefill_pool_covers_load(self):
+        """Prefill instances cover the prompt rate, and the TTFT includes the KV transfer of the tail prompt."""
+        plan = size_prefill_pool(self.model, self.h100, 1, TRAFFIC, kv_transfer_gbps=50)
+        self.assertTrue(plan["feasible"])
+        self.assertGreaterEqual(plan["instances"] * plan["instance_requests_per_second"] * 0.8, TRAFFIC["qps"])
+        self.assertAlmostEqual(plan["kv_transfer_ms"], self.model["kv_gb_per_token"] * 8192 / 50 * 1000, places=1)
+        slow_link = size_prefill_pool(self.model, self.h100, 1, TRAFFIC, kv_transfer_gbps=1)
+        self.assertFalse(slow_link["feasible"])
+        self.assertIn("TTFT", slow_link["reason"])
+
+    def test_decode_pool_respects_slo(self):
+        """Decode instances batch up to the TPOT SLO and never pay for prefill."""
+        plan = size_decode_pool(self.model, self.h100, 2, TRAFFIC)
+        self.assertTrue(plan["feasible"])
+        self.assertLessEqual(plan["tpot_ms"], 50)
+        self.assertGreaterEqual(plan["instances"] * plan["instance_requests_per_second"] * 0.8, TRAFFIC["qps"])
+        self.assertFalse(size_decode_pool(self.model, GPU_SPECS["4090_24"], 1, TRAFFIC)["feasible"])
+        self.assertFalse(size_decode_pool(self.model, self.h100, 3, TRAFFIC)["feasible"])
+
+    def test_colocated_tpot_stretched_by_prefill(self):
+        """Co-located decode steps slow down by the share of time spent on prefill."""
+        plan = size_colocated(self.model, self.h100, (1, 2, 4, 8), TRAFFIC)
+        self.assertGreater(plan["prefill_time_share"], 0)
+        self.assertAlmostEqual(
+            plan["effective_tpot_ms"], plan["tpot_ms"] / (1 - plan["prefill_time_share"]), delta=0.05
+        )
+
+    def test_colocated_saturated_by_prefill(self):
+        """Replicas loaded past capacity spend all their time on prefill: the co-located plan is infeasible."""
+        plan = size_colocated(self.model, self.h100, (1, 2, 4, 8), TRAFFIC, target_utilization=5)
+        self.assertGreaterEqual(plan["prefill_time_share"], 1)
+        self.assertFalse(plan["feasible"])
+        self.assertFalse(plan["meets_tpot_slo"])
+        comparison = plan_disaggregated(self.model, self.h100, self.h100, TRAFFIC, target_utilization=5)["comparison"]
+        self.assertIsNone(comparison["colocated"])
+        self.assertEqual(validate_target_utilization("1"), 1.0)
+        for value in (0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                validate_target_utilization(value)
+
+    def test_plan_compares_deployments(self):
+        """The plan sums both pools, reports the KV transfer volume and compares with co-location."""
+        plan = plan_disaggregated(self.model, self.h100, self.h100, TRAFFIC)
+        disaggregated = plan["comparison"]["disaggregated"]
+        self.assertEqual(disaggregated["total_gpus"], plan["prefill"]["total_gpus"] + plan["decode"]["total_gpus"])
+        self.assertEqual(plan["kv_transfer"]["bytes_per_token"], 2 * 64 * 8 * 128 * 2)
+        self.assertAlmostEqual(plan["kv_transfer"]["aggregate_gbps"], 50 * 2048 * 2 * 64 * 8 * 128 * 2 / 1e9, 2)
+        self.assertEqual(
+            plan["comparison"]["gpu_savings"], plan["colocated"]["total_gpus"] - disaggregated["total_gpus"]
+        )
+        self.assertGreater(plan["comparison"]["tpot_speedup"], 1)
+
+    def test_plan_without_slo(self):
+        """Without SLOs both pools are sized by memory and throughput only."""
+        plan = plan_disaggregated(self.model, self.h100, self.h100, {**TRAFFIC, "slo": None})
+        self.assertTrue(plan["comparison"]["disaggregated"]["feasible"])
+        self.assertEqual(plan["decode"]["limited_by"], "memory")
+        self.assertTrue(plan["colocated"]["meets_tpot_slo"])
+
+    def test_infeasible_pool_lists_candidates(self):
+        """A pool without a feasible layout reports every rejected candidate."""
+        plan = plan_disaggregated(self.model, self.h100, self.h100, {**TRAFFIC, "slo": {"ttft_ms": 1}}, (1, 2))
+        self.assertFalse(plan["prefill"]["feasible"])
+        self.assertEqual(len(plan["prefill"]["candidates"]), 2)
+        self.assertFalse(plan["comparison"]["disaggregated"]["feasible"])
+        with self.assertRaises(ValueError):
+            plan_disaggregated(self.model, self.h100, self.h100, TRAFFIC, kv_transfer_gbps=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
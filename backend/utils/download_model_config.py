@@ -1,9 +1,16 @@
 import argparse
+import json
 import os
 import secrets
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.config_store import ConfigStore
 
 
 def secure_random_float() -> float:
@@ -108,58 +115,240 @@ QWEN_MODELS = [
     "Qwen/Qwen3-235B-A22B-MLX-8bit",
 ]
 
+# 可下载的模型族，新增模型族只需在此注册对应的仓库列表
+MODEL_FAMILIES: Dict[str, List[str]] = {
+    "qwen": QWEN_MODELS,
+}
+
+HF_BASE_URL = "https://huggingface.co"
+# 保存每个模型配置文件 ETag 的文件名，用于 If-None-Match 条件请求
+ETAGS_FILE = ".etags.json"
+# 需要重试的 HTTP 状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
-def download_model_configs(root_dir: str):
+class TokenBucket:
     """
-    下载所有 QWEN 模型的配置文件到指定目录。
+    线程安全的令牌桶限流器。
 
     Args:
-        root_dir: 根目录路径，模型配置文件将保存到 {root_dir}/models/ 目录下
+        rate: 每秒补充的令牌数
+        capacity: 桶容量，即允许的最大突发请求数
     """
-    # 确保 models 目录存在
-    models_dir = os.path.join(root_dir, "models")
-    os.makedirs(models_dir, exist_ok=True)
 
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """阻塞直到获得一个令牌。"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def load_model_list(families: List[str], models_file: str | None = None) -> List[str]:
+    """
+    汇总需要下载的模型仓库列表。
+
+    Args:
+        families: 已注册的模型族名称，参见 MODEL_FAMILIES
+        models_file: 可选的模型列表文件，每行一个仓库名（如 "Qwen/Qwen3-8B"），以 # 开头的行为注释
+    """
+    repos = []
+    for family in families:
+        if family not in MODEL_FAMILIES:
+            raise ValueError(f"Unknown model family {family}. Must be one of: {list(MODEL_FAMILIES)}")
+        repos.extend(MODEL_FAMILIES[family])
+    if models_file:
+        with open(models_file) as fr:
+            repos.extend(line.strip() for line in fr if line.strip() and not line.startswith("#"))
+    # 去重并保持顺序
+    return list(dict.fromkeys(repos))
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """创建带连接池的 HTTP 会话，连接池大小与并发数一致。"""
     session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
     session.headers.update(
         {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36",
             "accept-encoding": "gzip, deflate, br, zstd",
         }
     )
+    return session
 
-    for model in QWEN_MODELS:
-        model_name = model.split("/")[1]
 
-        config_file = os.path.join(models_dir, f"{model_name}.json")
-        if os.path.exists(config_file):
-            print(f"Model Config for {model_name} already exists.")
-            continue
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as fr:
+            return json.load(fr)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as fw:
+        fw.write(text)
+    os.replace(tmp_path, path)
+
+
+def fetch_model_config(
+    session: requests.Session,
+    bucket: TokenBucket,
+    repo: str,
+    etag: str | None,
+    base_url: str = HF_BASE_URL,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    timeout: float = 30,
+) -> requests.Response:
+    """
+    下载单个模型的配置文件，带 ETag 条件请求与指数退避重试。
 
+    Returns:
+        最终的 HTTP 响应（200 或 304），重试耗尽时抛出异常
+    """
+    url = f"{base_url}/{repo}/raw/main/config.json"
+    headers = {"If-None-Match": etag} if etag else {}
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
         try:
-            print(f"Downloading Model Config for {model_name}...")
-            url = f"https://huggingface.co/{model}/raw/main/config.json"
-            response = session.get(url)
-            response.raise_for_status()
+            response = session.get(url, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUS_CODES:
+                response.raise_for_status()
+                return response
+            error = requests.HTTPError(f"{response.status_code} Error for url: {url}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == max_retries:
+            raise error
+        # 指数退避 + 随机抖动，避免并发请求同时重试
+        time.sleep(backoff * (2**attempt) * secure_random_uniform(0.5, 1.5))
+    raise RuntimeError("unreachable")
+
+
+def download_model_configs(
+    root_dir: str,
+    repos: List[str] | None = None,
+    base_url: str = HF_BASE_URL,
+    concurrency: int = 8,
+    rate: float = 5.0,
+    burst: int = 5,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    store_dir: str | None = None,
+) -> Dict[str, List[str]]:
+    """
+    并发下载模型配置文件到指定目录，仅重新下载上游发生变化的配置。
+
+    Args:
+        root_dir: 根目录路径，模型配置文件将保存到 {root_dir}/models/ 目录下
+        repos: 模型仓库列表，默认为 QWEN_MODELS
+        base_url: 模型仓库地址
+        concurrency: 并发下载数
+        rate: 每秒最多发起的请求数
+        burst: 允许的突发请求数
+        max_retries: 单个请求的最大重试次数
+        backoff: 重试退避的基础时间（秒）
+        store_dir: 可选的内容寻址配置存储目录，指定后配置写入该存储并生成新的快照，ETag 记录在快照清单中
+
+    Returns:
+        按结果分类的模型名称：downloaded、unchanged、failed
+    """
+    # 确保 models 目录存在
+    models_dir = os.path.join(root_dir, "models")
+    os.makedirs(models_dir, exist_ok=True)
+
+    repos = QWEN_MODELS if repos is None else repos
+    etags_path = os.path.join(models_dir, ETAGS_FILE)
+    etags = _read_json(etags_path)
+    etags_lock = threading.Lock()
+    store = ConfigStore(store_dir) if store_dir else None
+    manifest = dict(store.read_manifest()["models"]) if store else {}
+    results: Dict[str, List[str]] = {"downloaded": [], "unchanged": [], "failed": []}
+
+    session = create_session(concurrency)
+    bucket = TokenBucket(rate, burst)
 
-            with open(os.path.join(models_dir, f"{model_name}.json"), "w") as f:
-                f.write(response.text)
+    def download(repo: str):
+        model_name = repo.split("/")[1]
+        config_file = os.path.join(models_dir, f"{model_name}.json")
+        if store is not None:
+            etag = manifest.get(model_name, {}).get("etag")
+        else:
+            # 本地文件被删除时不能发送条件请求，否则会一直收到 304
+            etag = etags.get(model_name) if os.path.exists(config_file) else None
+        try:
+            response = fetch_model_config(session, bucket, repo, etag, base_url, max_retries, backoff)
+            if response.status_code == 304:
+                print(f"Model Config for {model_name} is up to date.")
+                return "unchanged", model_name
+            if store is not None:
+                entry = store.put_config(json.loads(response.text))
+                entry.update({"source": repo, "fetched_at": time.time()})
+                if response.headers.get("ETag"):
+                    entry["etag"] = response.headers["ETag"]
+                with etags_lock:
+                    manifest[model_name] = entry
+            else:
+                _write_atomic(config_file, response.text)
+                with etags_lock:
+                    if response.headers.get("ETag"):
+                        etags[model_name] = response.headers["ETag"]
             print(f"Model Config for {model_name} downloaded successfully.")
+            return "downloaded", model_name
         except Exception as e:
             print(f"Error downloading Model Config for {model_name}: {e}")
-        finally:
-            time_to_sleep = secure_random_uniform(1, 3)
-            print(f"Sleeping for {time_to_sleep} seconds...")
-            time.sleep(time_to_sleep)
+            return "failed", model_name
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for status, model_name in executor.map(download, repos):
+            results[status].append(model_name)
+
+    if store is not None:
+        if results["downloaded"]:
+            snapshot = store.commit(manifest)
+            print(f"Committed config store snapshot {snapshot}.")
+    else:
+        _write_atomic(etags_path, json.dumps(etags, indent=2, sort_keys=True))
+    session.close()
+    return results
 
 
 def main():
-    parser = argparse.ArgumentParser(description="下载 QWEN 模型配置文件")
+    parser = argparse.ArgumentParser(description="下载模型配置文件")
     parser.add_argument(
         "--root_dir",
         required=True,
         help="根目录路径，模型配置文件将保存到该目录下的 models 文件夹中",
     )
+    parser.add_argument(
+        "--family",
+        action="append",
+        choices=list(MODEL_FAMILIES),
+        help="要下载的模型族，可重复指定，默认为 qwen",
+    )
+    parser.add_argument("--models_file", help="额外的模型列表文件，每行一个仓库名")
+    parser.add_argument("--base_url", default=HF_BASE_URL, help="模型仓库地址")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发下载数")
+    parser.add_argument("--rate", type=float, default=5.0, help="每秒最多发起的请求数")
+    parser.add_argument("--max_retries", type=int, default=3, help="单个请求的最大重试次数")
+    parser.add_argument("--store_dir", help="内容寻址配置存储目录，指定后写入存储快照而非 models 目录")
     args = parser.parse_args()
     print(f"Downloading Model Configs to {args.root_dir}/models...")
     # 检查根目录是否存在，如果不存在则创建
@@ -167,7 +356,22 @@ def main():
         os.makedirs(args.root_dir, exist_ok=True)
         print(f"创建根目录: {args.root_dir}")
 
-    download_model_configs(args.root_dir)
+    repos = load_model_list(args.family or ["qwen"], args.models_file)
+    results = download_model_configs(
+        args.root_dir,
+        repos,
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        burst=max(1, int(args.rate)),
+        max_retries=args.max_retries,
+        store_dir=args.store_dir,
+    )
+    print(
+        f"Downloaded: {len(results['downloaded'])}, "
+        f"Unchanged: {len(results['unchanged'])}, "
+        f"Failed: {len(results['failed'])}"
+    )
 
 
 if __name__ == "__main__":
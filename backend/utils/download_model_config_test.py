@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.config_store import ConfigStore
+from utils.download_model_config import TokenBucket, download_model_configs, load_model_list
+
+
+class _ConfigHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Hugging Face raw file endpoint."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+            fail = server.failures.get(self.path, 0)
+            if fail:
+                server.failures[self.path] = fail - 1
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = server.configs.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{hash(body) & 0xFFFFFFFF:x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadModelConfigs(unittest.TestCase):
+    """Test cases for the concurrent config downloader."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ConfigHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failures = {}
+        self.server.configs = {
+            f"/Org/Model-{i}/raw/main/config.json": json.dumps({"hidden_size": 1024 * (i + 1)}) for i in range(6)
+        }
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repos = [f"Org/Model-{i}" for i in range(6)]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def _download(self, repos=None, **kwargs):
+        return download_model_configs(
+            self.tmp_dir.name, repos or self.repos, base_url=self.base_url, rate=1000, burst=100, backoff=0.01, **kwargs
+        )
+
+    def test_download_and_revalidate(self):
+        """Only configs that changed upstream are downloaded again."""
+        results = self._download()
+        self.assertEqual(sorted(results["downloaded"]), [f"Model-{i}" for i in range(6)])
+        with open(os.path.join(self.tmp_dir.name, "models", "Model-3.json")) as fr:
+            self.assertEqual(json.load(fr), {"hidden_size": 4096})
+
+        self.server.configs["/Org/Model-2/raw/main/config.json"] = json.dumps({"hidden_size": 1})
+        results = self._download()
+        self.assertEqual(results["downloaded"], ["Model-2"])
+        self.assertEqual(len(results["unchanged"]), 5)
+        # The second round sent conditional requests for every model.
+        self.assertTrue(all(etag for _, etag in self.server.requests[6:]))
+
+    def test_retries_and_failures(self):
+        """Transient errors are retried, missing configs are reported as failed."""
+        self.server.failures["/Org/Model-0/raw/main/config.json"] = 2
+        results = self._download(self.repos[:1] + ["Org/Missing"], max_retries=3)
+        self.assertEqual(results["downloaded"], ["Model-0"])
+        self.assertEqual(results["failed"], ["Missing"])
+
+    def test_deleted_file_is_downloaded_again(self):
+        """A locally deleted config is re-downloaded even though its ETag is known."""
+        self._download(self.repos[:1])
+        os.remove(os.path.join(self.tmp_dir.name, "models", "Model-0.json"))
+        self.assertEqual(self._download(self.repos[:1])["downloaded"], ["Model-0"])
+
+    def test_download_into_config_store(self):
+        """With a config store, ETags live in the snapshot manifest and unchanged runs add no snapshot."""
+        store_dir = os.path.join(self.tmp_dir.name, "store")
+        self._download(store_dir=store_dir)
+        store = ConfigStore(store_dir)
+        manifest = store.read_manifest()["models"]
+        self.assertEqual(store.load_models()["Model-1"], {"hidden_size": 2048})
+        self.assertTrue(all(entry["etag"] for entry in manifest.values()))
+
+        self._download(store_dir=store_dir)
+        self.assertEqual(len(store.snapshots()), 1)
+        self.server.configs["/Org/Model-4/raw/main/config.json"] = json.dumps({"hidden_size": 7})
+        self.assertEqual(self._download(store_dir=store_dir)["downloaded"], ["Model-4"])
+        self.assertEqual(len(store.snapshots()), 2)
+        self.assertEqual(store.load_models()["Model-4"], {"hidden_size": 7})
+
+    def test_token_bucket_rate(self):
+        """The token bucket limits the sustained request rate."""
+        bucket = TokenBucket(rate=200, capacity=1)
+        start = time.monotonic()
+        for _ in range(21):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_load_model_list(self):
+        """Model lists from families and files are merged without duplicates."""
+        path = os.path.join(self.tmp_dir.name, "models.txt")
+        with open(path, "w") as fw:
+            fw.write("# extra models\nOrg/Model-0\nQwen/Qwen3-8B\n\n")
+        repos = load_model_list(["qwen"], path)
+        self.assertEqual(repos.count("Qwen/Qwen3-8B"), 1)
+        self.assertEqual(repos[-1], "Org/Model-0")
+        with self.assertRaises(ValueError):
+            load_model_list(["unknown"])
+
+
+if __name__ == "__main__":
+    unittest.main()
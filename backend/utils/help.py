@@ -1,11 +1,55 @@
 import json
 import os
 
+from config.gpu import GPU_SPECS, GPUS
+from utils.config_store import ConfigStore
+
 
 def load_predefined_models(models_dir: str) -> dict:
     models = {}
     for model_file in os.listdir(models_dir):
-        if model_file.endswith(".json"):
+        # 跳过 .etags.json 等隐藏的元数据文件
+        if model_file.endswith(".json") and not model_file.startswith("."):
             with open(os.path.join(models_dir, model_file)) as fr:
                 models[model_file[:-5]] = json.load(fr)
     return models
+
+
+def load_catalog(models_dir: str, store_dir: str | None = None) -> dict:
+    """Load the model catalog from the config store manifest, falling back to the models directory."""
+    if store_dir:
+        store = ConfigStore(store_dir)
+        if store.current_snapshot() is not None:
+            return store.load_models()
+    return load_predefined_models(models_dir)
+
+
+def catalog_versions(models_dir: str, store_dir: str | None = None) -> dict:
+    """Return a version token per model of the catalog that ``load_catalog`` would load.
+
+    Tokens change whenever a config changes: blob hashes for the config store, mtime and size otherwise.
+    """
+    if store_dir:
+        store = ConfigStore(store_dir)
+        if store.current_snapshot() is not None:
+            return {
+                name: entry["blob"] + entry.get("overlay", "")
+                for name, entry in store.read_manifest()["models"].items()
+            }
+    versions = {}
+    with os.scandir(models_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".json") and not entry.name.startswith("."):
+                stat = entry.stat()
+                versions[entry.name[:-5]] = f"{stat.st_mtime_ns}:{stat.st_size}"
+    return versions
+
+
+def get_gpu_spec(gpu: str) -> dict:
+    """Look up a GPU by id (e.g. "h100_80") or display name (e.g. "H100 (80GB)")."""
+    if gpu in GPU_SPECS:
+        return {"id": gpu, **GPU_SPECS[gpu]}
+    for gpu_id, spec in GPU_SPECS.items():
+        if spec["name"] == gpu:
+            return {"id": gpu_id, **spec}
+    raise ValueError(f'Unknown GPU "{gpu}". Must be one of: {GPUS}')
@@ -0,0 +1,164 @@
+"""Live recalculation channel: the client sends parameter deltas, the server answers with results.
+
+Each connection is a session holding the current scenario, so a slider drag only sends the field that moved.
+Deltas that arrive while a calculation runs are coalesced: the server applies every pending delta, computes
+once for the latest state and drops a result whose state was superseded before it could be sent. Results
+carry the sequence number of the last delta they include, so the client can ignore anything older than what
+it displays, and a per-session memo serves states seen before (dragging a slider back and forth).
+
+Client messages::
+
+    {"seq": 7, "calculation_type": "inference", "params": {"batch_size": 8, "use_page_attention": null}}
+
+``params`` is merged into the session scenario, a null value removes a field. Server messages are
+``{"type": "result", "seq", "calculation_type", "parameters", "memory_requirements"}`` or
+``{"type": "error", "seq", "error"}``.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+from utils.config_store import canonical_json
+from utils.scenario import CALCULATION_TYPES, resolve_scenario, run_scenario
+
+MAX_MESSAGE_BYTES = 64 * 1024
+# Results memoized per session
+RESULT_CACHE_SIZE = 64
+# How often an idle channel polls for the next message
+POLL_INTERVAL_SECONDS = 0.02
+
+
+class LiveSession:
+    """Scenario state and result memo of one live channel connection."""
+
+    def __init__(self, models: Dict[str, Dict[str, Any]]):
+        self.models = models
+        self.calculation_type = "inference"
+        self.scenario: Dict[str, Any] = {}
+        self.seq = 0
+        self.computed = 0
+        self.dropped = 0
+        self._results: OrderedDict = OrderedDict()
+
+    def receive(self, message: bytes | str):
+        """Apply one client message to the session state.
+
+        Raises:
+            ValueError: When the message is not a valid update; the state is left unchanged
+        """
+        if len(message) > MAX_MESSAGE_BYTES:
+            raise ValueError(f"Message exceeds {MAX_MESSAGE_BYTES} bytes")
+        try:
+            update = json.loads(message)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if not isinstance(update, dict) or not isinstance(update.get("params", {}), dict):
+            raise ValueError('Message must be an object with a "params" object')
+        calculation_type = update.get("calculation_type", self.calculation_type)
+        if not isinstance(calculation_type, str) or calculation_type not in CALCULATION_TYPES:
+            raise ValueError(f"Invalid calculation type. Must be one of: {list(CALCULATION_TYPES)}")
+        seq = update.get("seq", self.seq + 1)
+        if isinstance(seq, bool) or not isinstance(seq, int):
+            raise ValueError(f"Invalid seq: {seq!r}")
+        self.calculation_type = calculation_type
+        for key, value in update.get("params", {}).items():
+            if value is None:
+                self.scenario.pop(key, None)
+            else:
+                self.scenario[key] = value
+        self.seq = seq
+
+    def compute(self) -> Dict[str, Any]:
+        """Return the result message for the current state."""
+        key = canonical_json([self.calculation_type, self.scenario])
+        result = self._results.get(key)
+        if result is None:
+            self.computed += 1
+            try:
+                params = resolve_scenario(self.calculation_type, self.scenario, self.models)
+                result = {
+                    "type": "result",
+                    "calculation_type": self.calculation_type,
+                    "parameters": params,
+                    "memory_requirements": run_scenario(self.calculation_type, params),
+                }
+            except Exception as e:
+                # Fields of the wrong type (e.g. a list as batch_size) fail outside the validation
+                result = {"type": "error", "error": str(e)}
+            self._results[key] = result
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return {**result, "seq": self.seq}
+
+
+def _drain(session: LiveSession, recv_nb: Callable[[], bytes], send: Callable[[str], None]) -> int:
+    """Apply every pending message without blocking; return how many were applied."""
+    applied = 0
+    while message := recv_nb():
+        try:
+            session.receive(message)
+            applied += 1
+        except (TypeError, ValueError) as e:
+            send(json.dumps({"type": "error", "seq": session.seq, "error": str(e)}))
+    return applied
+
+
+def receive_until(
+    recv_nb: Callable[[], bytes],
+    deadline: float,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Callable[[], bytes]:
+    """Build a blocking receive that raises OSError once ``clock()`` passes ``deadline``.
+
+    uWSGI's blocking receive cannot time out, so this polls ``recv_nb``: the channel then ends before the
+    harakiri of its request instead of having the worker killed under it.
+    """
+
+    def recv() -> bytes:
+        while clock() < deadline:
+            if message := recv_nb():
+                return message
+            sleep(POLL_INTERVAL_SECONDS)
+        raise OSError("live channel lifetime reached")
+
+    return recv
+
+
+def serve_channel(
+    session: LiveSession,
+    recv: Callable[[], bytes],
+    recv_nb: Callable[[], bytes],
+    send: Callable[[str], None],
+):
+    """Run the coalescing loop of one connection until the client goes away.
+
+    Args:
+        session: State of the connection
+        recv: Blocks until the next message arrives
+        recv_nb: Returns the next pending message, or an empty value when there is none
+        send: Sends one text message
+
+    ``recv``, ``recv_nb`` and ``send`` raise OSError once the connection is closed (as uWSGI's websocket API).
+    Invalid messages and failed calculations are answered with an error message and the channel stays open.
+    """
+    try:
+        while True:
+            try:
+                session.receive(recv())
+            except (TypeError, ValueError) as e:
+                send(json.dumps({"type": "error", "seq": session.seq, "error": str(e)}))
+                continue
+            _drain(session, recv_nb, send)
+            result = session.compute()
+            # Deltas that arrived during the calculation supersede its result: recompute for the latest state
+            while _drain(session, recv_nb, send):
+                session.dropped += 1
+                result = session.compute()
+            send(json.dumps(result))
+    except OSError:
+        return
@@ -0,0 +1,144 @@
+import json
+import unittest
+from collections import deque
+
+from utils.live import LiveSession, receive_until, serve_channel
+from utils.scenario import run_inference_calculation
+
+MODELS = {
+    "Qwen3-8B": {
+        "torch_dtype": "bfloat16",
+        "num_hidden_layers": 36,
+        "hidden_size": 4096,
+        "num_attention_heads": 32,
+        "head_dim": 128,
+        "num_key_value_heads": 8,
+    }
+}
+INITIAL = {
+    "seq": 1,
+    "calculation_type": "inference",
+    "params": {"model_name": "Qwen3-8B", "batch_size": 1, "sequence_length": 8192, "kv_cache_precision": "bfloat16"},
+}
+
+
+class _Connection:
+    """Scripted connection: ``bursts`` are delivered one burst per blocking receive."""
+
+    def __init__(self, bursts, during_compute=None):
+        self.bursts = deque(deque(json.dumps(m) for m in burst) for burst in bursts)
+        self.current: deque = deque()
+        self.during_compute = deque(json.dumps(m) for m in during_compute or [])
+        self.sent = []
+
+    def recv(self):
+        if not self.bursts:
+            raise OSError("closed")
+        self.current = self.bursts.popleft()
+        return self.current.popleft()
+
+    def recv_nb(self):
+        return self.current.popleft() if self.current else b""
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+class TestLiveSession(unittest.TestCase):
+    """Test cases for the live recalculation channel."""
+
+    def test_deltas_are_merged(self):
+        """Deltas update the scenario, null removes a field, and results match the HTTP calculator."""
+        session = LiveSession(MODELS)
+        session.receive(json.dumps(INITIAL))
+        session.receive(json.dumps({"seq": 2, "params": {"batch_size": 4, "use_page_attention": True}}))
+        session.receive(json.dumps({"seq": 3, "params": {"use_page_attention": None}}))
+        result = session.compute()
+        self.assertEqual(result["seq"], 3)
+        self.assertEqual(result["parameters"]["batch_size"], 4)
+        self.assertEqual(result["memory_requirements"], run_inference_calculation(result["parameters"]))
+
+    def test_invalid_messages(self):
+        """Invalid messages raise ValueError and leave the state unchanged; bad scenarios return errors."""
+        session = LiveSession(MODELS)
+        with self.assertRaises(ValueError):
+            session.receive("not json")
+        with self.assertRaises(ValueError):
+            session.receive(json.dumps({"calculation_type": "serving", "params": {}}))
+        session.receive(json.dumps({"seq": 1, "params": {"model_name": "missing"}}))
+        self.assertEqual(session.compute()["type"], "error")
+
+    def test_malformed_messages_keep_channel_open(self):
+        """Fields of the wrong type are answered with error messages and the channel keeps serving."""
+        bursts = [
+            [INITIAL],
+            [{"seq": [2], "params": {"batch_size": 4}}],
+            [{"seq": 3, "params": {"batch_size": [4]}}],
+            [{"seq": 4, "params": {"batch_size": 2}}],
+        ]
+        connection = _Connection(bursts)
+        session = LiveSession(MODELS)
+        serve_channel(session, connection.recv, connection.recv_nb, connection.send)
+        self.assertEqual(
+            [(m["type"], m["seq"]) for m in connection.sent], [("result", 1), ("error", 1), ("error", 3), ("result", 4)]
+        )
+        self.assertEqual(connection.sent[-1]["parameters"]["batch_size"], 2)
+
+    def test_results_are_memoized(self):
+        """Returning to an earlier state does not recalculate."""
+        session = LiveSession(MODELS)
+        session.receive(json.dumps(INITIAL))
+        session.compute()
+        session.receive(json.dumps({"seq": 2, "params": {"batch_size": 2}}))
+        session.compute()
+        session.receive(json.dumps({"seq": 3, "params": {"batch_size": 1}}))
+        self.assertEqual(session.compute()["seq"], 3)
+        self.assertEqual(session.computed, 2)
+
+    def test_bursts_are_coalesced(self):
+        """A burst of deltas produces a single result for the latest state."""
+        burst = [INITIAL] + [{"seq": seq, "params": {"batch_size": seq}} for seq in range(2, 20)]
+        connection = _Connection([burst, [{"seq": 20, "params": {"sequence_length": 1024}}]])
+        session = LiveSession(MODELS)
+        serve_channel(session, connection.recv, connection.recv_nb, connection.send)
+        self.assertEqual([m["seq"] for m in connection.sent], [19, 20])
+        self.assertEqual(connection.sent[0]["parameters"]["batch_size"], 19)
+        self.assertEqual(session.computed, 2)
+
+    def test_superseded_results_are_dropped(self):
+        """A delta arriving during a calculation supersedes its result."""
+        connection = _Connection([[INITIAL]])
+        session = LiveSession(MODELS)
+        compute = session.compute
+
+        def slow_compute():
+            result = compute()
+            if connection.during_compute:
+                connection.current.append(connection.during_compute.popleft())
+            return result
+
+        connection.during_compute.append(json.dumps({"seq": 2, "params": {"batch_size": 8}}))
+        session.compute = slow_compute
+        serve_channel(session, connection.recv, connection.recv_nb, connection.send)
+        self.assertEqual([m["seq"] for m in connection.sent], [2])
+        self.assertEqual(session.dropped, 1)
+
+    def test_channel_lifetime(self):
+        """The receive loop returns queued messages, then ends the channel once its deadline passes."""
+        now = [0.0]
+        pending = deque([b"", json.dumps(INITIAL)])
+        recv = receive_until(
+            lambda: pending.popleft() if pending else b"",
+            deadline=1.0,
+            clock=lambda: now[0],
+            sleep=lambda seconds: now.__setitem__(0, now[0] + 0.25),
+        )
+        connection = _Connection([])
+        connection.recv = recv
+        serve_channel(LiveSession(MODELS), connection.recv, connection.recv_nb, connection.send)
+        self.assertEqual([message["seq"] for message in connection.sent], [1])
+        self.assertGreaterEqual(now[0], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ from typing import Dict, List, Tuple
 
 from config.memory import (
     DATA_TYPE_SIZES,
+    DEFAULT_COEFFICIENTS,
     OPTIMIZERS_SIZE,
 )
 
@@ -70,6 +71,7 @@ def _get_kv_cache(
     head_dim: int,
     num_key_value_heads: int,
     use_page_attention: bool = False,
+    paged_attention_factor: float = DEFAULT_COEFFICIENTS["paged_attention_factor"],
 ) -> float:
     """Calculate the memory required for key-value cache.
 
@@ -83,6 +85,7 @@ def _get_kv_cache(
         head_dim: Head dimension
         num_key_value_heads: Number of key-value heads
         use_page_attention: Whether Page Attention is used
+        paged_attention_factor: Fraction of the KV cache Page Attention keeps allocated
     """
     try:
         # Basic KV cache calculation
@@ -96,7 +99,7 @@ def _get_kv_cache(
             * DATA_TYPE_SIZES[precision]
         )
         if use_page_attention:
-            kv_size = kv_size * 0.14  # Page Attention typically reduces memory by ~86%
+            kv_size = kv_size * paged_attention_factor
         return kv_size / (10**9)
     except Exception as e:
         warnings.warn(f"Error calculating KV cache memory: {str(e)}")
@@ -109,6 +112,7 @@ def _get_activation_memory(
     sequence_length: int,
     head_dim: int,
     use_flash_attention: bool = False,
+    flash_attention_factor: float = DEFAULT_COEFFICIENTS["flash_attention_factor"],
 ) -> float:
     """Calculate the memory required for activations.
 
@@ -118,11 +122,14 @@ def _get_activation_memory(
         sequence_length: Input sequence length
         head_dim: Head dimension
         use_flash_attention: Whether Flash Attention is used
+        flash_attention_factor: Activation elements per token and head dimension with Flash Attention
     """
     try:
         activation_size = sequence_length * sequence_length * batch_size * head_dim * DATA_TYPE_SIZES[precision]
         if use_flash_attention:
-            activation_size = sequence_length * batch_size * head_dim * DATA_TYPE_SIZES[precision] * 20
+            activation_size = (
+                sequence_length * batch_size * head_dim * DATA_TYPE_SIZES[precision] * flash_attention_factor
+            )
         return activation_size / (1024**3)
     except Exception as e:
         warnings.warn(f"Error calculating activation memory: {str(e)}")
@@ -180,6 +187,7 @@ def calculate_inference_memory(
     mixed_quantized_ratio: float = 0.0,
     mixed_quantized_precision: str = "int8",
     architecture: str = "decoder_only",
+    coefficients: Dict[str, float] | None = None,
 ) -> Dict[str, str]:
     """Calculate the total memory required for inference.
 
@@ -200,7 +208,9 @@ def calculate_inference_memory(
         mixed_quantized_ratio: Ratio of parameters that are mixed quantized
         mixed_quantized_precision: Precision of mixed quantized parameters
         architecture: Model architecture type
+        coefficients: Calibrated coefficients overriding DEFAULT_COEFFICIENTS
     """
+    coefficients = {**DEFAULT_COEFFICIENTS, **(coefficients or {})}
     warnings_list = []
     # 模型参数占用的 VRAM
     model_weights = _get_model_weights(
@@ -221,6 +231,7 @@ def calculate_inference_memory(
         head_dim,
         num_key_value_heads,
         use_page_attention,
+        coefficients["paged_attention_factor"],
     )
     # 激活值占用的 VRAM
     activation_memory = _get_activation_memory(
@@ -229,9 +240,10 @@ def calculate_inference_memory(
         sequence_length,
         head_dim,
         use_flash_attention,
+        coefficients["flash_attention_factor"],
     )
     # 额外开销
-    overhead_memory = 1.04
+    overhead_memory = coefficients["inference_overhead_gb"]
     # 总 VRAM
     result = {
         "model_weights_memory": _get_memory([model_weights], warnings_list)[0],
@@ -264,6 +276,7 @@ def calculate_training_memory(
     mixed_quantized_ratio: float = 0.0,
     mixed_quantized_precision: str = "int8",
     architecture: str = "decoder_only",
+    coefficients: Dict[str, float] | None = None,
 ) -> Dict[str, str]:
     """Calculate the total memory required for training.
 
@@ -284,7 +297,9 @@ def calculate_training_memory(
         mixed_quantized_ratio: Ratio of parameters that are mixed quantized
         mixed_quantized_precision: Precision of mixed quantized parameters
         architecture: Model architecture type
+        coefficients: Calibrated coefficients overriding DEFAULT_COEFFICIENTS
     """
+    coefficients = {**DEFAULT_COEFFICIENTS, **(coefficients or {})}
     warnings_list = []
     # 模型参数占用的 VRAM
     model_weights = _get_model_weights(
@@ -301,13 +316,14 @@ def calculate_training_memory(
         sequence_length,
         head_dim,
         use_flash_attention,
+        coefficients["flash_attention_factor"],
     )
     # 优化器状态占用的 VRAM
     optimizer_memory = _get_optimizer_memory(model_size, optimizer) * trainable_parameters / 100
     # 梯度占用的 VRAM
     gradients_memory = _get_gradient_memory(model_size, precision) * trainable_parameters / 100
     # 额外开销
-    overhead_memory = 1.54
+    overhead_memory = coefficients["training_overhead_gb"]
     # 总 VRAM
     result = {
         "model_weights_memory": _get_memory([model_weights], warnings_list)[0],
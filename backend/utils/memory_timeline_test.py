@@ -0,0 +1,65 @@
+import time
+import unittest
+
+from utils.memory_timeline import layer_activation_bytes, simulate_training_step
+
+QWEN3_8B = {
+    "model_size": 8,
+    "precision": "bfloat16",
+    "num_hidden_layers": 36,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+    "batch_size": 1,
+    "sequence_length": 4096,
+    "optimizer": "AdamW",
+    "trainable_parameters": 100,
+    "use_flash_attention": True,
+}
+
+
+class TestMemoryTimeline(unittest.TestCase):
+    """Test cases for the per-layer training step memory simulator."""
+
+    def test_activation_bytes(self):
+        """Flash Attention drops the attention score term of the activation size."""
+        self.assertEqual(layer_activation_bytes(QWEN3_8B, True), 4096 * 34 * 4096)
+        self.assertEqual(layer_activation_bytes(QWEN3_8B, False), 4096 * (34 * 4096 + 5 * 32 * 4096))
+
+    def test_peak_without_checkpointing(self):
+        """Without checkpointing the peak is at the loss, with every layer's activations held."""
+        result = simulate_training_step(QWEN3_8B, vocab_size=151936)
+        self.assertEqual(result["peak"]["phase"], "loss")
+        breakdown = result["peak"]["breakdown_gb"]
+        self.assertAlmostEqual(breakdown["activations"], 36 * layer_activation_bytes(QWEN3_8B, True) / 1e9, places=2)
+        self.assertEqual(result["peak_memory_gb"], max(result["timeline"]["memory_gb"]))
+        # The step ends with weights, optimizer state and overhead only
+        self.assertAlmostEqual(result["steady_state_memory_gb"], 16 + 64 + 1.04, places=2)
+
+    def test_checkpointing_and_zero_reduce_the_peak(self):
+        """Checkpointing trades activations for recomputation; ZeRO stages shard the model state."""
+        plain = simulate_training_step(QWEN3_8B, vocab_size=151936)
+        checkpointed = simulate_training_step(QWEN3_8B, activation_checkpointing=True, vocab_size=151936)
+        self.assertLess(
+            checkpointed["peak"]["breakdown_gb"]["activations"], plain["peak"]["breakdown_gb"]["activations"]
+        )
+        peaks = [
+            simulate_training_step(QWEN3_8B, True, zero_stage, data_parallel_size=8)["peak_memory_gb"]
+            for zero_stage in range(4)
+        ]
+        self.assertEqual(peaks, sorted(peaks, reverse=True))
+        with self.assertRaises(ValueError):
+            simulate_training_step(QWEN3_8B, zero_stage=4)
+
+    def test_large_model_runs_in_milliseconds(self):
+        """A 94-layer model replays in milliseconds."""
+        params = {**QWEN3_8B, "model_size": 235, "num_hidden_layers": 94, "num_attention_heads": 64}
+        start = time.perf_counter()
+        result = simulate_training_step(params, True, 3, 64, 151936)
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(len(result["timeline"]["memory_gb"]), result["events"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,391 @@
+"""Prometheus-style metrics for the Flask API.
+
+The hot path only touches a per-thread shard (plain dict updates, no lock). Shards are merged when the
+process snapshot is flushed. When ``multiproc_dir`` is configured (uwsgi with several workers), every
+worker writes its snapshot to ``{multiproc_dir}/metrics_{pid}_{uuid}.json`` from a background thread once a
+second and on exit, and the worker that serves ``/metrics`` aggregates all files, so the exposition is
+correct no matter which worker answers. Files left behind by recycled workers are folded into an archive so
+that counters stay monotonic. A worker is alive when its pid exists with the start time recorded in its
+snapshot, so a recycled pid never hides or overwrites the counters of the dead worker that had it.
+"""
+
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Payload size buckets in bytes
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAM_BUCKETS = {
+    "http_request_duration_seconds": LATENCY_BUCKETS,
+    "http_request_size_bytes": SIZE_BUCKETS,
+    "http_response_size_bytes": SIZE_BUCKETS,
+}
+
+HELP = {
+    "http_requests_total": ("counter", "Total HTTP requests by route, method and status."),
+    "http_request_errors_total": ("counter", "HTTP responses with status >= 400 by route and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency in seconds by route."),
+    "http_request_size_bytes": ("histogram", "HTTP request payload size in bytes by route."),
+    "http_response_size_bytes": ("histogram", "HTTP response payload size in bytes by route."),
+    "cache_requests_total": ("counter", "Cache lookups by cache name and result (hit/miss)."),
+    "cache_hit_ratio": ("gauge", "Cache hit ratio by cache name, derived from cache_requests_total."),
+    "catalog_models": ("gauge", "Number of model configurations in the catalog."),
+    "catalog_load_seconds": ("gauge", "Time spent loading the model catalog in seconds."),
+    "live_calculations_total": ("counter", "Calculations run by closed live channel sessions."),
+    "live_calculations_dropped_total": ("counter", "Live channel calculations superseded before being sent."),
+}
+
+_ARCHIVE_FILE = "metrics_archive.json"
+_LOCK_FILE = "metrics.lock"
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+
+class _Shard:
+    """Per-thread metric storage. Only the owning thread writes to it."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters: Dict[Key, float] = {}
+        # key -> [bucket_0, ..., bucket_n (+Inf), sum, count]
+        self.histograms: Dict[Key, List[float]] = {}
+
+
+class MetricsRegistry:
+    """Process-local metrics registry with optional multi-process aggregation."""
+
+    def __init__(self, multiproc_dir: str | None = None, flush_interval: float = 1.0):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._gauges: Dict[Key, float] = {}
+        self._process_id = _new_process_id()
+        self._flusher: threading.Thread | None = None
+
+    def init_multiproc_dir(self, wipe: bool = True):
+        """Create the shared directory, removing files from a previous server run.
+
+        Must be called once before workers fork (uwsgi ``lazy-apps = false`` imports the app in the master).
+        """
+        if not self.multiproc_dir:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        if wipe:
+            for name in os.listdir(self.multiproc_dir):
+                if name.startswith("metrics_") and name.endswith(".json"):
+                    os.remove(os.path.join(self.multiproc_dir, name))
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def after_fork(self):
+        """Drop metrics inherited from the parent process so they are not counted twice."""
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        # Threads do not survive the fork: the child starts its own flusher on its first request
+        self._process_id = _new_process_id()
+        self._flusher = None
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        buckets = HISTOGRAM_BUCKETS[name]
+        histograms = self._shard().histograms
+        key = (name, labels)
+        data = histograms.get(key)
+        if data is None:
+            data = [0] * (len(buckets) + 3)
+            histograms[key] = data
+        data[bisect.bisect_left(buckets, value)] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    def set_gauge(self, name: str, value: float, labels: Labels = ()):
+        self._gauges[(name, labels)] = value
+
+    def record_request(
+        self, route: str, method: str, status: int, duration: float, request_size: int, response_size: int
+    ):
+        """Record one HTTP request. This is the only call on the request hot path."""
+        route_labels = (("route", route),)
+        self.inc("http_requests_total", (("route", route), ("method", method), ("status", str(status))))
+        if status >= 400:
+            self.inc("http_request_errors_total", (("route", route), ("status", str(status))))
+        self.observe("http_request_duration_seconds", duration, route_labels)
+        self.observe("http_request_size_bytes", request_size, route_labels)
+        self.observe("http_response_size_bytes", response_size, route_labels)
+        if self._flusher is None:
+            self.start_flusher()
+
+    def record_cache(self, cache: str, hit: bool):
+        self.inc("cache_requests_total", (("cache", cache), ("result", "hit" if hit else "miss")))
+
+    # ------------------------------------------------------------------
+    # Snapshots and aggregation
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Merge all thread shards of this process into one serializable snapshot."""
+        counters: Dict[str, float] = {}
+        histograms: Dict[str, List[float]] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in dict(shard.counters).items():
+                skey = _encode_key(key)
+                counters[skey] = counters.get(skey, 0) + value
+            for key, data in dict(shard.histograms).items():
+                skey = _encode_key(key)
+                merged = histograms.get(skey)
+                histograms[skey] = list(data) if merged is None else [a + b for a, b in zip(merged, data)]
+        gauges = {_encode_key(key): value for key, value in dict(self._gauges).items()}
+        return {
+            "pid": os.getpid(),
+            "started": _process_start(os.getpid()),
+            "counters": counters,
+            "histograms": histograms,
+            "gauges": gauges,
+        }
+
+    def start_flusher(self):
+        """Flush every ``flush_interval`` seconds from a daemon thread, so an idle worker's counts are written."""
+        with self._shards_lock:
+            if self._flusher is not None or not self.multiproc_dir:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self):
+        """Stop the background flush thread, if any, after a final flush."""
+        with self._shards_lock:
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+
+    def _flush_loop(self):
+        flusher = threading.current_thread()
+        while self._flusher is flusher:
+            time.sleep(self.flush_interval)
+            if self._flusher is not flusher:
+                return
+            try:
+                self.flush()
+            except OSError:
+                # Retried on the next tick, e.g. once a full disk has room again
+                pass
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory (atomic replace)."""
+        if not self.multiproc_dir:
+            return
+        path = os.path.join(self.multiproc_dir, f"metrics_{self._process_id}.json")
+        _write_json(path, self.snapshot())
+
+    def collect(self) -> dict:
+        """Return the aggregated snapshot across all live and recycled worker processes."""
+        if not self.multiproc_dir:
+            return self.snapshot()
+        self.flush()
+        with _FileLock(os.path.join(self.multiproc_dir, _LOCK_FILE)):
+            archive_path = os.path.join(self.multiproc_dir, _ARCHIVE_FILE)
+            archive = _read_json(archive_path) or {"counters": {}, "histograms": {}, "gauges": {}}
+            live = []
+            archived = False
+            for name in os.listdir(self.multiproc_dir):
+                if not (name.startswith("metrics_") and name.endswith(".json")) or name == _ARCHIVE_FILE:
+                    continue
+                path = os.path.join(self.multiproc_dir, name)
+                data = _read_json(path)
+                if data is None:
+                    continue
+                if _process_alive(data.get("pid", 0), data.get("started")):
+                    live.append(data)
+                else:
+                    # Gauges of dead workers are dropped, counters and histograms are kept.
+                    _merge_into(archive, {**data, "gauges": {}})
+                    os.remove(path)
+                    archived = True
+            if archived:
+                _write_json(archive_path, archive)
+        total = {"counters": dict(archive["counters"]), "histograms": dict(archive["histograms"]), "gauges": {}}
+        for data in live:
+            _merge_into(total, data)
+        return total
+
+    def render(self) -> str:
+        """Render the aggregated metrics in the Prometheus text exposition format."""
+        data = self.collect()
+        samples: Dict[str, List[str]] = {}
+
+        for skey, value in sorted(data["counters"].items()):
+            name, labels = _decode_key(skey)
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for skey, values in sorted(data["histograms"].items()):
+            name, labels = _decode_key(skey)
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(list(HISTOGRAM_BUCKETS[name]) + ["+Inf"], values[:-2]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(values[-1])}")
+
+        for skey, value in sorted(data["gauges"].items()):
+            name, labels = _decode_key(skey)
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for cache, ratio in sorted(_cache_hit_ratios(data["counters"]).items()):
+            samples.setdefault("cache_hit_ratio", []).append(
+                f"cache_hit_ratio{_format_labels((('cache', cache),))} {_format_value(ratio)}"
+            )
+
+        output = []
+        for name in sorted(samples):
+            metric_type, help_text = HELP.get(name, ("untyped", name))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {metric_type}")
+            output.extend(samples[name])
+        return "\n".join(output) + "\n"
+
+
+class _FileLock:
+    """Exclusive advisory lock on a file, used to serialize archive compaction between workers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+def _encode_key(key: Key) -> str:
+    name, labels = key
+    return json.dumps([name, [list(pair) for pair in labels]], separators=(",", ":"))
+
+
+def _decode_key(skey: str) -> Tuple[str, Labels]:
+    name, labels = json.loads(skey)
+    return name, tuple((k, v) for k, v in labels)
+
+
+def _merge_into(target: dict, data: dict):
+    for skey, value in data.get("counters", {}).items():
+        target["counters"][skey] = target["counters"].get(skey, 0) + value
+    for skey, values in data.get("histograms", {}).items():
+        merged = target["histograms"].get(skey)
+        target["histograms"][skey] = list(values) if merged is None else [a + b for a, b in zip(merged, values)]
+    for skey, value in data.get("gauges", {}).items():
+        # Every worker reports the same catalog, so the max is the meaningful aggregate.
+        target["gauges"][skey] = max(value, target["gauges"].get(skey, value))
+
+
+def _cache_hit_ratios(counters: Dict[str, float]) -> Dict[str, float]:
+    totals: Dict[str, List[float]] = {}
+    for skey, value in counters.items():
+        name, labels = _decode_key(skey)
+        if name != "cache_requests_total":
+            continue
+        labels = dict(labels)
+        hits_and_total = totals.setdefault(labels["cache"], [0, 0])
+        if labels["result"] == "hit":
+            hits_and_total[0] += value
+        hits_and_total[1] += value
+    return {cache: hits / total for cache, (hits, total) in totals.items() if total}
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _new_process_id() -> str:
+    return f"{os.getpid()}_{uuid.uuid4().hex[:12]}"
+
+
+def _process_start(pid: int) -> int | None:
+    """Start time of ``pid`` in clock ticks after boot, None where ``/proc`` is not available."""
+    try:
+        with open(f"/proc/{pid}/stat") as fr:
+            stat = fr.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses: starttime is the 20th field after the last ")"
+    return int(stat.rsplit(")", 1)[1].split()[19])
+
+
+def _process_alive(pid: int, started: int | None) -> bool:
+    """Whether the process that wrote a snapshot runs, and not another process that reused its pid."""
+    if not _pid_alive(pid):
+        return False
+    return started is None or _process_start(pid) in (None, started)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as fr:
+            return json.load(fr)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as fw:
+        json.dump(data, fw, separators=(",", ":"))
+    os.replace(tmp_path, path)
@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for the metrics registry."""
+
+    def test_render_single_process(self):
+        """Counters, histograms and gauges are rendered in the Prometheus text format."""
+        registry = MetricsRegistry()
+        registry.record_request("/api/models", "GET", 200, 0.003, 0, 512)
+        registry.record_request("/api/models", "GET", 500, 0.2, 0, 64)
+        registry.set_gauge("catalog_models", 87)
+        output = registry.render()
+
+        self.assertIn('http_requests_total{route="/api/models",method="GET",status="200"} 1', output)
+        self.assertIn('http_request_errors_total{route="/api/models",status="500"} 1', output)
+        self.assertIn('http_request_duration_seconds_bucket{route="/api/models",le="0.005"} 1', output)
+        self.assertIn('http_request_duration_seconds_bucket{route="/api/models",le="+Inf"} 2', output)
+        self.assertIn('http_request_duration_seconds_count{route="/api/models"} 2', output)
+        self.assertIn("catalog_models 87", output)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", output)
+
+    def test_threads_are_merged(self):
+        """Per-thread shards are merged into one snapshot."""
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc("http_requests_total", (("route", "/x"),))
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(list(registry.snapshot()["counters"].values()), [4000])
+
+    def test_cache_hit_ratio(self):
+        """Cache hit ratio is derived from the cache counters."""
+        registry = MetricsRegistry()
+        for hit in (True, True, True, False):
+            registry.record_cache("results", hit)
+        self.assertIn('cache_hit_ratio{cache="results"} 0.75', registry.render())
+
+    def test_multiproc_aggregation(self):
+        """Snapshots from other workers are summed, and dead workers are archived."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = MetricsRegistry(tmp_dir)
+            registry.init_multiproc_dir()
+            registry.inc("http_requests_total", (("route", "/x"),), 2)
+
+            other = MetricsRegistry(tmp_dir)
+            other.inc("http_requests_total", (("route", "/x"),), 3)
+            dead = other.snapshot()
+            dead["pid"] = 2**22 + 12345  # above the default pid_max, never alive
+            with open(os.path.join(tmp_dir, "metrics_dead.json"), "w") as fw:
+                json.dump(dead, fw)
+
+            self.assertIn('http_requests_total{route="/x"} 5', registry.render())
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, "metrics_dead.json")))
+            # Archived counters survive subsequent scrapes.
+            self.assertIn('http_requests_total{route="/x"} 5', registry.render())
+
+    def test_reused_pid_is_archived(self):
+        """A snapshot whose pid now belongs to another process is archived, not merged as live."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = MetricsRegistry(tmp_dir)
+            registry.inc("http_requests_total", (("route", "/x"),), 2)
+            stale = MetricsRegistry(tmp_dir)
+            stale.inc("http_requests_total", (("route", "/x"),), 3)
+            stale.flush()
+            # The worker that wrote it had this pid, but started earlier
+            path = os.path.join(tmp_dir, f"metrics_{stale._process_id}.json")
+            with open(path) as fr:
+                data = json.load(fr)
+            if data["started"] is None:
+                self.skipTest("process start times need /proc")
+            data["started"] -= 1
+            with open(path, "w") as fw:
+                json.dump(data, fw)
+
+            self.assertIn('http_requests_total{route="/x"} 5', registry.render())
+            self.assertFalse(os.path.exists(path))
+
+    def test_background_flush(self):
+        """An idle worker's counts reach the shared directory without another request."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = MetricsRegistry(tmp_dir, flush_interval=0.01)
+            registry.record_request("/x", "GET", 200, 0.01, 0, 10)
+            path = os.path.join(tmp_dir, f"metrics_{registry._process_id}.json")
+            deadline = time.monotonic() + 5
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            registry.stop_flusher()
+            with open(path) as fr:
+                self.assertEqual(sum(json.load(fr)["counters"].values()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
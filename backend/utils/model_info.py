@@ -0,0 +1,121 @@
+"""Derived metadata about catalog models (size, family, quantization, MoE, context length)."""
+
+import re
+from typing import Any, Dict, Tuple
+
+# 匹配模型名中的参数量，如 "8B"、"0.6B"、"235B"
+_SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(B|M)(?![a-z])", re.IGNORECASE)
+# 匹配 MoE 模型名中的激活参数量，如 "A22B"
+_ACTIVE_SIZE_PATTERN = re.compile(r"-A(\d+(?:\.\d+)?)B", re.IGNORECASE)
+# 量化变体的名称后缀，去掉后即为基础模型名
+_QUANT_SUFFIX_PATTERN = re.compile(r"-(FP8|AWQ|GPTQ-Int\d+|MLX-(?:\d+bit|bf16)|GGUF)$", re.IGNORECASE)
+
+DTYPE_BITS = {"float32": 32, "float16": 16, "bfloat16": 16, "int8": 8, "int4": 4}
+
+
+def parse_model_size(model_name: str) -> float | None:
+    """Return the parameter count in billions encoded in the model name, e.g. 8.0 for "Qwen3-8B"."""
+    match = _SIZE_PATTERN.search(model_name)
+    if not match:
+        return None
+    size = float(match.group(1))
+    return size / 1000 if match.group(2).upper() == "M" else size
+
+
+def parse_active_size(model_name: str) -> float | None:
+    """Return the activated parameter count in billions of a MoE model, e.g. 22.0 for "Qwen3-235B-A22B"."""
+    match = _ACTIVE_SIZE_PATTERN.search(model_name)
+    return float(match.group(1)) if match else None
+
+
+def base_model_name(model_name: str) -> str:
+    """Strip the quantization suffix, e.g. "Qwen3-8B-MLX-4bit" -> "Qwen3-8B"."""
+    return _QUANT_SUFFIX_PATTERN.sub("", model_name)
+
+
+def detect_quantization(model_name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Detect the weight quantization of a model from its config and name.
+
+    Returns:
+        {"quantization": label or "none", "weight_bits": bits per weight}
+    """
+    quant_config = config.get("quantization_config") or {}
+    method = quant_config.get("quant_method")
+    if method == "fp8":
+        return {"quantization": "fp8", "weight_bits": 8}
+    if method in ("awq", "gptq"):
+        bits = quant_config.get("bits", 4)
+        return {"quantization": f"{method}-int{bits}", "weight_bits": bits}
+    mlx = config.get("quantization") or {}
+    if "bits" in mlx:
+        return {"quantization": f"mlx-{mlx['bits']}bit", "weight_bits": mlx["bits"]}
+    if model_name.upper().endswith("-GGUF"):
+        return {"quantization": "gguf", "weight_bits": None}
+    dtype = config.get("torch_dtype", "float32")
+    label = "mlx-bf16" if model_name.lower().endswith("-mlx-bf16") else "none"
+    return {"quantization": label, "weight_bits": DTYPE_BITS.get(dtype, 16)}
+
+
+def describe_model(model_name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the facet metadata of a catalog model."""
+    num_experts = config.get("num_experts") or config.get("num_local_experts") or 0
+    return {
+        "name": model_name,
+        "base_model": base_model_name(model_name),
+        "family": config.get("model_type", "unknown"),
+        "params_b": parse_model_size(model_name),
+        "active_params_b": parse_active_size(model_name),
+        "is_moe": num_experts > 0,
+        "context_length": config.get("max_position_embeddings"),
+        "torch_dtype": config.get("torch_dtype"),
+        **detect_quantization(model_name, config),
+    }
+
+
+def linear_layer_shapes(config: Dict[str, Any]) -> Dict[str, Tuple[int, int, int]]:
+    """Return the linear layers of one decoder layer as {module: (in_features, out_features, count)}.
+
+    MoE layers have one gate/up/down projection per expert, plus the router.
+    """
+    hidden = config["hidden_size"]
+    heads = config["num_attention_heads"]
+    head_dim = config.get("head_dim") or hidden // heads
+    kv_heads = config.get("num_key_value_heads") or heads
+    shapes = {
+        "q_proj": (hidden, heads * head_dim, 1),
+        "k_proj": (hidden, kv_heads * head_dim, 1),
+        "v_proj": (hidden, kv_heads * head_dim, 1),
+        "o_proj": (heads * head_dim, hidden, 1),
+    }
+    experts = config.get("num_experts") or config.get("num_local_experts") or 0
+    if experts:
+        intermediate = config.get("moe_intermediate_size") or config["intermediate_size"]
+        shapes["router"] = (hidden, experts, 1)
+    else:
+        intermediate = config["intermediate_size"]
+    shapes["gate_proj"] = (hidden, intermediate, experts or 1)
+    shapes["up_proj"] = (hidden, intermediate, experts or 1)
+    shapes["down_proj"] = (intermediate, hidden, experts or 1)
+    return shapes
+
+
+def count_parameters(config: Dict[str, Any]) -> Dict[str, int]:
+    """Count the parameters of a decoder-only model from its layer shapes.
+
+    Returns:
+        {"embedding", "lm_head", "linear", "norm", "total"} parameter counts
+    """
+    layers = config["num_hidden_layers"]
+    hidden = config["hidden_size"]
+    linear = layers * sum(i * o * n for i, o, n in linear_layer_shapes(config).values())
+    embedding = config["vocab_size"] * hidden
+    lm_head = 0 if config.get("tie_word_embeddings") else embedding
+    # Two RMSNorm weights per layer plus the final norm
+    norm = (2 * layers + 1) * hidden
+    return {
+        "embedding": embedding,
+        "lm_head": lm_head,
+        "linear": linear,
+        "norm": norm,
+        "total": embedding + lm_head + linear + norm,
+    }
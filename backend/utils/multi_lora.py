@@ -0,0 +1,273 @@
+"""Multi-LoRA serving: adapter memory and an LRU simulation of the GPU adapter cache.
+
+Servers such as vLLM and S-LoRA keep ``max_loras`` adapter slots in GPU memory, each sized for the largest
+adapter, and load the adapter of a request from host memory on demand, evicting the least recently used one.
+The slots are carved out of the memory that would otherwise hold KV cache, so more resident adapters mean
+fewer cached tokens, while fewer slots mean more misses, each of which copies an adapter over the host link.
+"""
+
+import random
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Any, Dict, List
+
+from config.memory import DATA_TYPE_SIZES, DEFAULT_COEFFICIENTS
+from utils.memory import _get_activation_memory, _get_kv_cache, _get_memory, _get_model_weights
+from utils.peft import DEFAULT_LORA_RANK, count_lora_parameters, resolve_target_modules
+
+# Effective host to device copy bandwidth of PCIe 4.0 x16, in GB/s
+DEFAULT_HOST_TO_DEVICE_GBPS = 25
+DEFAULT_SIMULATED_REQUESTS = 10000
+MAX_SIMULATED_REQUESTS = 1000000
+# Adapters across all groups; each one is a popularity weight and an entry of the simulated cache
+MAX_ADAPTERS = 100000
+DEFAULT_ZIPF_EXPONENT = 1.0
+
+
+def expand_adapters(groups: List[Dict[str, Any]], config: Dict[str, Any], precision: str) -> List[Dict[str, Any]]:
+    """Expand adapter groups into one entry per adapter with its parameter count and size.
+
+    Args:
+        groups: [{"count": adapters in the group, "rank": LoRA rank, "target_modules": modules or "all-linear"}]
+        config: Model config with the layer shapes
+        precision: Precision of the adapter weights
+    """
+    if not groups:
+        raise ValueError("adapters must be a non-empty list of adapter groups")
+    adapters = []
+    total = 0
+    for index, group in enumerate(groups):
+        count = int(group.get("count", 1))
+        rank = int(group.get("rank", DEFAULT_LORA_RANK))
+        if count < 1 or rank < 1:
+            raise ValueError(f"Adapter group {index}: count and rank must be positive integers")
+        total += count
+        if total > MAX_ADAPTERS:
+            raise ValueError(f"At most {MAX_ADAPTERS} adapters are supported")
+        target_modules = resolve_target_modules(group.get("target_modules"))
+        parameters = count_lora_parameters(config, rank, target_modules)
+        adapter = {
+            "group": index,
+            "rank": rank,
+            "target_modules": target_modules,
+            "parameters": parameters,
+            "memory_gb": parameters * DATA_TYPE_SIZES[precision] / 1e9,
+        }
+        adapters.extend(dict(adapter) for _ in range(count))
+    return adapters
+
+
+def popularity_weights(popularity: Dict[str, Any] | str | None, num_adapters: int) -> List[float]:
+    """Return the normalized request share of each adapter.
+
+    Args:
+        popularity: "uniform" (default), "zipf", {"distribution": "zipf", "exponent": s} or {"weights": [...]},
+            with adapters in the order of their groups; for zipf the first adapter is the most popular
+        num_adapters: Number of adapters
+    """
+    if popularity is None or popularity == "uniform":
+        popularity = {"distribution": "uniform"}
+    elif popularity == "zipf":
+        popularity = {"distribution": "zipf"}
+    if not isinstance(popularity, dict):
+        raise ValueError('popularity must be "uniform", "zipf" or an object')
+    if "weights" in popularity:
+        weights = [float(w) for w in popularity["weights"]]
+        if len(weights) != num_adapters or any(w < 0 for w in weights) or not sum(weights):
+            raise ValueError(f"popularity weights must be {num_adapters} non-negative numbers with a positive sum")
+    elif popularity.get("distribution", "uniform") == "uniform":
+        weights = [1.0] * num_adapters
+    elif popularity["distribution"] == "zipf":
+        exponent = float(popularity.get("exponent", DEFAULT_ZIPF_EXPONENT))
+        if exponent < 0:
+            raise ValueError("zipf exponent must be non-negative")
+        weights = [1 / (rank**exponent) for rank in range(1, num_adapters + 1)]
+    else:
+        raise ValueError('popularity distribution must be "uniform" or "zipf"')
+    total = sum(weights)
+    return [w / total for w in weights]
+
+
+def simulate_adapter_cache(
+    sizes_gb: List[float],
+    weights: List[float],
+    slots: int,
+    num_requests: int = DEFAULT_SIMULATED_REQUESTS,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Replay requests drawn from ``weights`` against an LRU cache of ``slots`` adapters.
+
+    Args:
+        sizes_gb: Size of each adapter in GB
+        weights: Request share of each adapter
+        slots: Adapters resident in GPU memory at once
+        num_requests: Requests to simulate
+        seed: Seed of the request sampler, so that results are reproducible
+
+    Returns:
+        Hit, miss and eviction counts; compulsory misses are the first requests of each adapter, which no
+        cache size avoids
+    """
+    if slots < 1:
+        raise ValueError("max_loras must be at least 1")
+    if not 0 < num_requests <= MAX_SIMULATED_REQUESTS:
+        raise ValueError(f"num_requests must be between 1 and {MAX_SIMULATED_REQUESTS}")
+    requests = random.Random(seed).choices(range(len(weights)), cum_weights=list(accumulate(weights)), k=num_requests)
+    cache: OrderedDict = OrderedDict()
+    seen = set()
+    hits = evictions = 0
+    swapped_gb = 0.0
+    for adapter in requests:
+        if adapter in cache:
+            cache.move_to_end(adapter)
+            hits += 1
+            continue
+        seen.add(adapter)
+        swapped_gb += sizes_gb[adapter]
+        if len(cache) >= slots:
+            cache.popitem(last=False)
+            evictions += 1
+        cache[adapter] = True
+    misses = num_requests - hits
+    return {
+        "requests": num_requests,
+        "hits": hits,
+        "misses": misses,
+        "compulsory_misses": len(seen),
+        "evictions": evictions,
+        "hit_rate": round(hits / num_requests, 4),
+        "swapped_gb_per_request": swapped_gb / num_requests,
+    }
+
+
+def plan_multi_lora(
+    params: Dict[str, Any],
+    config: Dict[str, Any],
+    adapter_groups: List[Dict[str, Any]],
+    popularity: Dict[str, Any] | str | None = None,
+    max_loras: int | None = None,
+    adapter_precision: str | None = None,
+    requests_per_second: float | None = None,
+    host_to_device_gbps: float = DEFAULT_HOST_TO_DEVICE_GBPS,
+    memory_budget_gb: float | None = None,
+    num_requests: int = DEFAULT_SIMULATED_REQUESTS,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Size the memory of a multi-LoRA deployment and simulate its adapter cache.
+
+    Args:
+        params: Resolved inference parameters of the base model
+        config: Model config with the layer shapes
+        adapter_groups: Adapter groups, see ``expand_adapters``
+        popularity: Request to adapter distribution, see ``popularity_weights``
+        max_loras: Adapter slots in GPU memory (default: every adapter resident)
+        adapter_precision: Precision of the adapter weights (default: the model precision)
+        requests_per_second: Request rate, to turn the miss rate into swap bandwidth
+        host_to_device_gbps: Host to GPU copy bandwidth in GB/s
+        memory_budget_gb: GPU memory, to report the KV cache capacity with and without resident adapters
+        num_requests: Requests to simulate
+        seed: Seed of the request sampler
+    """
+    adapter_precision = adapter_precision or params["precision"]
+    if adapter_precision not in DATA_TYPE_SIZES:
+        raise ValueError(f"Invalid adapter_precision. Must be one of: {list(DATA_TYPE_SIZES)}")
+    adapters = expand_adapters(adapter_groups, config, adapter_precision)
+    weights = popularity_weights(popularity, len(adapters))
+    slots = min(len(adapters) if max_loras is None else int(max_loras), len(adapters))
+    # Slots are preallocated for the largest adapter, whatever is loaded in them
+    slot_gb = max(adapter["memory_gb"] for adapter in adapters)
+    resident_gb = slots * slot_gb
+
+    warnings_list: List[str] = []
+    overhead = DEFAULT_COEFFICIENTS["inference_overhead_gb"]
+    model_weights = _get_model_weights(params["model_size"], params["precision"])
+    kv_cache = _get_kv_cache(
+        params["kv_cache_precision"],
+        params["batch_size"],
+        params["sequence_length"],
+        params["num_hidden_layers"],
+        params["hidden_size"],
+        params["num_attention_heads"],
+        params["head_dim"],
+        params["num_key_value_heads"],
+        params["use_page_attention"],
+    )
+    activation = _get_activation_memory(
+        params["precision"],
+        params["batch_size"],
+        params["sequence_length"],
+        params["head_dim"],
+        params["use_flash_attention"],
+    )
+    memory = {
+        "model_weights_memory": _get_memory([model_weights], warnings_list)[0],
+        "adapter_memory": _get_memory([resident_gb], warnings_list)[0],
+        "kv_cache_memory": _get_memory([kv_cache], warnings_list)[0],
+        "activation_memory": _get_memory([activation], warnings_list)[0],
+        "overhead_memory": _get_memory([overhead], warnings_list)[0],
+        "inference_memory": _get_memory([model_weights, resident_gb, kv_cache, activation, overhead], warnings_list)[0],
+    }
+    if warnings_list:
+        memory["warnings"] = warnings_list
+
+    kv_gb_per_token = _get_kv_cache(
+        params["kv_cache_precision"],
+        1,
+        1,
+        params["num_hidden_layers"],
+        params["hidden_size"],
+        params["num_attention_heads"],
+        params["head_dim"],
+        params["num_key_value_heads"],
+    )
+    kv_capacity: Dict[str, Any] = {"tokens_lost_to_adapters": int(resident_gb / kv_gb_per_token)}
+    if memory_budget_gb is not None:
+        kv_budget_gb = memory_budget_gb - model_weights - activation - overhead
+        tokens = max(0, int(kv_budget_gb / kv_gb_per_token))
+        tokens_with_adapters = max(0, int((kv_budget_gb - resident_gb) / kv_gb_per_token))
+        kv_capacity.update(
+            memory_budget_gb=memory_budget_gb,
+            tokens_without_adapters=tokens,
+            tokens_with_adapters=tokens_with_adapters,
+            fraction_lost=round(1 - tokens_with_adapters / tokens, 4) if tokens else None,
+            fits=tokens_with_adapters >= params["batch_size"] * params["sequence_length"],
+        )
+
+    cache = simulate_adapter_cache([a["memory_gb"] for a in adapters], weights, slots, num_requests, seed)
+    swapped_gb_per_request = cache.pop("swapped_gb_per_request")
+    miss_rate = cache["misses"] / cache["requests"]
+    swap: Dict[str, Any] = {
+        "host_to_device_gbps": host_to_device_gbps,
+        "miss_rate": round(miss_rate, 4),
+        "gb_per_request": round(swapped_gb_per_request, 6),
+        # Load time of a missing adapter, added to the time to first token of its request
+        "load_latency_ms": round(slot_gb / host_to_device_gbps * 1000, 3),
+        "mean_added_latency_ms": round(swapped_gb_per_request / host_to_device_gbps * 1000, 3),
+    }
+    if requests_per_second is not None:
+        swap_gbps = swapped_gb_per_request * requests_per_second
+        swap.update(
+            requests_per_second=requests_per_second,
+            bandwidth_gbps=round(swap_gbps, 4),
+            link_utilization=round(swap_gbps / host_to_device_gbps, 4),
+        )
+
+    groups = {}
+    for adapter in adapters:
+        group = groups.setdefault(adapter["group"], {**adapter, "count": 0})
+        group["count"] += 1
+    return {
+        "memory_requirements": memory,
+        "adapters": {
+            "count": len(adapters),
+            "max_loras": slots,
+            "adapter_precision": adapter_precision,
+            "slot_memory_gb": round(slot_gb, 4),
+            "resident_memory_gb": round(resident_gb, 4),
+            "host_memory_gb": round(sum(a["memory_gb"] for a in adapters), 4),
+            "groups": [{**g, "memory_gb": round(g["memory_gb"], 4)} for g in groups.values()],
+        },
+        "kv_capacity": kv_capacity,
+        "cache": cache,
+        "swap": swap,
+    }
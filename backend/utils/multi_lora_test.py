@@ -0,0 +1,87 @@
+import json
+import os
+import unittest
+
+from utils.multi_lora import MAX_ADAPTERS, expand_adapters, plan_multi_lora, popularity_weights, simulate_adapter_cache
+from utils.peft import count_lora_parameters
+from utils.scenario import extract_model_params
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+with open(os.path.join(MODELS_DIR, "Qwen3-8B.json")) as f:
+    QWEN3_8B = json.load(f)
+PARAMS = {
+    **extract_model_params("Qwen3-8B", QWEN3_8B),
+    "batch_size": 8,
+    "sequence_length": 4096,
+    "kv_cache_precision": "bfloat16",
+}
+
+
+class TestMultiLora(unittest.TestCase):
+    """Test cases for multi-LoRA serving memory and the adapter cache simulation."""
+
+    def test_expand_adapters(self):
+        """Each adapter of a group gets the parameter count of its rank and target modules."""
+        adapters = expand_adapters(
+            [{"count": 3, "rank": 8}, {"rank": 64, "target_modules": "all-linear"}], QWEN3_8B, "bfloat16"
+        )
+        self.assertEqual(len(adapters), 4)
+        self.assertEqual(
+            adapters[0]["parameters"], count_lora_parameters(QWEN3_8B, 8, ["q_proj", "k_proj", "v_proj", "o_proj"])
+        )
+        self.assertAlmostEqual(adapters[3]["memory_gb"], adapters[3]["parameters"] * 2 / 1e9)
+        with self.assertRaises(ValueError):
+            expand_adapters([{"count": 0}], QWEN3_8B, "bfloat16")
+        # The bound holds across groups
+        with self.assertRaises(ValueError):
+            expand_adapters([{"count": 10**8}], QWEN3_8B, "bfloat16")
+        with self.assertRaises(ValueError):
+            expand_adapters([{"count": MAX_ADAPTERS}, {"count": 1}], QWEN3_8B, "bfloat16")
+
+    def test_popularity_weights(self):
+        """Uniform, zipf and explicit weights are normalized; mismatched weights are rejected."""
+        self.assertEqual(popularity_weights(None, 4), [0.25] * 4)
+        zipf = popularity_weights({"distribution": "zipf", "exponent": 1}, 3)
+        self.assertAlmostEqual(zipf[0] / zipf[2], 3)
+        self.assertEqual(popularity_weights({"weights": [1, 3]}, 2), [0.25, 0.75])
+        with self.assertRaises(ValueError):
+            popularity_weights({"weights": [1]}, 2)
+
+    def test_simulate_adapter_cache(self):
+        """A cache holding every adapter only misses on first use; a skewed load hits more than a uniform one."""
+        full = simulate_adapter_cache([0.1] * 10, popularity_weights(None, 10), slots=10, num_requests=5000)
+        self.assertEqual(full["misses"], full["compulsory_misses"])
+        self.assertEqual(full["evictions"], 0)
+        uniform = simulate_adapter_cache([0.1] * 100, popularity_weights(None, 100), slots=10)
+        skewed = simulate_adapter_cache([0.1] * 100, popularity_weights("zipf", 100), slots=10)
+        self.assertAlmostEqual(uniform["hit_rate"], 0.1, delta=0.02)
+        self.assertGreater(skewed["hit_rate"], uniform["hit_rate"])
+        # The seeded sampler makes runs reproducible
+        self.assertEqual(skewed, simulate_adapter_cache([0.1] * 100, popularity_weights("zipf", 100), slots=10))
+
+    def test_plan_multi_lora(self):
+        """Resident adapters add to the inference memory and take their size out of the KV cache capacity."""
+        result = plan_multi_lora(
+            PARAMS,
+            QWEN3_8B,
+            [{"count": 100, "rank": 16}],
+            popularity="zipf",
+            max_loras=8,
+            requests_per_second=10,
+            memory_budget_gb=80,
+        )
+        adapters = result["adapters"]
+        self.assertEqual(adapters["max_loras"], 8)
+        self.assertAlmostEqual(adapters["resident_memory_gb"], 8 * adapters["slot_memory_gb"], places=3)
+        capacity = result["kv_capacity"]
+        lost = capacity["tokens_without_adapters"] - capacity["tokens_with_adapters"]
+        self.assertAlmostEqual(lost, capacity["tokens_lost_to_adapters"], delta=1)
+        swap = result["swap"]
+        self.assertAlmostEqual(swap["bandwidth_gbps"], swap["gb_per_request"] * 10, places=3)
+        with self.assertRaises(ValueError):
+            plan_multi_lora(PARAMS, QWEN3_8B, [{"count": 2}], max_loras=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""GPU/CPU layer split for llama.cpp (GGUF) and MLX deployments.
+
+llama.cpp places the first ``n_gpu_layers`` transformer layers, with their KV cache, in GPU memory and runs the
+rest on the CPU from system RAM; the output layer joins the GPU once every transformer layer is there. Decode
+is memory bound, so a token costs the bytes each device reads divided by its bandwidth, and the planner picks
+the split with the highest tokens/s among those that fit both pools.
+
+Apple Silicon has one unified pool: the GPU may only wire part of it (about 2/3 up to 36 GB and 3/4 above,
+macOS's default working set limit, raised with ``iogpu.wired_limit_mb``), and layers beyond it run on the CPU
+cores, which reach about half of the memory bandwidth. MLX has no CPU fallback, so an MLX model either fits the
+GPU limit entirely or does not run.
+"""
+
+import math
+from typing import Any, Dict, List
+
+from config.memory import DEFAULT_COEFFICIENTS, GGUF_QUANT_BITS
+from utils.capacity import BANDWIDTH_EFFICIENCY, GPU_MEMORY_UTILIZATION
+from utils.memory import _get_kv_cache
+from utils.model_info import count_parameters, detect_quantization
+
+RUNTIMES = ("llama.cpp", "mlx")
+DEFAULT_GGUF_QUANT = "Q4_K_M"
+# Dual-channel DDR5-4800
+DEFAULT_RAM_BANDWIDTH_GBPS = 76.8
+# Fraction of the unified memory bandwidth the CPU cores reach
+UNIFIED_CPU_BANDWIDTH_FRACTION = 0.5
+
+
+def default_runtime(model_name: str) -> str:
+    """Runtime a catalog variant is published for: MLX checkpoints run on MLX, everything else on llama.cpp."""
+    return "mlx" if "-MLX-" in model_name.upper() else "llama.cpp"
+
+
+def unified_gpu_limit_gb(memory_gb: float) -> float:
+    """Default GPU working set limit of macOS for a unified memory size."""
+    return memory_gb * (2 / 3 if memory_gb <= 36 else 3 / 4)
+
+
+def weight_bits(model_name: str, config: Dict[str, Any], gguf_quant: str | None = None) -> float:
+    """Effective bits per weight of a GGUF or MLX checkpoint, including quantization scales.
+
+    MLX stores an fp16 scale and bias per ``group_size`` weights; GGUF defaults to Q4_K_M.
+    """
+    if gguf_quant is not None or model_name.upper().endswith("-GGUF"):
+        quant = (gguf_quant or DEFAULT_GGUF_QUANT).upper()
+        if quant not in GGUF_QUANT_BITS:
+            raise ValueError(f"Invalid gguf_quant. Must be one of: {list(GGUF_QUANT_BITS)}")
+        return GGUF_QUANT_BITS[quant]
+    mlx = config.get("quantization") or {}
+    if "bits" in mlx:
+        return mlx["bits"] + 32 / mlx.get("group_size", 64)
+    return detect_quantization(model_name, config)["weight_bits"] or 16
+
+
+def layer_profile(config: Dict[str, Any], bits: float) -> Dict[str, float]:
+    """Bytes stored and read per token for one transformer layer and for the embedding / output layers."""
+    counts = count_parameters(config)
+    layers = config["num_hidden_layers"]
+    per_layer = (counts["linear"] + counts["norm"]) / layers
+    active_per_layer = per_layer
+    experts = config.get("num_experts") or config.get("num_local_experts") or 0
+    if experts:
+        expert = 3 * config["hidden_size"] * (config.get("moe_intermediate_size") or config["intermediate_size"])
+        active_per_layer -= expert * (experts - config.get("num_experts_per_tok", experts))
+    output = config["vocab_size"] * config["hidden_size"]
+    return {
+        "layer_gb": per_layer * bits / 8 / 1e9,
+        "layer_read_gb": active_per_layer * bits / 8 / 1e9,
+        # The token embedding is only indexed; it stays in (mmapped) system memory
+        "embedding_gb": counts["embedding"] * bits / 8 / 1e9,
+        "output_gb": output * bits / 8 / 1e9,
+    }
+
+
+def plan_layer_split(
+    params: Dict[str, Any],
+    config: Dict[str, Any],
+    bits: float,
+    gpu_memory_gb: float,
+    gpu_bandwidth_gbps: float,
+    ram_gb: float | None = None,
+    ram_bandwidth_gbps: float = DEFAULT_RAM_BANDWIDTH_GBPS,
+    unified: bool = False,
+    gpu_memory_limit_gb: float | None = None,
+    runtime: str = "llama.cpp",
+) -> Dict[str, Any]:
+    """Find the number of GPU layers that maximizes decode tokens/s while fitting in memory.
+
+    Args:
+        params: Resolved inference parameters (architecture, batch_size, sequence_length, kv_cache_precision)
+        config: Model config with the layer shapes
+        bits: Effective bits per weight, see ``weight_bits``
+        gpu_memory_gb: GPU memory, or the unified memory size
+        gpu_bandwidth_gbps: GPU memory bandwidth, or the unified memory bandwidth
+        ram_gb: System RAM of a discrete GPU host
+        ram_bandwidth_gbps: System RAM bandwidth of a discrete GPU host
+        unified: Whether GPU and CPU share one memory pool (Apple Silicon)
+        gpu_memory_limit_gb: GPU working set limit on unified memory (default: the macOS default)
+        runtime: "llama.cpp" (any split) or "mlx" (all layers on the GPU)
+
+    Returns:
+        The best split ("n_gpu_layers", memory per pool, tokens/s) and every evaluated split
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Invalid runtime. Must be one of: {list(RUNTIMES)}")
+    if not unified and ram_gb is None:
+        raise ValueError("ram_gb is required unless memory is unified")
+    for name, value in (
+        ("gpu_memory_gb", gpu_memory_gb),
+        ("gpu_bandwidth_gbps", gpu_bandwidth_gbps),
+        ("ram_bandwidth_gbps", ram_bandwidth_gbps),
+        ("batch_size", params["batch_size"]),
+        ("sequence_length", params["sequence_length"]),
+    ):
+        if value <= 0:
+            raise ValueError(f"{name} must be positive")
+    if ram_gb is not None and ram_gb < 0:
+        raise ValueError("ram_gb must not be negative")
+    if gpu_memory_limit_gb is not None and gpu_memory_limit_gb <= 0:
+        raise ValueError("gpu_memory_limit_gb must be positive")
+    layers = params["num_hidden_layers"]
+    profile = layer_profile(config, bits)
+    kv_layer_gb = _get_kv_cache(
+        params["kv_cache_precision"],
+        params["batch_size"],
+        params["sequence_length"],
+        1,
+        params["hidden_size"],
+        params["num_attention_heads"],
+        params["head_dim"],
+        params["num_key_value_heads"],
+    )
+    overhead = DEFAULT_COEFFICIENTS["inference_overhead_gb"]
+    if unified:
+        gpu_budget = gpu_memory_limit_gb or unified_gpu_limit_gb(gpu_memory_gb)
+        total_budget = gpu_memory_gb * GPU_MEMORY_UTILIZATION
+        cpu_bandwidth = gpu_bandwidth_gbps * UNIFIED_CPU_BANDWIDTH_FRACTION
+    else:
+        gpu_budget = gpu_memory_gb * GPU_MEMORY_UTILIZATION
+        cpu_budget = ram_gb * GPU_MEMORY_UTILIZATION
+        cpu_bandwidth = ram_bandwidth_gbps
+    # KV cache read per decode step: on average half of the context is filled
+    kv_layer_read = kv_layer_gb / 2
+
+    splits: List[Dict[str, Any]] = []
+    candidates = [layers] if runtime == "mlx" else range(layers + 1)
+    for n_gpu in candidates:
+        on_gpu_output = n_gpu == layers
+        gpu_gb = n_gpu * (profile["layer_gb"] + kv_layer_gb) + (profile["output_gb"] if on_gpu_output else 0)
+        gpu_gb += overhead if n_gpu else 0
+        cpu_gb = (layers - n_gpu) * (profile["layer_gb"] + kv_layer_gb) + profile["embedding_gb"]
+        cpu_gb += 0 if on_gpu_output else profile["output_gb"]
+        fits = gpu_gb <= gpu_budget and (gpu_gb + cpu_gb <= total_budget if unified else cpu_gb <= cpu_budget)
+        gpu_read = n_gpu * (profile["layer_read_gb"] + kv_layer_read) + (profile["output_gb"] if on_gpu_output else 0)
+        cpu_read = (layers - n_gpu) * (profile["layer_read_gb"] + kv_layer_read)
+        cpu_read += 0 if on_gpu_output else profile["output_gb"]
+        seconds = gpu_read / (gpu_bandwidth_gbps * BANDWIDTH_EFFICIENCY) + cpu_read / (
+            cpu_bandwidth * BANDWIDTH_EFFICIENCY
+        )
+        splits.append(
+            {
+                "n_gpu_layers": n_gpu,
+                "gpu_memory_gb": round(gpu_gb, 3),
+                "cpu_memory_gb": round(cpu_gb, 3),
+                "fits": fits,
+                "tokens_per_second": round(params["batch_size"] / seconds, 2),
+            }
+        )
+    fitting = [split for split in splits if split["fits"]]
+    best = max(fitting, key=lambda split: (split["tokens_per_second"], split["n_gpu_layers"]), default=None)
+    return {
+        "runtime": runtime,
+        "unified_memory": unified,
+        "bits_per_weight": round(bits, 4),
+        "num_layers": layers,
+        "layer_memory_gb": round(profile["layer_gb"], 4),
+        "kv_cache_per_layer_gb": round(kv_layer_gb, 4),
+        "gpu_budget_gb": round(gpu_budget, 2),
+        "cpu_budget_gb": round(total_budget if unified else cpu_budget, 2),
+        "best": best,
+        # Every layer on the GPU, the llama.cpp "-ngl 99" case
+        "fully_offloaded": next((s for s in splits if s["n_gpu_layers"] == layers), None),
+        "splits": splits,
+        "reason": None if best else _infeasible_reason(splits, layers),
+    }
+
+
+def _infeasible_reason(splits: List[Dict[str, Any]], layers: int) -> str:
+    smallest = min(splits, key=lambda s: s["gpu_memory_gb"] + s["cpu_memory_gb"])
+    needed = math.ceil(smallest["gpu_memory_gb"] + smallest["cpu_memory_gb"])
+    if len(splits) == 1 and splits[0]["n_gpu_layers"] == layers:
+        return f"MLX needs the whole model ({needed} GB) within the GPU working set limit"
+    return f"The model and KV cache need about {needed} GB, more than the available memory"
@@ -0,0 +1,111 @@
+import json
+import os
+import unittest
+
+from config.memory import GGUF_QUANT_BITS
+from utils.model_info import count_parameters
+from utils.offload import layer_profile, plan_layer_split, unified_gpu_limit_gb, weight_bits
+from utils.scenario import extract_model_params
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+def load_config(model_name):
+    with open(os.path.join(MODELS_DIR, f"{model_name}.json")) as f:
+        return json.load(f)
+
+
+QWEN3_32B = load_config("Qwen3-32B")
+QWEN3_30B_A3B = load_config("Qwen3-30B-A3B")
+
+
+def inference_params(model_name, config, sequence_length=8192):
+    return {
+        **extract_model_params(model_name, config),
+        "batch_size": 1,
+        "sequence_length": sequence_length,
+        "kv_cache_precision": "float16",
+    }
+
+
+class TestOffload(unittest.TestCase):
+    """Test cases for the GPU/CPU layer split planner."""
+
+    def test_weight_bits(self):
+        """GGUF types map to their effective bits, MLX adds one fp16 scale and bias per group."""
+        self.assertEqual(weight_bits("Qwen3-32B-GGUF", QWEN3_32B), GGUF_QUANT_BITS["Q4_K_M"])
+        self.assertEqual(weight_bits("Qwen3-32B-GGUF", QWEN3_32B, "q8_0"), 8.5)
+        self.assertEqual(weight_bits("Qwen3-32B-MLX-4bit", {"quantization": {"bits": 4, "group_size": 64}}), 4.5)
+        self.assertEqual(weight_bits("Qwen3-32B", QWEN3_32B), 16)
+        with self.assertRaises(ValueError):
+            weight_bits("Qwen3-32B-GGUF", QWEN3_32B, "Q1")
+
+    def test_moe_layer_reads_only_active_experts(self):
+        """A MoE layer stores every expert but a token reads only num_experts_per_tok of them."""
+        profile = layer_profile(QWEN3_30B_A3B, 16)
+        counts = count_parameters(QWEN3_30B_A3B)
+        layers = QWEN3_30B_A3B["num_hidden_layers"]
+        self.assertAlmostEqual(profile["layer_gb"], (counts["linear"] + counts["norm"]) / layers * 2 / 1e9)
+        self.assertLess(profile["layer_read_gb"], profile["layer_gb"] / 5)
+        dense = layer_profile(QWEN3_32B, 16)
+        self.assertEqual(dense["layer_read_gb"], dense["layer_gb"])
+
+    def test_discrete_split(self):
+        """A model larger than the GPU keeps as many layers on it as fit; more GPU layers are faster."""
+        params = inference_params("Qwen3-32B", QWEN3_32B)
+        plan = plan_layer_split(params, QWEN3_32B, 4.89, gpu_memory_gb=24, gpu_bandwidth_gbps=1008, ram_gb=64)
+        self.assertEqual(len(plan["splits"]), params["num_hidden_layers"] + 1)
+        self.assertFalse(plan["fully_offloaded"]["fits"])
+        best = plan["best"]
+        self.assertTrue(0 < best["n_gpu_layers"] < params["num_hidden_layers"])
+        self.assertLessEqual(best["gpu_memory_gb"], plan["gpu_budget_gb"])
+        self.assertFalse(plan["splits"][best["n_gpu_layers"] + 1]["fits"])
+        speeds = [split["tokens_per_second"] for split in plan["splits"]]
+        self.assertEqual(speeds, sorted(speeds))
+        # Without any layer on the GPU nothing but the model lives in RAM
+        self.assertEqual(plan["splits"][0]["gpu_memory_gb"], 0)
+
+    def test_fits_on_gpu(self):
+        """A model that fits is offloaded completely, output layer included."""
+        params = inference_params("Qwen3-32B", QWEN3_32B)
+        plan = plan_layer_split(params, QWEN3_32B, 4.89, gpu_memory_gb=80, gpu_bandwidth_gbps=2039, ram_gb=64)
+        self.assertEqual(plan["best"], plan["fully_offloaded"])
+        self.assertGreater(plan["best"]["gpu_memory_gb"], plan["splits"][-2]["gpu_memory_gb"] + plan["layer_memory_gb"])
+
+    def test_unified_memory(self):
+        """Apple Silicon splits at the GPU working set limit; MLX runs entirely on the GPU or not at all."""
+        self.assertAlmostEqual(unified_gpu_limit_gb(32), 32 * 2 / 3)
+        self.assertEqual(unified_gpu_limit_gb(64), 48)
+        params = inference_params("Qwen3-32B", QWEN3_32B)
+        args = (params, QWEN3_32B, 4.89)
+        plan = plan_layer_split(*args, gpu_memory_gb=32, gpu_bandwidth_gbps=400, unified=True)
+        self.assertTrue(0 < plan["best"]["n_gpu_layers"] < params["num_hidden_layers"])
+        mlx = plan_layer_split(*args, gpu_memory_gb=32, gpu_bandwidth_gbps=400, unified=True, runtime="mlx")
+        self.assertEqual(len(mlx["splits"]), 1)
+        self.assertIsNone(mlx["best"])
+        self.assertIn("MLX", mlx["reason"])
+        raised = plan_layer_split(
+            *args, gpu_memory_gb=32, gpu_bandwidth_gbps=400, unified=True, gpu_memory_limit_gb=28, runtime="mlx"
+        )
+        self.assertEqual(raised["best"]["n_gpu_layers"], params["num_hidden_layers"])
+
+    def test_requires_ram_for_discrete_gpu(self):
+        """A discrete GPU host needs its RAM size; unknown runtimes are rejected."""
+        params = inference_params("Qwen3-32B", QWEN3_32B)
+        with self.assertRaises(ValueError):
+            plan_layer_split(params, QWEN3_32B, 4.89, gpu_memory_gb=24, gpu_bandwidth_gbps=1008)
+        with self.assertRaises(ValueError):
+            plan_layer_split(params, QWEN3_32B, 4.89, 24, 1008, ram_gb=64, runtime="vllm")
+
+    def test_rejects_non_positive_hardware(self):
+        """Zero or negative memory, bandwidth and batch size are rejected instead of planning 0 tokens/s."""
+        params = inference_params("Qwen3-32B", QWEN3_32B)
+        for gpu_memory_gb, gpu_bandwidth_gbps in ((0, 1008), (24, 0), (-24, 1008)):
+            with self.assertRaises(ValueError):
+                plan_layer_split(params, QWEN3_32B, 4.89, gpu_memory_gb, gpu_bandwidth_gbps, ram_gb=64)
+        with self.assertRaises(ValueError):
+            plan_layer_split({**params, "batch_size": 0}, QWEN3_32B, 4.89, 24, 1008, ram_gb=64)
+
+
+if __name__ == "__main__":
+    unittest.main()
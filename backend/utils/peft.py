@@ -0,0 +1,169 @@
+"""LoRA / QLoRA training memory from the model's layer shapes.
+
+A LoRA adapter of rank ``r`` on a linear layer of shape (in, out) adds ``r * (in + out)`` trainable
+parameters; only those carry gradients and optimizer state, while the base model is frozen. QLoRA stores the
+frozen linear layers in 4-bit NF4 with one absmax constant per 64 weights (float32, or 8-bit plus a shared
+float32 constant per 256 blocks with double quantization), keeps embeddings, LM head and norms in the compute
+precision, and may keep the optimizer state in paged memory that is evicted to host RAM under pressure.
+"""
+
+from typing import Any, Dict, List
+
+from config.memory import (
+    DATA_TYPE_SIZES,
+    DATA_TYPES,
+    DEFAULT_COEFFICIENTS,
+    DEFAULT_LORA_TARGET_MODULES,
+    LORA_TARGET_MODULES,
+    OPTIMIZERS_SIZE,
+    QLORA_BLOCK_SIZE,
+    QLORA_DOUBLE_QUANT_BLOCK_SIZE,
+)
+from utils.memory import _get_activation_memory, _get_memory
+from utils.model_info import count_parameters, linear_layer_shapes
+
+PEFT_METHODS = ("LoRA", "QLoRA")
+# Config fields the engine needs on top of the memory calculator parameters
+SHAPE_PARAMETERS = [
+    "intermediate_size",
+    "vocab_size",
+    "tie_word_embeddings",
+    "num_experts",
+    "num_local_experts",
+    "moe_intermediate_size",
+]
+# Training parameters that change the adapter, validated per combination of a grid
+ADAPTER_PARAMETERS = ["method", "lora_rank", "lora_alpha", "target_modules", "adapter_precision"]
+DEFAULT_LORA_RANK = 16
+DEFAULT_LORA_ALPHA = 32
+
+
+def resolve_target_modules(target_modules: List[str] | str | None) -> List[str]:
+    """Validate LoRA target modules; "all-linear" selects every projection of the decoder layer."""
+    if target_modules is None:
+        return list(DEFAULT_LORA_TARGET_MODULES)
+    if target_modules == "all-linear":
+        return list(LORA_TARGET_MODULES)
+    if isinstance(target_modules, str):
+        target_modules = [module.strip() for module in target_modules.split(",") if module.strip()]
+    invalid = [module for module in target_modules if module not in LORA_TARGET_MODULES]
+    if invalid or not target_modules:
+        raise ValueError(f'Invalid target_modules {invalid}. Must be "all-linear" or from: {LORA_TARGET_MODULES}')
+    return list(dict.fromkeys(target_modules))
+
+
+def count_lora_parameters(config: Dict[str, Any], rank: int, target_modules: List[str]) -> int:
+    """Count the adapter parameters of rank ``rank`` on ``target_modules`` across all layers."""
+    shapes = linear_layer_shapes(config)
+    per_layer = sum(rank * (shapes[m][0] + shapes[m][1]) * shapes[m][2] for m in target_modules)
+    return config["num_hidden_layers"] * per_layer
+
+
+def nf4_bytes(num_parameters: int, double_quantization: bool = True) -> float:
+    """Bytes of ``num_parameters`` weights in NF4, including the quantization constants."""
+    blocks = num_parameters / QLORA_BLOCK_SIZE
+    if double_quantization:
+        constants = blocks * 1 + blocks / QLORA_DOUBLE_QUANT_BLOCK_SIZE * 4
+    else:
+        constants = blocks * 4
+    return num_parameters * 0.5 + constants
+
+
+def resolve_peft_params(params: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in the PEFT defaults and layer shapes of a LoRA/QLoRA scenario, in place.
+
+    ``trainable_parameters`` is replaced by the adapter share of the model, so that anything built on the
+    percentage (e.g. the training time estimate) sees the real LoRA size.
+    """
+    method = params["method"]
+    if method not in PEFT_METHODS:
+        raise ValueError(f"Invalid method. Must be one of: {list(PEFT_METHODS)}")
+    for key in SHAPE_PARAMETERS:
+        if key in config and key not in params:
+            params[key] = config[key]
+    for key in ("intermediate_size", "vocab_size"):
+        if key not in params:
+            raise ValueError(f"{key} is required for {method}")
+    params["lora_rank"] = int(params.get("lora_rank", DEFAULT_LORA_RANK))
+    params["lora_alpha"] = float(params.get("lora_alpha", DEFAULT_LORA_ALPHA))
+    if params["lora_rank"] < 1:
+        raise ValueError("lora_rank must be a positive integer")
+    params["target_modules"] = resolve_target_modules(params.get("target_modules"))
+    params.setdefault("adapter_precision", "float32")
+    if params["adapter_precision"] not in DATA_TYPES:
+        raise ValueError(f"Invalid adapter_precision. Must be one of: {DATA_TYPES}")
+    if method == "QLoRA":
+        params.setdefault("double_quantization", True)
+        params.setdefault("paged_optimizer", True)
+    else:
+        params.setdefault("paged_optimizer", False)
+    trainable = count_lora_parameters(params, params["lora_rank"], params["target_modules"])
+    params["trainable_parameters"] = 100 * trainable / count_parameters(params)["total"]
+    return params
+
+
+def calculate_peft_memory(params: Dict[str, Any], coefficients: Dict[str, float] | None = None) -> Dict[str, Any]:
+    """Calculate the training memory of a LoRA / QLoRA fine-tune.
+
+    Args:
+        params: Training parameters completed by ``resolve_peft_params``
+        coefficients: Calibrated coefficients overriding DEFAULT_COEFFICIENTS
+
+    Returns:
+        The memory breakdown of ``calculate_training_memory`` plus adapter memory, and a "peft" section with
+        parameter counts. With a paged optimizer, "paged_training_memory" is the requirement once the
+        optimizer state has been evicted to host memory.
+    """
+    coefficients = {**DEFAULT_COEFFICIENTS, **(coefficients or {})}
+    overhead = coefficients["training_overhead_gb"]
+    warnings_list: List[str] = []
+    counts = count_parameters(params)
+    trainable = count_lora_parameters(params, params["lora_rank"], params["target_modules"])
+    compute_bytes = DATA_TYPE_SIZES[params["precision"]]
+    adapter_bytes = DATA_TYPE_SIZES[params["adapter_precision"]]
+
+    if params["method"] == "QLoRA":
+        # Decoder linear layers in NF4; embeddings, LM head and norms stay in the compute precision
+        unquantized = counts["embedding"] + counts["lm_head"] + counts["norm"]
+        weights = (nf4_bytes(counts["linear"], params["double_quantization"]) + unquantized * compute_bytes) / 1e9
+    else:
+        weights = counts["total"] * compute_bytes / 1e9
+    adapter = trainable * adapter_bytes / 1e9
+    gradients = trainable * adapter_bytes / 1e9
+    optimizer = trainable * OPTIMIZERS_SIZE[params["optimizer"]] / 1e9
+    activation = _get_activation_memory(
+        params["precision"],
+        params["batch_size"],
+        params["sequence_length"],
+        params["head_dim"],
+        params.get("use_flash_attention", False),
+        coefficients["flash_attention_factor"],
+    )
+    resident = [weights, adapter, activation, gradients, overhead]
+    result = {
+        "model_weights_memory": _get_memory([weights], warnings_list)[0],
+        "adapter_memory": _get_memory([adapter], warnings_list)[0],
+        "activation_memory": _get_memory([activation], warnings_list)[0],
+        "optimizer_memory": _get_memory([optimizer], warnings_list)[0],
+        "gradients_memory": _get_memory([gradients], warnings_list)[0],
+        "overhead_memory": _get_memory([overhead], warnings_list)[0],
+        "training_memory": _get_memory(resident + [optimizer], warnings_list)[0],
+    }
+    if params.get("paged_optimizer"):
+        result["paged_training_memory"] = _get_memory(resident, warnings_list)[0]
+    result["peft"] = {
+        "method": params["method"],
+        "lora_rank": params["lora_rank"],
+        "lora_alpha": params["lora_alpha"],
+        "scaling": params["lora_alpha"] / params["lora_rank"],
+        "target_modules": params["target_modules"],
+        "trainable_parameters": trainable,
+        "total_parameters": counts["total"],
+        "trainable_percentage": round(100 * trainable / counts["total"], 4),
+        "base_bits_per_parameter": round(weights * 1e9 * 8 / counts["total"], 3),
+        "double_quantization": params.get("double_quantization", False),
+        "paged_optimizer": params["paged_optimizer"],
+    }
+    if warnings_list:
+        result["warnings"] = warnings_list
+    return result
@@ -0,0 +1,96 @@
+import json
+import os
+import unittest
+
+from utils.model_info import count_parameters
+from utils.peft import calculate_peft_memory, count_lora_parameters, nf4_bytes, resolve_peft_params
+from utils.scenario import extract_model_params, resolve_scenario, run_training_calculation
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+def _config(name):
+    with open(os.path.join(MODELS_DIR, f"{name}.json")) as f:
+        return json.load(f)
+
+
+TRAINING = {"batch_size": 1, "sequence_length": 2048, "optimizer": "AdamW", "precision": "bfloat16"}
+
+
+class TestPeft(unittest.TestCase):
+    """Test cases for the LoRA / QLoRA memory engine."""
+
+    def test_count_parameters(self):
+        """Parameter counts from the layer shapes match the published model sizes."""
+        self.assertAlmostEqual(count_parameters(_config("Qwen3-8B"))["total"] / 1e9, 8.19, places=2)
+        self.assertAlmostEqual(count_parameters(_config("Qwen3-0.6B"))["total"] / 1e9, 0.596, places=3)
+        moe = count_parameters(_config("Qwen3-30B-A3B"))
+        self.assertAlmostEqual(moe["total"] / 1e9, 30.53, places=2)
+        # Tied embeddings have no separate LM head
+        self.assertEqual(count_parameters(_config("Qwen3-0.6B"))["lm_head"], 0)
+
+    def test_count_lora_parameters(self):
+        """A rank r adapter on a (in, out) projection adds r * (in + out) parameters per layer."""
+        config = _config("Qwen3-8B")
+        attention = (4096 + 4096) + 2 * (4096 + 1024) + (4096 + 4096)
+        self.assertEqual(
+            count_lora_parameters(config, 16, ["q_proj", "k_proj", "v_proj", "o_proj"]), 36 * 16 * attention
+        )
+        mlp = 3 * (4096 + 12288)
+        self.assertEqual(count_lora_parameters(config, 8, ["gate_proj", "up_proj", "down_proj"]), 36 * 8 * mlp)
+
+    def test_nf4_bytes(self):
+        """NF4 costs ~4.127 bits per weight with double quantization and 4.5 without."""
+        self.assertAlmostEqual(nf4_bytes(64 * 256 * 1000, True) * 8 / (64 * 256 * 1000), 4.127, places=3)
+        self.assertAlmostEqual(nf4_bytes(64 * 1000, False) * 8 / (64 * 1000), 4.5)
+
+    def test_resolve_peft_params(self):
+        """Defaults are filled in and trainable_parameters becomes the adapter share of the model."""
+        params = {**extract_model_params("Qwen3-8B", _config("Qwen3-8B")), **TRAINING, "method": "QLoRA"}
+        resolve_peft_params(params, _config("Qwen3-8B"))
+        self.assertEqual(params["lora_rank"], 16)
+        self.assertEqual(params["target_modules"], ["q_proj", "k_proj", "v_proj", "o_proj"])
+        self.assertTrue(params["double_quantization"])
+        self.assertTrue(params["paged_optimizer"])
+        self.assertAlmostEqual(params["trainable_parameters"], 0.1872, places=4)
+        with self.assertRaises(ValueError):
+            resolve_peft_params({**params, "target_modules": ["lm_head"]}, {})
+        with self.assertRaises(ValueError):
+            resolve_peft_params({**params, "lora_rank": 0}, {})
+
+    def test_qlora_memory(self):
+        """QLoRA quantizes the decoder linear layers and reports the paged requirement."""
+        params = {**extract_model_params("Qwen3-8B", _config("Qwen3-8B")), **TRAINING}
+        lora = calculate_peft_memory(resolve_peft_params({**params, "method": "LoRA"}, _config("Qwen3-8B")))
+        qlora = calculate_peft_memory(resolve_peft_params({**params, "method": "QLoRA"}, _config("Qwen3-8B")))
+        self.assertEqual(lora["model_weights_memory"], "16.38 GB")
+        self.assertNotIn("paged_training_memory", lora)
+        self.assertLess(float(qlora["model_weights_memory"].split()[0]), 6.5)
+        self.assertLess(float(qlora["paged_training_memory"].split()[0]), float(qlora["training_memory"].split()[0]))
+        self.assertEqual(qlora["peft"]["trainable_parameters"], lora["peft"]["trainable_parameters"])
+
+    def test_scenario_dispatch(self):
+        """Scenarios with a PEFT method do not need trainable_parameters; SFT ones are unchanged."""
+        models = {"Qwen3-8B": _config("Qwen3-8B")}
+        params = resolve_scenario("training", {"model_name": "Qwen3-8B", **TRAINING, "method": "LoRA"}, models)
+        self.assertIn("peft", run_training_calculation(params))
+        with self.assertRaises(ValueError):
+            resolve_scenario("training", {"model_name": "Qwen3-8B", **TRAINING}, models)
+        sft = resolve_scenario("training", {"model_name": "Qwen3-8B", **TRAINING, "trainable_parameters": 100}, models)
+        self.assertNotIn("peft", run_training_calculation(sft))
+
+    def test_peft_row_from_sft_base(self):
+        """A LoRA row derived from SFT parameters takes its layer shapes from the config."""
+        models = {"Qwen3-8B": _config("Qwen3-8B")}
+        sft = resolve_scenario("training", {"model_name": "Qwen3-8B", **TRAINING, "trainable_parameters": 100}, models)
+        lora = {**sft, "method": "LoRA"}
+        with self.assertRaises(ValueError):
+            run_training_calculation(lora)
+        memory = run_training_calculation(lora, config=models["Qwen3-8B"])
+        resolved = resolve_scenario("training", {"model_name": "Qwen3-8B", **TRAINING, "method": "LoRA"}, models)
+        self.assertEqual(memory, run_training_calculation(resolved))
+        self.assertEqual(sft["trainable_parameters"], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+"""Pipeline parallel training schedules: per-stage activation memory, bubbles and step time.
+
+The layers are split evenly into ``num_stages * virtual_stages`` chunks; chunk ``c`` runs on stage
+``c % num_stages``. Each micro-batch runs a forward op per chunk in order and a backward op per chunk in
+reverse order, and every stage executes its ops in the order of the schedule:
+
+- GPipe: all forwards, then all backwards, so every micro-batch's activations are alive at once;
+- 1F1B (PipeDream-Flush): ``num_stages - stage - 1`` warmup forwards, then one forward per backward, which
+  caps the micro-batches in flight at the stage's depth in the pipeline;
+- interleaved 1F1B (Megatron-LM): each stage holds ``virtual_stages`` chunks, which divides the bubble by
+  ``virtual_stages`` at the cost of more in-flight activations and point-to-point transfers.
+
+An op starts when its stage is free and its input (the previous chunk's forward, or the next chunk's
+backward) has arrived. Op costs come from the model config: forward FLOPs per token are ``2 *`` the (active)
+parameters of the chunk's layers plus their attention products, the last chunk also runs the output layer,
+and a backward costs ``1 + trainable share`` forwards (one more with activation checkpointing). Small
+micro-batches run kernels less efficiently, as ``tokens / (tokens + KERNEL_SATURATION_TOKENS)`` of the MFU,
+which is what makes the micro-batch count a trade-off against the bubble.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from config.memory import DATA_TYPE_SIZES, DEFAULT_COEFFICIENTS, OPTIMIZERS_SIZE
+from utils.memory_timeline import LOGITS_BYTES, layer_activation_bytes
+from utils.model_info import count_parameters
+
+SCHEDULES = ("gpipe", "1f1b", "interleaved")
+DEFAULT_VIRTUAL_STAGES = 2
+# Tokens per micro-batch at which matrix multiplications reach half of their steady-state efficiency
+KERNEL_SATURATION_TOKENS = 512
+# Point-to-point latency added to every activation transfer between stages
+P2P_LATENCY_SECONDS = 20e-6
+MAX_MICRO_BATCHES = 1024
+
+_FORWARD, _BACKWARD = 0, 1
+
+
+def _chunk_layers(num_layers: int, num_chunks: int) -> List[int]:
+    """Layers per chunk, the first chunks taking one more when they do not divide evenly."""
+    base, extra = divmod(num_layers, num_chunks)
+    return [base + (1 if chunk < extra else 0) for chunk in range(num_chunks)]
+
+
+def _stage_order(schedule: str, stage: int, num_stages: int, num_micro_batches: int, virtual_stages: int) -> List:
+    """(kind, micro-batch, chunk) ops of one stage in execution order."""
+    p, m, v = num_stages, num_micro_batches, virtual_stages
+    if schedule == "gpipe":
+        return [(_FORWARD, mb, stage) for mb in range(m)] + [(_BACKWARD, mb, stage) for mb in range(m)]
+    if schedule == "1f1b":
+        forwards = [(_FORWARD, mb, stage) for mb in range(m)]
+        backwards = [(_BACKWARD, mb, stage) for mb in range(m)]
+        warmup = min(p - stage - 1, m)
+    else:
+        # Megatron-LM order: groups of ``p`` micro-batches sweep the local chunks, backwards in reverse
+        forwards, backwards = [], []
+        for k in range(m * v):
+            group, within = divmod(k, p * v)
+            mb = group * p + within % p
+            forwards.append((_FORWARD, mb, (within // p) * p + stage))
+            backwards.append((_BACKWARD, mb, (v - 1 - within // p) * p + stage))
+        warmup = min((p - stage - 1) * 2 + (v - 1) * p, m * v)
+    order = forwards[:warmup]
+    for forward, backward in zip(forwards[warmup:], backwards):
+        order += [forward, backward]
+    return order + backwards[len(forwards) - warmup :]
+
+
+def stage_costs(
+    params: Dict[str, Any],
+    config: Dict[str, Any],
+    num_chunks: int,
+    activation_checkpointing: bool = False,
+    active_model_size: float | None = None,
+) -> Dict[str, Any]:
+    """Per-chunk parameters, forward FLOPs per token and saved activation bytes per micro-batch.
+
+    Uses the layer shapes of ``config`` when it has them, otherwise spreads ``model_size`` evenly.
+    """
+    layers = params["num_hidden_layers"]
+    if num_chunks > layers:
+        raise ValueError(f"num_stages * virtual_stages ({num_chunks}) exceeds the number of layers ({layers})")
+    hidden = params["hidden_size"]
+    vocab = config.get("vocab_size") or params.get("vocab_size") or 0
+    if "intermediate_size" in config and "vocab_size" in config:
+        counts = count_parameters(config)
+        layer_parameters = (counts["linear"] + counts["norm"]) / layers
+        embedding = counts["embedding"]
+    else:
+        layer_parameters = params["model_size"] * 1e9 / layers
+        embedding = vocab * hidden
+    active = (active_model_size or params["model_size"]) / params["model_size"]
+    attention = 2 * params["sequence_length"] * params["num_attention_heads"] * params["head_dim"]
+    layer_flops = 2 * layer_parameters * active + attention
+    activations = layer_activation_bytes(params, params.get("use_flash_attention", False))
+    hidden_states = params["sequence_length"] * params["batch_size"] * hidden * DATA_TYPE_SIZES[params["precision"]]
+    chunks = []
+    for chunk, count in enumerate(_chunk_layers(layers, num_chunks)):
+        first, last = chunk == 0, chunk == num_chunks - 1
+        chunks.append(
+            {
+                "layers": count,
+                # The input embedding lives on the first chunk and the output layer (a copy when tied) on the last
+                "parameters": count * layer_parameters + (embedding if first else 0) + (vocab * hidden if last else 0),
+                "forward_flops_per_token": count * layer_flops + (2 * vocab * hidden if last else 0),
+                "activation_bytes": count * (hidden_states if activation_checkpointing else activations),
+                "recompute_bytes": activations if activation_checkpointing else 0,
+            }
+        )
+    return {
+        "chunks": chunks,
+        "hidden_state_bytes": hidden_states,
+        "logits_bytes": params["sequence_length"] * params["batch_size"] * vocab * LOGITS_BYTES,
+    }
+
+
+def simulate_pipeline(
+    params: Dict[str, Any],
+    config: Dict[str, Any],
+    num_stages: int,
+    num_micro_batches: int,
+    schedule: str = "1f1b",
+    peak_tflops: float = 989,
+    mfu: float = 0.4,
+    virtual_stages: int = DEFAULT_VIRTUAL_STAGES,
+    activation_checkpointing: bool = False,
+    p2p_bandwidth_gbps: float | None = None,
+    active_model_size: float | None = None,
+    include_timeline: bool = False,
+) -> Dict[str, Any]:
+    """Simulate one training step of a pipeline and return its per-stage memory, bubbles and step time.
+
+    Args:
+        params: Resolved training parameters; ``batch_size`` is the micro-batch size
+        config: Model config with the layer shapes ({} to spread ``model_size`` evenly)
+        num_stages: Pipeline stages (one GPU each)
+        num_micro_batches: Micro-batches per step
+        schedule: "gpipe", "1f1b" or "interleaved"
+        peak_tflops: Dense BF16/FP16 peak of one GPU in TFLOPS
+        mfu: Model FLOPs utilization of large micro-batches
+        virtual_stages: Chunks per stage of the interleaved schedule
+        activation_checkpointing: Save only chunk inputs and recompute layers in the backward pass
+        p2p_bandwidth_gbps: Bandwidth of activation transfers between stages; omitted, they take no time
+        active_model_size: Activated parameters in billions for MoE models
+        include_timeline: Also return every op with its stage and start / end times
+
+    Returns:
+        Per-stage memory (weights, gradients, optimizer state, peak activations), busy time and bubble
+        fraction; the step time, the overall bubble fraction and the throughput of the pipeline
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Invalid schedule. Must be one of: {list(SCHEDULES)}")
+    if num_stages < 1 or not 1 <= num_micro_batches <= MAX_MICRO_BATCHES:
+        raise ValueError(f"num_stages must be at least 1 and num_micro_batches between 1 and {MAX_MICRO_BATCHES}")
+    if not 0 < mfu <= 1:
+        raise ValueError("mfu must be in (0, 1]")
+    v = virtual_stages if schedule == "interleaved" else 1
+    if schedule == "interleaved" and (v < 2 or num_micro_batches % num_stages):
+        raise ValueError("interleaved needs virtual_stages >= 2 and num_micro_batches divisible by num_stages")
+    p, m = num_stages, num_micro_batches
+    costs = stage_costs(params, config, p * v, activation_checkpointing, active_model_size)
+    chunks = costs["chunks"]
+    tokens = params["batch_size"] * params["sequence_length"]
+    rate = peak_tflops * 1e12 * mfu * tokens / (tokens + KERNEL_SATURATION_TOKENS)
+    trainable = params.get("trainable_parameters", 100) / 100
+    forward_seconds = [chunk["forward_flops_per_token"] * tokens / rate for chunk in chunks]
+    backward_factor = 1 + trainable + (1 if activation_checkpointing else 0)
+    durations = (forward_seconds, [f * backward_factor for f in forward_seconds])
+    transfer = (
+        costs["hidden_state_bytes"] / (p2p_bandwidth_gbps * 1e9) + P2P_LATENCY_SECONDS if p2p_bandwidth_gbps else 0
+    )
+    last_chunk = len(chunks) - 1
+
+    orders = [_stage_order(schedule, stage, p, m, v) for stage in range(p)]
+    finish: Dict[Tuple[int, int, int], float] = {}
+    free_at = [0.0] * p
+    busy = [0.0] * p
+    position = [0] * p
+    timeline: List[Dict[str, Any]] = []
+    remaining = sum(len(order) for order in orders)
+    while remaining:
+        progressed = False
+        for stage in range(p):
+            order = orders[stage]
+            while position[stage] < len(order):
+                kind, mb, chunk = order[position[stage]]
+                if kind == _FORWARD:
+                    dependency = (_FORWARD, mb, chunk - 1) if chunk else None
+                else:
+                    dependency = (_FORWARD, mb, chunk) if chunk == last_chunk else (_BACKWARD, mb, chunk + 1)
+                ready = 0.0
+                if dependency is not None:
+                    if dependency not in finish:
+                        break
+                    # Inputs from another stage cross the interconnect first
+                    ready = finish[dependency] + (transfer if dependency[2] % p != stage else 0)
+                start = max(free_at[stage], ready)
+                end = start + durations[kind][chunk]
+                finish[(kind, mb, chunk)] = free_at[stage] = end
+                busy[stage] += end - start
+                if include_timeline:
+                    timeline.append(
+                        {
+                            "stage": stage,
+                            "op": "forward" if kind == _FORWARD else "backward",
+                            "micro_batch": mb,
+                            "chunk": chunk,
+                            "start_ms": round(start * 1000, 3),
+                            "end_ms": round(end * 1000, 3),
+                        }
+                    )
+                position[stage] += 1
+                remaining -= 1
+                progressed = True
+        if not progressed:
+            raise RuntimeError(f"{schedule} schedule deadlocked")
+    step_seconds = max(free_at)
+
+    weight_bytes = DATA_TYPE_SIZES[params["precision"]]
+    per_parameter = weight_bytes + trainable * (weight_bytes + OPTIMIZERS_SIZE[params["optimizer"]])
+    overhead = DEFAULT_COEFFICIENTS["training_overhead_gb"]
+    stages = []
+    for stage, order in enumerate(orders):
+        live = peak = 0.0
+        in_flight = peak_in_flight = 0
+        for kind, _, chunk in order:
+            if kind == _FORWARD:
+                live += chunks[chunk]["activation_bytes"]
+                in_flight += 1
+                peak = max(peak, live)
+                peak_in_flight = max(peak_in_flight, in_flight)
+            else:
+                transient = chunks[chunk]["recompute_bytes"]
+                if chunk == last_chunk:
+                    # Logits and their gradient coexist while the loss is backpropagated
+                    transient += 2 * costs["logits_bytes"]
+                peak = max(peak, live + transient)
+                live -= chunks[chunk]["activation_bytes"]
+                in_flight -= 1
+        parameters = sum(chunks[chunk]["parameters"] for chunk in range(stage, len(chunks), p))
+        static_gb = parameters * per_parameter / 1e9
+        stages.append(
+            {
+                "stage": stage,
+                "layers": sum(chunks[chunk]["layers"] for chunk in range(stage, len(chunks), p)),
+                "parameters": int(parameters),
+                "weights_gradients_optimizer_gb": round(static_gb, 3),
+                "peak_activation_gb": round(peak / 1e9, 3),
+                # (micro-batch, chunk) forwards whose activations are held at once
+                "peak_in_flight_forwards": peak_in_flight,
+                "peak_memory_gb": round(static_gb + peak / 1e9 + overhead, 3),
+                "busy_seconds": round(busy[stage], 4),
+                "bubble_fraction": round(1 - busy[stage] / step_seconds, 4),
+            }
+        )
+    result: Dict[str, Any] = {
+        "schedule": schedule,
+        "num_stages": p,
+        "num_micro_batches": m,
+        "virtual_stages": v,
+        "micro_batch_size": params["batch_size"],
+        "step_time_seconds": round(step_seconds, 4),
+        "bubble_fraction": round(1 - sum(busy) / (p * step_seconds), 4),
+        # (p - 1) / (v * m + p - 1) for balanced stages without transfer time
+        "ideal_bubble_fraction": round((p - 1) / (v * m + p - 1), 4),
+        "tokens_per_second": round(m * tokens / step_seconds, 1),
+        "peak_memory_gb": max(stage["peak_memory_gb"] for stage in stages),
+        "stages": stages,
+    }
+    if include_timeline:
+        result["timeline"] = timeline
+    return result
+
+
+def search_micro_batches(
+    params: Dict[str, Any],
+    config: Dict[str, Any],
+    num_stages: int,
+    global_batch_size: int,
+    memory_cap_gb: float,
+    schedule: str = "1f1b",
+    **kwargs,
+) -> Dict[str, Any]:
+    """Find the micro-batch count with the highest throughput whose peak stage memory fits ``memory_cap_gb``.
+
+    Args:
+        params: Resolved training parameters (``batch_size`` is ignored)
+        config: Model config with the layer shapes
+        num_stages: Pipeline stages
+        global_batch_size: Sequences per step; every micro-batch count dividing it is evaluated
+        memory_cap_gb: Memory of one GPU
+        schedule: Pipeline schedule
+        **kwargs: Other ``simulate_pipeline`` arguments
+
+    Returns:
+        The best simulation ("best", None when nothing fits) and a summary of every candidate
+    """
+    if global_batch_size < 1:
+        raise ValueError("global_batch_size must be at least 1")
+    if memory_cap_gb <= 0:
+        raise ValueError("memory_cap_gb must be positive")
+    candidates = []
+    best = None
+    for m in range(1, min(global_batch_size, MAX_MICRO_BATCHES) + 1):
+        if global_batch_size % m or (schedule == "interleaved" and m % num_stages):
+            continue
+        simulation = simulate_pipeline(
+            {**params, "batch_size": global_batch_size // m}, config, num_stages, m, schedule, **kwargs
+        )
+        fits = simulation["peak_memory_gb"] <= memory_cap_gb
+        candidates.append(
+            {
+                "num_micro_batches": m,
+                "micro_batch_size": global_batch_size // m,
+                "peak_memory_gb": simulation["peak_memory_gb"],
+                "bubble_fraction": simulation["bubble_fraction"],
+                "tokens_per_second": simulation["tokens_per_second"],
+                "fits": fits,
+            }
+        )
+        if fits and (best is None or simulation["tokens_per_second"] > best["tokens_per_second"]):
+            best = simulation
+    return {
+        "memory_cap_gb": memory_cap_gb,
+        "global_batch_size": global_batch_size,
+        "best": best,
+        "candidates": candidates,
+    }
@@ -0,0 +1,84 @@
+import json
+import os
+import unittest
+
+from utils.pipeline import search_micro_batches, simulate_pipeline, stage_costs
+from utils.scenario import extract_model_params
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+with open(os.path.join(MODELS_DIR, "Qwen3-8B.json")) as f:
+    QWEN3_8B = json.load(f)
+TRAINING = {"batch_size": 1, "sequence_length": 4096, "optimizer": "AdamW", "trainable_parameters": 100}
+PARAMS = {**extract_model_params("Qwen3-8B", QWEN3_8B), **TRAINING, "use_flash_attention": True}
+# Evenly spread layers without embeddings, so that every stage costs the same
+BALANCED = {**PARAMS, "num_hidden_layers": 32}
+
+
+class TestPipeline(unittest.TestCase):
+    """Test cases for the pipeline parallel schedule simulator."""
+
+    def test_balanced_bubble_matches_closed_form(self):
+        """Balanced stages reproduce the (p - 1) / (v * m + p - 1) bubble of every schedule."""
+        for schedule, v in (("gpipe", 1), ("1f1b", 1), ("interleaved", 2)):
+            result = simulate_pipeline(BALANCED, {}, 4, 8, schedule)
+            self.assertAlmostEqual(result["bubble_fraction"], 3 / (v * 8 + 3), places=3, msg=schedule)
+            self.assertEqual(result["bubble_fraction"], result["ideal_bubble_fraction"])
+
+    def test_in_flight_micro_batches(self):
+        """GPipe holds every micro-batch, 1F1B at most the stage's depth, interleaving a few more chunks."""
+        gpipe = simulate_pipeline(BALANCED, {}, 4, 16, "gpipe")
+        one_f_one_b = simulate_pipeline(BALANCED, {}, 4, 16, "1f1b")
+        interleaved = simulate_pipeline(BALANCED, {}, 4, 16, "interleaved")
+        self.assertEqual([s["peak_in_flight_forwards"] for s in gpipe["stages"]], [16] * 4)
+        self.assertEqual([s["peak_in_flight_forwards"] for s in one_f_one_b["stages"]], [4, 3, 2, 1])
+        self.assertEqual(interleaved["stages"][0]["peak_in_flight_forwards"], 3 * 2 + 4 + 1)
+        self.assertGreater(gpipe["stages"][0]["peak_activation_gb"], one_f_one_b["stages"][0]["peak_activation_gb"])
+        self.assertEqual(gpipe["step_time_seconds"], one_f_one_b["step_time_seconds"])
+        self.assertLess(interleaved["step_time_seconds"], one_f_one_b["step_time_seconds"])
+
+    def test_config_costs(self):
+        """Embedding and output layer land on the first and last stages; checkpointing keeps only inputs."""
+        costs = stage_costs(PARAMS, QWEN3_8B, 4)["chunks"]
+        self.assertEqual(sum(chunk["layers"] for chunk in costs), QWEN3_8B["num_hidden_layers"])
+        self.assertGreater(costs[0]["parameters"], costs[1]["parameters"])
+        self.assertGreater(costs[3]["forward_flops_per_token"], costs[1]["forward_flops_per_token"])
+        checkpointed = stage_costs(PARAMS, QWEN3_8B, 4, activation_checkpointing=True)["chunks"]
+        self.assertLess(checkpointed[1]["activation_bytes"], costs[1]["activation_bytes"])
+        self.assertGreater(checkpointed[1]["recompute_bytes"], 0)
+        with self.assertRaises(ValueError):
+            stage_costs(PARAMS, QWEN3_8B, 64)
+
+    def test_timeline_and_transfers(self):
+        """The timeline has one entry per op; transfers between stages lengthen the step."""
+        result = simulate_pipeline(PARAMS, QWEN3_8B, 2, 4, "1f1b", include_timeline=True)
+        self.assertEqual(len(result["timeline"]), 2 * 2 * 4)
+        self.assertAlmostEqual(
+            max(op["end_ms"] for op in result["timeline"]), result["step_time_seconds"] * 1000, delta=0.1
+        )
+        slow = simulate_pipeline(PARAMS, QWEN3_8B, 2, 4, "1f1b", p2p_bandwidth_gbps=1)
+        self.assertGreater(slow["step_time_seconds"], result["step_time_seconds"])
+
+    def test_validation(self):
+        """Unknown schedules and interleaving with indivisible micro-batches are rejected."""
+        with self.assertRaises(ValueError):
+            simulate_pipeline(PARAMS, QWEN3_8B, 4, 8, "zero-bubble")
+        with self.assertRaises(ValueError):
+            simulate_pipeline(PARAMS, QWEN3_8B, 4, 6, "interleaved")
+
+    def test_search_under_memory_cap(self):
+        """The search keeps micro-batch counts that divide the batch and picks the fastest that fits."""
+        result = search_micro_batches(PARAMS, QWEN3_8B, 4, 64, 80, activation_checkpointing=True)
+        counts = [c["num_micro_batches"] for c in result["candidates"]]
+        self.assertEqual(counts, [1, 2, 4, 8, 16, 32, 64])
+        best = result["best"]
+        self.assertLessEqual(best["peak_memory_gb"], 80)
+        fitting = [c for c in result["candidates"] if c["fits"]]
+        self.assertEqual(best["tokens_per_second"], max(c["tokens_per_second"] for c in fitting))
+        self.assertIsNone(search_micro_batches(PARAMS, QWEN3_8B, 4, 64, 1)["best"])
+        with self.assertRaises(ValueError):
+            search_micro_batches(PARAMS, QWEN3_8B, 4, 64, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
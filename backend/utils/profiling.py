@@ -0,0 +1,204 @@
+"""Opt-in request profiling and low-rate sampling profiler.
+
+Two modes are provided:
+
+* ``RequestProfiler`` runs a single, admin-authorized request under ``cProfile`` and ``tracemalloc`` and
+  reports the top frames and allocation sites. The raw ``pstats`` dump can be stored on disk and opened
+  with snakeviz, gprof2dot or flameprof. Both tools are process-wide (cProfile through ``sys.monitoring``
+  since Python 3.12), so a profile also records whatever other threads of the worker run meanwhile: the
+  profiler refuses to start while other requests are in flight and reports how many started during the
+  profile (``concurrent_requests``). Only a report with 0 describes the profiled request alone.
+* ``SamplingProfiler`` is a background thread that periodically samples the stacks of all threads and
+  aggregates them in the folded-stack format (``frame;frame;frame count``) consumed by flamegraph.pl,
+  speedscope and inferno. It is cheap enough to stay on in production at a low sampling rate.
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+def is_authorized(token: str | None, expected_token: str | None) -> bool:
+    """Check an admin token in constant time. Profiling is disabled when no token is configured."""
+    if not expected_token or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected_token.encode())
+
+
+class RequestProfiler:
+    """Profile one request at a time with cProfile and tracemalloc.
+
+    Profiling is process-wide, so only one request per worker is profiled at a time, and only while it is
+    the worker's only request in flight (tracked with ``request_started`` and ``request_finished``). Other
+    profiling requests are served normally and told so via ``start`` returning False.
+    """
+
+    def __init__(self, output_dir: str | None = None, top_n: int = 25, traceback_depth: int = 8):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.traceback_depth = traceback_depth
+        self._lock = threading.Lock()
+        self._profile: cProfile.Profile | None = None
+        self._started_at = 0.0
+        self.profile_id = ""
+        self._in_flight = 0
+        self._concurrent = 0
+        self._in_flight_lock = threading.Lock()
+
+    def request_started(self):
+        with self._in_flight_lock:
+            self._in_flight += 1
+            if self._profile is not None:
+                self._concurrent += 1
+
+    def request_finished(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def start(self) -> bool:
+        """Start profiling the calling request; False when another request is profiled or in flight."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        with self._in_flight_lock:
+            if self._in_flight > 1:
+                self._lock.release()
+                return False
+            self._concurrent = 0
+            self.profile_id = uuid.uuid4().hex
+            self._profile = cProfile.Profile()
+        tracemalloc.start(self.traceback_depth)
+        self._started_at = time.perf_counter()
+        self._profile.enable()
+        return True
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling and return the report. Must be called by the thread that called ``start``."""
+        try:
+            self._profile.disable()
+            elapsed = time.perf_counter() - self._started_at
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            report = {
+                "profile_id": self.profile_id,
+                "wall_time_seconds": elapsed,
+                "concurrent_requests": self._concurrent,
+                "peak_traced_memory_bytes": peak,
+                "top_frames": self._top_frames(self._profile),
+                "top_allocations": self._top_allocations(snapshot),
+            }
+            if self.output_dir:
+                os.makedirs(self.output_dir, exist_ok=True)
+                path = os.path.join(self.output_dir, f"{report['profile_id']}.prof")
+                self._profile.dump_stats(path)
+                report["pstats_file"] = path
+                with open(os.path.join(self.output_dir, f"{report['profile_id']}.json"), "w") as fw:
+                    json.dump(report, fw, indent=2)
+            return report
+        finally:
+            with self._in_flight_lock:
+                self._profile = None
+            self._lock.release()
+
+    def profile_stream(self, body: Iterable) -> Iterator:
+        """Keep profiling while a streamed body is produced, then stop.
+
+        The headers are sent before the body, so the report is only stored in ``output_dir``.
+        """
+        try:
+            yield from body
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+            self.stop()
+
+    def _top_frames(self, profile: cProfile.Profile) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        rows = []
+        for (filename, lineno, funcname), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append(
+                {
+                    "function": f"{filename}:{lineno}({funcname})",
+                    "ncalls": ncalls,
+                    "tottime": tottime,
+                    "cumtime": cumtime,
+                }
+            )
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[: self.top_n]
+
+    def _top_allocations(self, snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+        return [
+            {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[: self.top_n]
+        ]
+
+
+class SamplingProfiler:
+    """Low-rate stack sampler that aggregates folded stacks for flamegraph tools."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._thread: threading.Thread | None = None
+        self._pid = 0
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Start the sampler thread in the current process (threads do not survive uwsgi's fork)."""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude={own_ident})
+
+    def sample(self, exclude: set | None = None):
+        """Record the current stack of every thread once."""
+        for ident, frame in sys._current_frames().items():
+            if exclude and ident in exclude:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Return the collected samples in the folded-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from utils.profiling import RequestProfiler, SamplingProfiler, is_authorized
+
+
+def _busy():
+    return sum(i * i for i in range(20000)), [bytearray(1024) for _ in range(50)]
+
+
+class TestProfiling(unittest.TestCase):
+    """Test cases for request and sampling profilers."""
+
+    def test_is_authorized(self):
+        """Profiling is only allowed with the configured token."""
+        self.assertTrue(is_authorized("s3cret", "s3cret"))
+        self.assertFalse(is_authorized("wrong", "s3cret"))
+        self.assertFalse(is_authorized(None, "s3cret"))
+        self.assertFalse(is_authorized("s3cret", None))
+
+    def test_request_profiler_report(self):
+        """The report contains top frames and allocation sites."""
+        profiler = RequestProfiler(top_n=5)
+        self.assertTrue(profiler.start())
+        _busy()
+        report = profiler.stop()
+
+        self.assertLessEqual(len(report["top_frames"]), 5)
+        self.assertTrue(any("_busy" in frame["function"] for frame in report["top_frames"]))
+        self.assertGreater(len(report["top_allocations"]), 0)
+        self.assertGreater(report["peak_traced_memory_bytes"], 0)
+
+    def test_request_profiler_is_exclusive(self):
+        """Only one request is profiled at a time."""
+        profiler = RequestProfiler()
+        self.assertTrue(profiler.start())
+        started = []
+        thread = threading.Thread(target=lambda: started.append(profiler.start()))
+        thread.start()
+        thread.join()
+        profiler.stop()
+        self.assertEqual(started, [False])
+
+    def test_request_profiler_refuses_while_busy(self):
+        """Profiling starts only for a request alone in the worker, and reports requests that joined it."""
+        profiler = RequestProfiler()
+        profiler.request_started()
+        profiler.request_started()
+        self.assertFalse(profiler.start())
+        profiler.request_finished()
+        self.assertTrue(profiler.start())
+        profiler.request_started()
+        report = profiler.stop()
+        self.assertEqual(report["concurrent_requests"], 1)
+
+    def test_request_profiler_streamed_body(self):
+        """A streamed body is profiled while it is produced and the report is stored on disk."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profiler = RequestProfiler(output_dir=tmp_dir)
+            self.assertTrue(profiler.start())
+            profile_id = profiler.profile_id
+            chunks = list(profiler.profile_stream(str(_busy()[0]) for _ in range(3)))
+            self.assertEqual(len(chunks), 3)
+            with open(os.path.join(tmp_dir, f"{profile_id}.json")) as fr:
+                report = json.load(fr)
+            self.assertTrue(any("_busy" in frame["function"] for frame in report["top_frames"]))
+            # Released once the stream is done
+            self.assertTrue(profiler.start())
+            profiler.stop()
+
+    def test_sampling_profiler_folded_output(self):
+        """Samples are aggregated in the folded-stack format."""
+        sampler = SamplingProfiler(interval=0.001)
+        sampler.ensure_started()
+        deadline = time.time() + 0.1
+        while time.time() < deadline:
+            _busy()
+        sampler.stop()
+
+        lines = sampler.folded().splitlines()
+        self.assertGreater(sampler.samples, 0)
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertTrue(any("_busy" in line for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
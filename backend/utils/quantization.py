@@ -0,0 +1,161 @@
+"""Quantization recommendation: which weight / KV cache precision and attention options fit a memory budget.
+
+Every component of the inference estimate depends on a single axis of the search space (weights on the
+weight precision, KV cache on the KV precision and paged attention, activations on the weight precision and
+flash attention), so each component is computed once per axis value and the candidates are outer sums of
+those tables instead of full recalculations.
+"""
+
+from itertools import product
+from typing import Any, Dict, List
+
+from config.memory import DATA_TYPE_SIZES, DEFAULT_COEFFICIENTS
+from utils.memory import _get_activation_memory, _get_kv_cache, _get_model_weights
+from utils.model_info import base_model_name
+
+# Relative numerical fidelity of a precision, higher is closer to the original model
+PRECISION_FIDELITY = {"float32": 4, "float16": 3, "bfloat16": 3, "int8": 2, "int4": 1}
+# Attention options in order of preference: the first one that fits is reported
+ATTENTION_OPTIONS = [(False, False), (True, False), (False, True), (True, True)]
+# Quantized checkpoint formats and the hardware they run on
+_VARIANT_CATEGORIES = {"mlx": "Apple Silicon", "fp8": "Nvidia GPU", "awq": "Nvidia GPU", "gptq": "Nvidia GPU"}
+
+
+def candidate_precisions(native_precision: str) -> List[str]:
+    """Return the precisions worth trying: nothing wider than the native dtype, one per byte size."""
+    native_size = DATA_TYPE_SIZES.get(native_precision, DATA_TYPE_SIZES["bfloat16"])
+    candidates = {}
+    for precision, size in DATA_TYPE_SIZES.items():
+        if size > native_size:
+            continue
+        # float16 and bfloat16 have the same size: keep the model's own one, else bfloat16 for its range
+        if (
+            size not in candidates
+            or precision == native_precision
+            or candidates[size] != native_precision
+            and precision == "bfloat16"
+        ):
+            candidates[size] = precision
+    return sorted(candidates.values(), key=lambda p: -DATA_TYPE_SIZES[p])
+
+
+def find_variants(
+    model_name: str, catalog: Dict[str, Dict[str, Any]], category: str | None = None
+) -> Dict[str, List[str]]:
+    """Group the quantized siblings of a model in the catalog by the weight precision they ship.
+
+    Args:
+        model_name: Model name (the base model or any of its variants)
+        catalog: Model name -> ``describe_model`` metadata
+        category: GPU category ("Nvidia GPU" or "Apple Silicon"); variants for other hardware are skipped
+    """
+    base = base_model_name(model_name)
+    variants: Dict[str, List[str]] = {}
+    for name, info in sorted(catalog.items()):
+        if info["base_model"] != base or info["quantization"] in ("none", "gguf") or not info["weight_bits"]:
+            continue
+        if category and _VARIANT_CATEGORIES.get(info["quantization"].split("-")[0], category) != category:
+            continue
+        bits = info["weight_bits"]
+        precision = {8: "int8", 4: "int4"}.get(bits, "bfloat16" if bits == 16 else None)
+        if precision:
+            variants.setdefault(precision, []).append(name)
+    return variants
+
+
+def _dominates(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return (
+        a["fidelity"]["weights"] >= b["fidelity"]["weights"]
+        and a["fidelity"]["kv_cache"] >= b["fidelity"]["kv_cache"]
+        and a["fidelity"] != b["fidelity"]
+    )
+
+
+def recommend_quantization(
+    params: Dict[str, Any],
+    memory_budget_gb: float,
+    bandwidth_gbps: float | None = None,
+    active_model_size: float | None = None,
+    variants: Dict[str, List[str]] | None = None,
+    include_all: bool = False,
+) -> Dict[str, Any]:
+    """Rank the precision and attention combinations that fit a memory budget.
+
+    Args:
+        params: Resolved inference parameters (model architecture, batch_size, sequence_length, precision)
+        memory_budget_gb: Memory available for the model, in GB
+        bandwidth_gbps: Memory bandwidth in GB/s, used for the decode throughput estimate
+        active_model_size: Parameters read per token in billions (activated parameters for MoE models)
+        variants: Quantized checkpoints per weight precision, see ``find_variants``
+        include_all: Return every fitting combination instead of only the highest-fidelity ones
+
+    Returns:
+        {"combinations": [...], "fitting": count of fitting combinations, "evaluated": count evaluated}
+    """
+    variants = variants or {}
+    model_size = params["model_size"]
+    batch_size, sequence_length = params["batch_size"], params["sequence_length"]
+    weight_options = candidate_precisions(params["precision"])
+    kv_options = candidate_precisions(params["precision"])
+
+    # One table per component and axis
+    weights = {w: _get_model_weights(model_size, w) for w in weight_options}
+    activations = {
+        (w, flash): _get_activation_memory(w, batch_size, sequence_length, params["head_dim"], flash)
+        for w in weight_options
+        for flash in (False, True)
+    }
+    kv_cache = {
+        (k, paged): _get_kv_cache(
+            k,
+            batch_size,
+            sequence_length,
+            params["num_hidden_layers"],
+            params["hidden_size"],
+            params["num_attention_heads"],
+            params["head_dim"],
+            params["num_key_value_heads"],
+            paged,
+        )
+        for k in kv_options
+        for paged in (False, True)
+    }
+
+    overhead = DEFAULT_COEFFICIENTS["inference_overhead_gb"]
+    fitting = []
+    evaluated = 0
+    for w, k in product(weight_options, kv_options):
+        for flash, paged in ATTENTION_OPTIONS:
+            evaluated += 1
+            total = weights[w] + kv_cache[(k, paged)] + activations[(w, flash)] + overhead
+            if total > memory_budget_gb:
+                continue
+            # Decode is memory bound: every step reads the (active) weights and the whole KV cache once
+            bytes_per_step = (active_model_size or model_size) * DATA_TYPE_SIZES[w] + kv_cache[(k, False)]
+            fitting.append(
+                {
+                    "precision": w,
+                    "kv_cache_precision": k,
+                    "use_flash_attention": flash,
+                    "use_page_attention": paged,
+                    "memory_gb": round(total, 2),
+                    "headroom_gb": round(memory_budget_gb - total, 2),
+                    "memory_breakdown_gb": {
+                        "model_weights": round(weights[w], 2),
+                        "kv_cache": round(kv_cache[(k, paged)], 2),
+                        "activation": round(activations[(w, flash)], 2),
+                        "overhead": overhead,
+                    },
+                    "fidelity": {"weights": PRECISION_FIDELITY[w], "kv_cache": PRECISION_FIDELITY[k]},
+                    "decode_gb_per_step": round(bytes_per_step, 3),
+                    "decode_tokens_per_second": (
+                        round(batch_size * bandwidth_gbps / bytes_per_step, 1) if bandwidth_gbps else None
+                    ),
+                    "variants": variants.get(w, []),
+                }
+            )
+            break
+
+    combinations = fitting if include_all else [c for c in fitting if not any(_dominates(o, c) for o in fitting)]
+    combinations.sort(key=lambda c: (c["decode_gb_per_step"], -c["fidelity"]["weights"], -c["fidelity"]["kv_cache"]))
+    return {"combinations": combinations, "fitting": len(fitting), "evaluated": evaluated}
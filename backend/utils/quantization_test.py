@@ -0,0 +1,81 @@
+import unittest
+
+from utils.memory import calculate_inference_memory
+from utils.model_info import describe_model
+from utils.quantization import candidate_precisions, find_variants, recommend_quantization
+
+QWEN3_8B = {
+    "model_size": 8,
+    "precision": "bfloat16",
+    "num_hidden_layers": 36,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+    "batch_size": 4,
+    "sequence_length": 8192,
+}
+
+
+class TestQuantization(unittest.TestCase):
+    """Test cases for the quantization recommendation solver."""
+
+    def test_candidate_precisions(self):
+        """Precisions wider than the native dtype and same-size duplicates are not tried."""
+        self.assertEqual(candidate_precisions("bfloat16"), ["bfloat16", "int8", "int4"])
+        self.assertEqual(candidate_precisions("float16"), ["float16", "int8", "int4"])
+        self.assertEqual(candidate_precisions("float32"), ["float32", "bfloat16", "int8", "int4"])
+
+    def test_memory_matches_calculator(self):
+        """A recommended combination has the same total as the inference calculator."""
+        result = recommend_quantization(QWEN3_8B, 1000, include_all=True)
+        combo = next(
+            c for c in result["combinations"] if c["precision"] == "int8" and c["kv_cache_precision"] == "int4"
+        )
+        expected = calculate_inference_memory(
+            kv_cache_precision="int4",
+            use_flash_attention=combo["use_flash_attention"],
+            use_page_attention=combo["use_page_attention"],
+            **{**QWEN3_8B, "precision": "int8"},
+        )["inference_memory"]
+        self.assertEqual(f"{combo['memory_gb']:.2f} GB", expected)
+
+    def test_highest_fidelity_frontier(self):
+        """Only combinations not dominated in fidelity by another fitting one are returned."""
+        result = recommend_quantization(QWEN3_8B, 1000)
+        self.assertEqual(len(result["combinations"]), 1)
+        self.assertEqual(result["combinations"][0]["precision"], "bfloat16")
+        self.assertEqual(result["combinations"][0]["kv_cache_precision"], "bfloat16")
+        # Weights alone take 8 GB at int8: only the 4-bit weights fit in 7 GB
+        result = recommend_quantization(QWEN3_8B, 7, bandwidth_gbps=1000)
+        self.assertTrue(result["combinations"])
+        for combo in result["combinations"]:
+            self.assertEqual(combo["precision"], "int4")
+            self.assertLessEqual(combo["memory_gb"], 7)
+        self.assertEqual(recommend_quantization(QWEN3_8B, 2)["combinations"], [])
+
+    def test_ranked_by_decode_throughput(self):
+        """Combinations are ordered by estimated decode tokens per second."""
+        result = recommend_quantization(QWEN3_8B, 1000, bandwidth_gbps=1000, include_all=True)
+        speeds = [c["decode_tokens_per_second"] for c in result["combinations"]]
+        self.assertEqual(speeds, sorted(speeds, reverse=True))
+        self.assertEqual(result["fitting"], 9)
+
+    def test_find_variants(self):
+        """Quantized siblings are grouped by weight precision and filtered by hardware."""
+        catalog = {
+            name: describe_model(name, config)
+            for name, config in {
+                "Qwen3-8B": {"torch_dtype": "bfloat16"},
+                "Qwen3-8B-FP8": {"quantization_config": {"quant_method": "fp8"}},
+                "Qwen3-8B-MLX-4bit": {"quantization": {"bits": 4}},
+                "Qwen3-14B-AWQ": {"quantization_config": {"quant_method": "awq", "bits": 4}},
+            }.items()
+        }
+        self.assertEqual(find_variants("Qwen3-8B", catalog), {"int8": ["Qwen3-8B-FP8"], "int4": ["Qwen3-8B-MLX-4bit"]})
+        self.assertEqual(find_variants("Qwen3-8B-FP8", catalog, "Nvidia GPU"), {"int8": ["Qwen3-8B-FP8"]})
+        self.assertEqual(find_variants("Qwen3-8B", catalog, "Apple Silicon"), {"int4": ["Qwen3-8B-MLX-4bit"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+"""Resolve calculation scenarios (a catalog model plus request overrides) and run the memory calculators.
+
+Shared by the HTTP API and the offline batch CLI, so both produce identical results for the same scenario.
+"""
+
+import re
+from typing import Any, Dict
+
+from config.memory import DATA_TYPES, OPTIMIZERS, SFT_OR_PEFT
+from utils.memory import calculate_inference_memory, calculate_training_memory
+from utils.peft import PEFT_METHODS, SHAPE_PARAMETERS, calculate_peft_memory, resolve_peft_params
+
+CALCULATION_TYPES = ("inference", "training")
+# Fields required on top of the model config, per calculation type
+REQUIRED_PARAMETERS = {
+    "inference": ["batch_size", "sequence_length", "kv_cache_precision"],
+    "training": ["batch_size", "sequence_length", "optimizer", "trainable_parameters"],
+}
+# Architecture fields that may be given directly instead of a model_name
+ARCHITECTURE_PARAMETERS = [
+    "model_size",
+    "precision",
+    "num_hidden_layers",
+    "hidden_size",
+    "num_attention_heads",
+    "head_dim",
+    "num_key_value_heads",
+]
+# Converters for values that arrive as strings (CSV cells, query strings)
+_INT_FIELDS = {"batch_size", "sequence_length", "num_hidden_layers", "hidden_size", "num_attention_heads"}
+_INT_FIELDS |= {"head_dim", "num_key_value_heads", "lora_rank", "intermediate_size", "vocab_size"}
+_FLOAT_FIELDS = {"model_size", "trainable_parameters", "lora_alpha"}
+_BOOL_FIELDS = {"use_flash_attention", "use_page_attention", "double_quantization", "paged_optimizer"}
+
+
+def extract_model_params(model_name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    # 正则表达式：匹配一个数字（可能带小数点），后面跟着 'B' 或 'M'，不区分大小写
+    # \d+(\.\d+)?  -> 匹配整数或小数
+    # (B|M)        -> 匹配 'B' 或 'M'
+    pattern = re.compile(r"\d+(\.\d+)?(B|M)", re.IGNORECASE)
+    match = pattern.search(model_name)
+    if match:
+        model_size = float(match.group(0)[:-1])
+    else:
+        model_size = None
+    return {
+        "model_size": model_size,
+        "precision": config.get("torch_dtype", "float32"),
+        "num_hidden_layers": config.get("num_hidden_layers", 36),
+        "hidden_size": config.get("hidden_size", 4096),
+        "num_attention_heads": config.get("num_attention_heads", 32),
+        "head_dim": config.get("head_dim", 128),
+        "num_key_value_heads": config.get(
+            "num_key_value_heads", config.get("num_attention_heads", 32)
+        ),  # MHA 的 KV 头数等于查询头数
+        "use_flash_attention": False,
+        "use_page_attention": False,
+    }
+
+
+# Request parameters that override the values extracted from the model config
+INFERENCE_PARAMETERS = [
+    "precision",
+    "batch_size",
+    "sequence_length",
+    "kv_cache_precision",
+    "use_flash_attention",
+    "use_page_attention",
+]
+TRAINING_PARAMETERS = [
+    "precision",
+    "batch_size",
+    "sequence_length",
+    "optimizer",
+    "trainable_parameters",
+    "use_flash_attention",
+    # SFT or PEFT (LoRA / QLoRA) and the adapter settings of PEFT methods
+    "method",
+    "lora_rank",
+    "lora_alpha",
+    "target_modules",
+    "adapter_precision",
+    "double_quantization",
+    "paged_optimizer",
+]
+
+
+def run_inference_calculation(params: Dict[str, Any], coefficients: Dict[str, float] | None = None) -> Dict[str, Any]:
+    """Run the inference memory calculation for fully resolved parameters, optionally with calibrated coefficients."""
+    return calculate_inference_memory(
+        model_size=params["model_size"],
+        precision=params["precision"],
+        batch_size=params["batch_size"],
+        sequence_length=params["sequence_length"],
+        kv_cache_precision=params["kv_cache_precision"],
+        num_hidden_layers=params["num_hidden_layers"],
+        hidden_size=params["hidden_size"],
+        num_attention_heads=params["num_attention_heads"],
+        head_dim=params["head_dim"],
+        num_key_value_heads=params["num_key_value_heads"],
+        use_flash_attention=params["use_flash_attention"],
+        use_page_attention=params["use_page_attention"],
+        coefficients=coefficients,
+    )
+
+
+def run_training_calculation(
+    params: Dict[str, Any], coefficients: Dict[str, float] | None = None, config: Dict[str, Any] | None = None
+) -> Dict[str, Any]:
+    """Run the training memory calculation for fully resolved parameters, optionally with calibrated coefficients.
+
+    ``config`` is the model config, which supplies the layer shapes of LoRA / QLoRA rows whose parameters were
+    not resolved as PEFT (e.g. a grid over ``method`` from an SFT base).
+    """
+    if params.get("method") in PEFT_METHODS:
+        # Resolved again so that grid rows varying e.g. lora_rank get their own adapter size
+        return calculate_peft_memory(resolve_peft_params(dict(params), config or {}), coefficients)
+    return calculate_training_memory(
+        model_size=params["model_size"],
+        precision=params["precision"],
+        batch_size=params["batch_size"],
+        sequence_length=params["sequence_length"],
+        num_hidden_layers=params["num_hidden_layers"],
+        hidden_size=params["hidden_size"],
+        num_attention_heads=params["num_attention_heads"],
+        head_dim=params["head_dim"],
+        num_key_value_heads=params["num_key_value_heads"],
+        optimizer=params["optimizer"],
+        trainable_parameters=params["trainable_parameters"],
+        use_flash_attention=params["use_flash_attention"],
+        coefficients=coefficients,
+    )
+
+
+def _coerce(key: str, value: Any) -> Any:
+    if not isinstance(value, str):
+        # JSON clients (the live channel) may send any type; a list batch_size would be multiplied, not fail
+        if key in _INT_FIELDS | _FLOAT_FIELDS and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"{key} must be a number")
+        return value
+    if key in _INT_FIELDS:
+        return int(value)
+    if key in _FLOAT_FIELDS:
+        return float(value)
+    if key in _BOOL_FIELDS:
+        if value.strip().lower() not in ("true", "false", "1", "0", "yes", "no", ""):
+            raise ValueError(f"Invalid boolean for {key}: {value}")
+        return value.strip().lower() in ("true", "1", "yes")
+    return value
+
+
+def coerce_parameter(key: str, value: Any) -> Any:
+    """Coerce one request value and check its range, e.g. each value of a grid axis.
+
+    Raises:
+        ValueError: When the value cannot be converted or is out of range
+    """
+    try:
+        value = _coerce(key, value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid {key}: {value!r}") from e
+    if key in ("precision", "kv_cache_precision", "adapter_precision") and value not in DATA_TYPES:
+        raise ValueError(f"Invalid {key}. Must be one of: {DATA_TYPES}")
+    if key == "optimizer" and value not in OPTIMIZERS:
+        raise ValueError(f"Invalid optimizer. Must be one of: {OPTIMIZERS}")
+    if key == "method" and value not in SFT_OR_PEFT:
+        raise ValueError(f"Invalid method. Must be one of: {SFT_OR_PEFT}")
+    if key in _BOOL_FIELDS and not isinstance(value, bool):
+        raise ValueError(f"Invalid boolean for {key}: {value!r}")
+    if key in _INT_FIELDS | _FLOAT_FIELDS and value <= 0:
+        raise ValueError(f"{key} must be positive")
+    if key == "trainable_parameters" and value > 100:
+        raise ValueError("trainable_parameters is a percentage, at most 100")
+    return value
+
+
+def resolve_scenario(
+    calculation_type: str, scenario: Dict[str, Any], models: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Turn a scenario (model name or explicit architecture, plus overrides) into calculator parameters.
+
+    Args:
+        calculation_type: "inference" or "training"
+        scenario: Scenario fields; empty strings count as missing
+        models: The model catalog
+
+    Raises:
+        ValueError: When the scenario is incomplete or invalid
+    """
+    if calculation_type not in CALCULATION_TYPES:
+        raise ValueError(f"Invalid calculation type. Must be one of: {list(CALCULATION_TYPES)}")
+    scenario = {key: _coerce(key, value) for key, value in scenario.items() if value is not None and value != ""}
+    model_name = scenario.get("model_name")
+    if model_name:
+        if model_name not in models:
+            raise ValueError(f'Model "{model_name}" not found')
+        params = extract_model_params(model_name, models[model_name])
+    else:
+        missing = [key for key in ARCHITECTURE_PARAMETERS if key not in scenario]
+        if missing:
+            raise ValueError(f"model_name or the architecture fields {missing} are required")
+        params = {"use_flash_attention": False, "use_page_attention": False}
+    overrides = INFERENCE_PARAMETERS if calculation_type == "inference" else TRAINING_PARAMETERS
+    for key in ARCHITECTURE_PARAMETERS + overrides + (SHAPE_PARAMETERS if not model_name else []):
+        if key in scenario:
+            params[key] = scenario[key]
+    peft = calculation_type == "training" and params.get("method") in PEFT_METHODS
+    if calculation_type == "training" and params.get("method", "SFT") not in SFT_OR_PEFT:
+        raise ValueError(f"Invalid method. Must be one of: {SFT_OR_PEFT}")
+    for key in REQUIRED_PARAMETERS[calculation_type]:
+        # The trainable share of LoRA / QLoRA follows from the adapter shapes
+        if key not in params and not (peft and key == "trainable_parameters"):
+            raise ValueError(f"{key} is required")
+    if params.get("model_size") is None:
+        raise ValueError("model_size is required when it cannot be parsed from the model name")
+    if params.get("precision") not in DATA_TYPES:
+        raise ValueError(f"Invalid precision. Must be one of: {DATA_TYPES}")
+    if calculation_type == "inference" and params["kv_cache_precision"] not in DATA_TYPES:
+        raise ValueError(f"Invalid kv_cache_precision. Must be one of: {DATA_TYPES}")
+    if calculation_type == "training" and params["optimizer"] not in OPTIMIZERS:
+        raise ValueError(f"Invalid optimizer. Must be one of: {OPTIMIZERS}")
+    if peft:
+        resolve_peft_params(params, models[model_name] if model_name else {})
+    return params
+
+
+def run_scenario(
+    calculation_type: str, params: Dict[str, Any], coefficients: Dict[str, float] | None = None
+) -> Dict[str, Any]:
+    """Run the calculator of ``calculation_type`` on resolved parameters."""
+    if calculation_type == "inference":
+        return run_inference_calculation(params, coefficients)
+    return run_training_calculation(params, coefficients)
@@ -0,0 +1,212 @@
+"""Cross-process shared result cache backed by a memory-mapped file.
+
+All uwsgi workers on a host map the same file, so a result computed by one worker is a hit for every other
+worker, and the cache survives worker recycling (``max-requests``). The table is set-associative: a key's
+hash selects a bucket of ``ways`` fixed-size slots, and eviction inside a full bucket uses the CLOCK
+(second chance) policy. Memory use is bounded by ``buckets * (ways * slot_size + 8)`` bytes.
+
+Buckets are protected by a per-bucket ``fcntl`` record lock (across processes) and a striped
+``threading.Lock`` (across threads of one process, which ``fcntl`` does not separate). Every value carries
+a CRC32, so a slot torn by a worker killed mid-write (e.g. harakiri) reads as a miss instead of garbage.
+
+The file outlives deploys, so keys must include the version of everything that shapes a value: see
+``source_version`` for the code.
+"""
+
+import fcntl
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import weakref
+import zlib
+from typing import Any, Iterable, Tuple
+
+from utils.config_store import canonical_json
+
+_MAGIC = b"LLMC"
+_VERSION = 1
+# magic, version, buckets, ways, slot_size
+_HEADER = struct.Struct("<4sIIII")
+_HEADER_SIZE = 64
+# per-bucket CLOCK hand
+_BUCKET_HEADER = struct.Struct("<I4x")
+# key digest, value length, value crc32, reference bit
+_SLOT_HEADER = struct.Struct("<16sIIB3x")
+_EMPTY_KEY = bytes(16)
+_LOCK_STRIPES = 64
+
+
+def make_key(*parts: Any) -> bytes:
+    """Build a 16-byte cache key from JSON-serializable parts."""
+    return hashlib.blake2b(canonical_json(parts), digest_size=16).digest()
+
+
+def source_version(paths: Iterable[str]) -> str:
+    """Hash of the Python sources at ``paths`` (files or package directories), tests excluded.
+
+    A deploy changing a formula or a response shape changes this version, so keys built with it never hit
+    results cached by the previous code.
+    """
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.py"))) if os.path.isdir(path) else [path])
+    digest = hashlib.blake2b(digest_size=8)
+    for file in files:
+        if file.endswith("_test.py"):
+            continue
+        with open(file, "rb") as f:
+            digest.update(os.path.basename(file).encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+class SharedCache:
+    """Bounded shared-memory hash table with CLOCK eviction."""
+
+    def __init__(self, path: str, buckets: int = 1024, ways: int = 8, slot_size: int = 4096):
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"slot_size must be larger than {_SLOT_HEADER.size} bytes")
+        self.path = path
+        self.buckets = buckets
+        self.ways = ways
+        self.slot_size = slot_size
+        self.max_value_size = slot_size - _SLOT_HEADER.size
+        self.bucket_size = _BUCKET_HEADER.size + ways * slot_size
+        self.size = _HEADER_SIZE + buckets * self.bucket_size
+        self.hits = 0
+        self.misses = 0
+        self._pid = None
+        self._fd = -1
+        self._mm: mmap.mmap | None = None
+        self._reset_locks()
+        # Locks held by another thread at fork time would stay held forever in the child
+        cache = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: cache() and cache()._reset_locks())
+
+    def _reset_locks(self):
+        self._open_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def _open(self):
+        """Map the cache file in the current process (lazily, so each forked worker gets its own fd)."""
+        if self._pid == os.getpid():
+            return
+        # The first requests of a fresh worker may arrive on several threads at once
+        with self._open_lock:
+            if self._pid != os.getpid():
+                self._map()
+
+    def _map(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX, _HEADER_SIZE, 0)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            expected = _HEADER.pack(_MAGIC, _VERSION, self.buckets, self.ways, self.slot_size)
+            if header != expected or os.fstat(fd).st_size != self.size:
+                # New file or a different geometry: (re)initialize. Zeroed slots are empty.
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.size)
+                os.pwrite(fd, expected, 0)
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, _HEADER_SIZE, 0)
+        self._fd = fd
+        self._mm = mmap.mmap(fd, self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        self._pid = os.getpid()
+
+    def _locate(self, key: bytes) -> Tuple[int, int]:
+        bucket = int.from_bytes(key[:8], "little") % self.buckets
+        return bucket, _HEADER_SIZE + bucket * self.bucket_size
+
+    def _lock(self, bucket: int, offset: int, exclusive: bool):
+        stripe = self._stripes[bucket % _LOCK_STRIPES]
+        stripe.acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH, 1, offset)
+        except BaseException:
+            stripe.release()
+            raise
+        return stripe
+
+    def _unlock(self, stripe: threading.Lock, offset: int):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+        stripe.release()
+
+    def get(self, key: bytes) -> bytes | None:
+        """Return the cached bytes for ``key`` or None."""
+        self._open()
+        mm = self._mm
+        bucket, offset = self._locate(key)
+        stripe = self._lock(bucket, offset, exclusive=False)
+        try:
+            slot = offset + _BUCKET_HEADER.size
+            for _ in range(self.ways):
+                slot_key, length, crc, _ = _SLOT_HEADER.unpack_from(mm, slot)
+                if slot_key == key and length:
+                    start = slot + _SLOT_HEADER.size
+                    value = mm[start : start + length]
+                    if zlib.crc32(value) == crc:
+                        mm[slot + 24] = 1  # reference bit, a benign race under the shared lock
+                        self.hits += 1
+                        return value
+                    break
+                slot += self.slot_size
+        finally:
+            self._unlock(stripe, offset)
+        self.misses += 1
+        return None
+
+    def set(self, key: bytes, value: bytes) -> bool:
+        """Store ``value`` under ``key``. Values larger than a slot are not cached."""
+        if len(value) > self.max_value_size or not value:
+            return False
+        self._open()
+        mm = self._mm
+        bucket, offset = self._locate(key)
+        stripe = self._lock(bucket, offset, exclusive=True)
+        try:
+            first_slot = offset + _BUCKET_HEADER.size
+            target = None
+            for way in range(self.ways):
+                slot = first_slot + way * self.slot_size
+                slot_key, length, _, _ = _SLOT_HEADER.unpack_from(mm, slot)
+                if slot_key == key or (target is None and (slot_key == _EMPTY_KEY or not length)):
+                    target = slot
+                    if slot_key == key:
+                        break
+            if target is None:
+                (hand,) = _BUCKET_HEADER.unpack_from(mm, offset)
+                # CLOCK: clear reference bits until an unreferenced slot is found (at most two sweeps)
+                for _ in range(2 * self.ways):
+                    slot = first_slot + hand * self.slot_size
+                    hand = (hand + 1) % self.ways
+                    if mm[slot + 24]:
+                        mm[slot + 24] = 0
+                    else:
+                        target = slot
+                        break
+                _BUCKET_HEADER.pack_into(mm, offset, hand)
+            # Invalidate first so that a torn write is never readable as a valid entry
+            _SLOT_HEADER.pack_into(mm, target, _EMPTY_KEY, 0, 0, 0)
+            start = target + _SLOT_HEADER.size
+            mm[start : start + len(value)] = value
+            _SLOT_HEADER.pack_into(mm, target, key, len(value), zlib.crc32(value), 0)
+            return True
+        finally:
+            self._unlock(stripe, offset)
+
+    def clear(self):
+        self._open()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, 0)
+        try:
+            self._mm[_HEADER_SIZE:] = bytes(self.size - _HEADER_SIZE)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, 0)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            os.close(self._fd)
+        self._mm = None
+        self._pid = None
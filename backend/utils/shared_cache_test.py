@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+
+from utils.shared_cache import SharedCache, make_key, source_version
+
+
+def _child_set(path: str):
+    SharedCache(path, buckets=16, ways=4, slot_size=256).set(make_key("from-child"), b"child")
+
+
+class TestSharedCache(unittest.TestCase):
+    """Test cases for the shared memory-mapped cache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "cache")
+        self.cache = SharedCache(self.path, buckets=16, ways=4, slot_size=256)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_get_set(self):
+        """Values round-trip and overwrite in place."""
+        key = make_key("inference", {"batch_size": 1})
+        self.assertIsNone(self.cache.get(key))
+        self.assertTrue(self.cache.set(key, b"one"))
+        self.assertEqual(self.cache.get(key), b"one")
+        self.cache.set(key, b"two")
+        self.assertEqual(self.cache.get(key), b"two")
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_make_key_is_canonical(self):
+        """Keys do not depend on dict ordering."""
+        self.assertEqual(make_key({"a": 1, "b": 2}), make_key({"b": 2, "a": 1}))
+        self.assertNotEqual(make_key({"a": 1}), make_key({"a": 2}))
+
+    def test_source_version(self):
+        """The source version changes with the code and ignores test files."""
+        package = os.path.join(self.tmp_dir.name, "pkg")
+        os.mkdir(package)
+        with open(os.path.join(package, "formula.py"), "w") as f:
+            f.write("OVERHEAD = 1.0\n")
+        version = source_version([package])
+        with open(os.path.join(package, "formula_test.py"), "w") as f:
+            f.write("pass\n")
+        self.assertEqual(source_version([package]), version)
+        with open(os.path.join(package, "formula.py"), "w") as f:
+            f.write("OVERHEAD = 1.5\n")
+        self.assertNotEqual(source_version([package]), version)
+
+    def test_bounded_with_clock_eviction(self):
+        """The cache never holds more than buckets * ways entries, and referenced entries survive."""
+        hot = make_key("hot")
+        self.cache.set(hot, b"hot")
+        for i in range(1000):
+            self.cache.get(hot)
+            self.cache.set(make_key(i), b"x")
+        self.assertEqual(self.cache.get(hot), b"hot")
+        stored = sum(self.cache.get(make_key(i)) is not None for i in range(1000))
+        self.assertLessEqual(stored, 16 * 4)
+        self.assertGreater(stored, 0)
+
+    def test_oversized_values_are_skipped(self):
+        """Values larger than a slot are not cached."""
+        self.assertFalse(self.cache.set(make_key("big"), b"x" * 1000))
+        self.assertIsNone(self.cache.get(make_key("big")))
+
+    def test_shared_across_processes(self):
+        """A value written by another process (e.g. a recycled worker) is visible."""
+        self.cache.set(make_key("from-parent"), b"parent")
+        process = multiprocessing.get_context("fork").Process(target=_child_set, args=(self.path,))
+        process.start()
+        process.join()
+        self.assertEqual(self.cache.get(make_key("from-child")), b"child")
+
+    def test_concurrent_first_use_maps_once(self):
+        """Threads racing on the first access of a process share one mapping and one set of locks."""
+        cache = SharedCache(self.path, buckets=16, ways=4, slot_size=256)
+        barrier = threading.Barrier(8)
+        mappings = []
+
+        def first_use():
+            barrier.wait()
+            cache.set(make_key("first"), b"value")
+            mappings.append((cache._fd, id(cache._mm), id(cache._stripes)))
+
+        threads = [threading.Thread(target=first_use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(mappings)), 1)
+        self.assertEqual(cache.get(make_key("first")), b"value")
+
+    def test_torn_write_reads_as_miss(self):
+        """A corrupted value fails its checksum and is treated as a miss."""
+        key = make_key("torn")
+        self.cache.set(key, b"payload")
+        data = bytearray(open(self.path, "rb").read())
+        index = data.find(b"payload")
+        data[index] = ord("X")
+        with open(self.path, "r+b") as fw:
+            fw.seek(index)
+            fw.write(b"X")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_geometry_change_reinitializes(self):
+        """Opening the file with a different geometry starts from an empty cache."""
+        self.cache.set(make_key("a"), b"a")
+        other = SharedCache(self.path, buckets=32, ways=4, slot_size=256)
+        self.assertIsNone(other.get(make_key("a")))
+        other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
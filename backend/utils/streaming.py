@@ -0,0 +1,78 @@
+"""Streaming helpers for calculation endpoints that produce many rows.
+
+Rows are produced lazily by generators and encoded chunk by chunk, so the worker never holds the whole
+result set in memory and the client receives the first rows as soon as they are computed.
+"""
+
+import itertools
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Number of encoded rows joined into one chunk, to avoid one write per row
+ROWS_PER_CHUNK = 64
+
+
+def grid_size(grid: Dict[str, List[Any]]) -> int:
+    """Return the number of combinations in a parameter grid."""
+    size = 1
+    for values in grid.values():
+        size *= len(values)
+    return size
+
+
+def iter_grid(base: Dict[str, Any], grid: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield ``base`` updated with every combination of the grid values (last key varies fastest)."""
+    keys = list(grid.keys())
+    for values in itertools.product(*(grid[key] for key in keys)):
+        params = dict(base)
+        params.update(zip(keys, values))
+        yield params
+
+
+def iter_rows(
+    base: Dict[str, Any],
+    grid: Dict[str, List[Any]],
+    calculate: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    """Evaluate ``calculate`` over the grid, yielding one row per combination.
+
+    A combination that fails yields an ``error`` row instead of ending the stream, whose status line is
+    already sent.
+    """
+    for index, params in enumerate(iter_grid(base, grid)):
+        row: Dict[str, Any] = {"index": index, "parameters": {key: params[key] for key in grid}}
+        try:
+            row["memory_requirements"] = calculate(params)
+        except Exception as e:
+            row["error"] = str(e)
+        yield row
+
+
+def _chunked(encoded: Iterable[str], separator: str) -> Iterator[str]:
+    buffer = []
+    for item in encoded:
+        buffer.append(item)
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield separator.join(buffer)
+            buffer = []
+    if buffer:
+        yield separator.join(buffer)
+
+
+def ndjson_stream(header: Dict[str, Any], rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Encode a header line followed by one JSON document per row (newline-delimited JSON)."""
+    yield json.dumps(header) + "\n"
+    for chunk in _chunked((json.dumps(row) for row in rows), "\n"):
+        yield chunk + "\n"
+
+
+def json_array_stream(header: Dict[str, Any], rows: Iterable[Dict[str, Any]], key: str = "rows") -> Iterator[str]:
+    """Encode ``{**header, key: [rows...]}`` as a single JSON document, streamed chunk by chunk."""
+    prefix = json.dumps(header)[:-1]
+    yield (prefix + ", " if header else "{") + json.dumps(key) + ": ["
+    first = True
+    for chunk in _chunked((json.dumps(row) for row in rows), ", "):
+        yield chunk if first else ", " + chunk
+        first = False
+    yield "]}"
@@ -0,0 +1,71 @@
+import json
+import unittest
+
+from utils.scenario import coerce_parameter
+from utils.streaming import grid_size, iter_grid, iter_rows, json_array_stream, ndjson_stream
+
+
+class TestStreaming(unittest.TestCase):
+    """Test cases for streaming helpers."""
+
+    def test_iter_grid(self):
+        """Every combination is produced on top of the base parameters."""
+        grid = {"batch_size": [1, 2], "sequence_length": [10, 20, 30]}
+        combos = list(iter_grid({"model_size": 8}, grid))
+        self.assertEqual(grid_size(grid), 6)
+        self.assertEqual(len(combos), 6)
+        self.assertEqual(combos[0], {"model_size": 8, "batch_size": 1, "sequence_length": 10})
+        self.assertEqual(combos[-1], {"model_size": 8, "batch_size": 2, "sequence_length": 30})
+
+    def test_rows_are_lazy(self):
+        """Rows are only computed when the stream is consumed."""
+        calls = []
+        rows = iter_rows({}, {"x": list(range(1000))}, lambda params: calls.append(params["x"]) or {})
+        stream = ndjson_stream({"count": 1000}, rows)
+        next(stream)
+        self.assertEqual(calls, [])
+        next(stream)
+        self.assertEqual(len(calls), 64)
+
+    def test_ndjson_stream(self):
+        """NDJSON output has a header line followed by one row per line."""
+        rows = iter_rows({}, {"x": [1, 2, 3]}, lambda params: {"y": params["x"] * 2})
+        lines = "".join(ndjson_stream({"count": 3}, rows)).splitlines()
+        self.assertEqual(json.loads(lines[0]), {"count": 3})
+        self.assertEqual([json.loads(line)["memory_requirements"]["y"] for line in lines[1:]], [2, 4, 6])
+
+    def test_json_array_stream(self):
+        """The chunked JSON array output is one valid JSON document."""
+        for n in (0, 1, 64, 65, 200):
+            rows = iter_rows({}, {"x": list(range(n))}, lambda params: {})
+            document = json.loads("".join(json_array_stream({"count": n}, rows)))
+            self.assertEqual(document["count"], n)
+            self.assertEqual(len(document["rows"]), n)
+        self.assertEqual(json.loads("".join(json_array_stream({}, iter([{"a": 1}])))), {"rows": [{"a": 1}]})
+
+    def test_failed_row_keeps_stream_open(self):
+        """A combination that raises yields an error row and the following rows are still produced."""
+        rows = list(iter_rows({}, {"x": [1, 0, 2]}, lambda params: {"y": 1 / params["x"]}))
+        self.assertEqual([row["index"] for row in rows], [0, 1, 2])
+        self.assertIn("error", rows[1])
+        self.assertNotIn("memory_requirements", rows[1])
+        self.assertEqual(rows[2]["memory_requirements"], {"y": 0.5})
+
+    def test_grid_values_are_validated(self):
+        """Grid values are converted, and unconvertible or out of range values are rejected."""
+        self.assertEqual(coerce_parameter("batch_size", "8"), 8)
+        self.assertEqual(coerce_parameter("trainable_parameters", 12.5), 12.5)
+        for key, value in (
+            ("trainable_parameters", "abc"),
+            ("trainable_parameters", 150),
+            ("batch_size", "x"),
+            ("batch_size", 0),
+            ("batch_size", [1]),
+            ("precision", "fp7"),
+        ):
+            with self.assertRaises(ValueError):
+                coerce_parameter(key, value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Training step time, throughput and wall-clock estimates from a FLOPs / MFU model.
+
+Training FLOPs per token are ``2N`` for the forward pass, ``2N`` for the activation gradients and ``2N`` for
+the weight gradients of the trainable share of the parameters (so ``6N`` for full fine-tuning and about
+``4N`` for LoRA), plus the causal attention score and value products, which grow with the sequence length.
+Activation checkpointing recomputes the forward pass once more. ``N`` is the same parameter count the memory
+calculator uses (the activated parameters for MoE models).
+"""
+
+import math
+from typing import Any, Dict
+
+# Assumed model FLOPs utilization per method when none is given; quantized LoRA pays for dequantization
+DEFAULT_MFU = {"SFT": 0.4, "LoRA": 0.35, "QLoRA": 0.25}
+# Bytes per gradient element exchanged by the data parallel all-reduce (bf16)
+GRADIENT_BYTES = 2
+
+
+def training_flops_per_token(
+    params: Dict[str, Any],
+    active_model_size: float | None = None,
+    activation_checkpointing: bool = False,
+) -> Dict[str, float]:
+    """Return the training FLOPs per token, split into dense and attention terms.
+
+    Args:
+        params: Resolved training parameters (model_size, sequence_length, architecture, trainable_parameters)
+        active_model_size: Activated parameters in billions for MoE models
+        activation_checkpointing: Whether the forward pass is recomputed during the backward pass
+    """
+    n = (active_model_size or params["model_size"]) * 1e9
+    trainable = params.get("trainable_parameters", 100) / 100
+    forward = 2 * n
+    # Causal attention: QK^T and AV over half of the sequence on average, per layer
+    attention_forward = (
+        2
+        * params["num_hidden_layers"]
+        * params["sequence_length"]
+        * (params["num_attention_heads"] * params["head_dim"])
+    )
+    passes = 3 if activation_checkpointing else 2  # forward (+ recomputation) + activation gradients
+    dense = passes * forward + 2 * n * trainable
+    attention = (passes + 1) * attention_forward
+    return {"dense": dense, "attention": attention, "total": dense + attention}
+
+
+def estimate_training_time(
+    params: Dict[str, Any],
+    peak_tflops: float,
+    data_parallel_size: int = 1,
+    mfu: float = DEFAULT_MFU["SFT"],
+    gradient_accumulation_steps: int = 1,
+    dataset_tokens: float | None = None,
+    epochs: float = 1,
+    active_model_size: float | None = None,
+    activation_checkpointing: bool = False,
+    allreduce_bandwidth_gbps: float | None = None,
+    gpu_hour_price: float | None = None,
+) -> Dict[str, Any]:
+    """Estimate step time, throughput and the wall-clock time of a training run.
+
+    Args:
+        params: Resolved training parameters; ``batch_size`` is the micro-batch per GPU
+        peak_tflops: Dense BF16/FP16 peak of one GPU in TFLOPS
+        data_parallel_size: Number of data parallel GPUs
+        mfu: Model FLOPs utilization, the achieved fraction of ``peak_tflops``
+        gradient_accumulation_steps: Micro-batches per optimizer step
+        dataset_tokens: Tokens per epoch; the run estimate is skipped when None
+        epochs: Number of epochs
+        active_model_size: Activated parameters in billions for MoE models
+        activation_checkpointing: Whether activations are recomputed
+        allreduce_bandwidth_gbps: Bus bandwidth of the gradient all-reduce in GB/s; when given, the
+            all-reduce is added to the step time instead of being assumed to overlap with compute
+        gpu_hour_price: Price of one GPU hour, to estimate the cost of the run
+    """
+    if not 0 < mfu <= 1:
+        raise ValueError("mfu must be in (0, 1]")
+    if data_parallel_size < 1 or gradient_accumulation_steps < 1:
+        raise ValueError("data_parallel_size and gradient_accumulation_steps must be at least 1")
+    flops = training_flops_per_token(params, active_model_size, activation_checkpointing)
+    tokens_per_gpu_step = params["batch_size"] * params["sequence_length"] * gradient_accumulation_steps
+    tokens_per_step = tokens_per_gpu_step * data_parallel_size
+    compute_seconds = tokens_per_gpu_step * flops["total"] / (peak_tflops * 1e12 * mfu)
+    communication_seconds = 0.0
+    if allreduce_bandwidth_gbps and data_parallel_size > 1:
+        # Ring all-reduce moves 2 (p - 1) / p of the trainable gradients through every GPU
+        gradient_bytes = params["model_size"] * 1e9 * params.get("trainable_parameters", 100) / 100 * GRADIENT_BYTES
+        ring_factor = 2 * (data_parallel_size - 1) / data_parallel_size
+        communication_seconds = ring_factor * gradient_bytes / (allreduce_bandwidth_gbps * 1e9)
+    step_seconds = compute_seconds + communication_seconds
+    result: Dict[str, Any] = {
+        "flops_per_token": flops,
+        "mfu": mfu,
+        "data_parallel_size": data_parallel_size,
+        "tokens_per_step": tokens_per_step,
+        "step_time_seconds": round(step_seconds, 4),
+        "compute_time_seconds": round(compute_seconds, 4),
+        "communication_time_seconds": round(communication_seconds, 4),
+        "tokens_per_second": round(tokens_per_step / step_seconds, 1),
+        "tokens_per_second_per_gpu": round(tokens_per_gpu_step / step_seconds, 1),
+    }
+    if dataset_tokens:
+        steps = math.ceil(dataset_tokens * epochs / tokens_per_step)
+        wall_clock_seconds = steps * step_seconds
+        gpu_hours = wall_clock_seconds * data_parallel_size / 3600
+        result.update(
+            steps=steps,
+            wall_clock_seconds=round(wall_clock_seconds, 1),
+            wall_clock_hours=round(wall_clock_seconds / 3600, 2),
+            gpu_hours=round(gpu_hours, 2),
+            cost=round(gpu_hours * gpu_hour_price, 2) if gpu_hour_price is not None else None,
+        )
+    return result
@@ -0,0 +1,62 @@
+import unittest
+
+from utils.training_time import estimate_training_time, training_flops_per_token
+
+QWEN3_8B = {
+    "model_size": 8,
+    "precision": "bfloat16",
+    "num_hidden_layers": 36,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "head_dim": 128,
+    "num_key_value_heads": 8,
+    "batch_size": 4,
+    "sequence_length": 4096,
+    "trainable_parameters": 100,
+}
+
+
+class TestTrainingTime(unittest.TestCase):
+    """Test cases for the training throughput estimator."""
+
+    def test_flops_per_token(self):
+        """Full fine-tuning costs 6N dense FLOPs per token and LoRA about 4N."""
+        full = training_flops_per_token(QWEN3_8B)
+        self.assertEqual(full["dense"], 6 * 8e9)
+        self.assertEqual(full["attention"], 3 * 2 * 36 * 4096 * 32 * 128)
+        lora = training_flops_per_token({**QWEN3_8B, "trainable_parameters": 0})
+        self.assertEqual(lora["dense"], 4 * 8e9)
+        checkpointed = training_flops_per_token(QWEN3_8B, activation_checkpointing=True)
+        self.assertEqual(checkpointed["dense"], 8 * 8e9)
+        moe = training_flops_per_token({**QWEN3_8B, "model_size": 30}, active_model_size=3)
+        self.assertEqual(moe["dense"], 6 * 3e9)
+
+    def test_step_time_and_wall_clock(self):
+        """Step time follows from FLOPs, peak and MFU; wall clock from the dataset size."""
+        result = estimate_training_time(QWEN3_8B, peak_tflops=1000, mfu=0.5, dataset_tokens=16384 * 10)
+        flops = training_flops_per_token(QWEN3_8B)["total"]
+        self.assertAlmostEqual(result["step_time_seconds"], 16384 * flops / 5e14, places=3)
+        self.assertEqual(result["steps"], 10)
+        self.assertAlmostEqual(result["tokens_per_second"], 16384 / result["step_time_seconds"], delta=1)
+        self.assertIsNone(result["cost"])
+
+    def test_data_parallel_scaling(self):
+        """More data parallel GPUs keep the step time and divide the run time."""
+        one = estimate_training_time(QWEN3_8B, 1000, dataset_tokens=1e9, gpu_hour_price=2)
+        eight = estimate_training_time(QWEN3_8B, 1000, data_parallel_size=8, dataset_tokens=1e9, gpu_hour_price=2)
+        self.assertEqual(one["step_time_seconds"], eight["step_time_seconds"])
+        self.assertAlmostEqual(
+            eight["wall_clock_seconds"] * 8, one["wall_clock_seconds"], delta=one["step_time_seconds"] * 8
+        )
+        self.assertAlmostEqual(eight["cost"], one["cost"], delta=1)
+        slow = estimate_training_time(QWEN3_8B, 1000, data_parallel_size=8, allreduce_bandwidth_gbps=50)
+        self.assertAlmostEqual(slow["communication_time_seconds"], 2 * 7 / 8 * 16e9 / 50e9, places=3)
+
+    def test_invalid_mfu(self):
+        """MFU must be a fraction."""
+        with self.assertRaises(ValueError):
+            estimate_training_time(QWEN3_8B, 1000, mfu=40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""Prefork startup: finalize shared state in the uWSGI master, warm up hot paths, then freeze the GC.
+
+With ``lazy-apps = false`` the app is imported once in the master and the workers are forked from it, sharing
+its memory copy-on-write. Two things undo the sharing. Lazily built state (Werkzeug's compiled URL map, the
+JSON provider, imports inside functions, regexes) is built again by every worker on its first requests, which
+also pay for it in latency. And the cyclic garbage collector writes to the header of every tracked object it
+visits, so the first collection in a worker copies every page of the catalog. ``prepare_for_fork`` serves
+representative requests in the master so that lazy state exists before the fork, then moves every object to
+the permanent generation with ``gc.freeze()``, which worker collections skip. The catalog is finalized first:
+keys and string values are interned, so the ~70 configs share one copy of each field name.
+
+``process_memory`` reads the shared and private RSS of a process from ``/proc/<pid>/smaps_rollup``; the
+``llm-worker-memory`` CLI reports it for every worker of a running uWSGI master, e.g. with ``PREFORK_WARMUP=0``
+and then with the default to compare.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# WSGI environ key marking warmup requests, which skip metrics and profiling
+WARMUP_ENVIRON_KEY = "llm_toolset.warmup"
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+}
+
+
+def _intern(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {sys.intern(k) if isinstance(k, str) else k: _intern(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def finalize_catalog(models: Dict[str, Dict[str, Any]]):
+    """Intern the keys and string values of every config in place, so that workers share one copy of each."""
+    for name in list(models):
+        models[sys.intern(name)] = _intern(models.pop(name))
+
+
+def process_memory(pid: int | str = "self") -> Dict[str, float] | None:
+    """Resident memory of a process split into shared and private pages, in MB; None without /proc."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    memory = dict.fromkeys(sorted(set(_SMAPS_FIELDS.values())), 0.0)
+    for line in lines:
+        field, _, rest = line.partition(":")
+        if field in _SMAPS_FIELDS:
+            memory[_SMAPS_FIELDS[field]] += int(rest.split()[0]) / 1024
+    return {key: round(value, 1) for key, value in memory.items()}
+
+
+def warm_up(
+    client_factory: Callable[[], Any], requests: Iterable[Tuple[str, str, Dict[str, Any] | None]]
+) -> Dict[str, Any]:
+    """Serve ``requests`` through a test client and report how long they took and which ones failed.
+
+    Args:
+        client_factory: Returns a Flask test client, e.g. ``app.test_client``
+        requests: (method, path, JSON body or None) tuples
+    """
+    start = time.perf_counter()
+    client = client_factory()
+    failed: List[Dict[str, Any]] = []
+    count = 0
+    for method, path, body in requests:
+        count += 1
+        try:
+            response = client.open(path, method=method, json=body, environ_overrides={WARMUP_ENVIRON_KEY: True})
+            # Streamed responses only run when consumed
+            response.get_data()
+            if response.status_code >= 400:
+                failed.append({"path": path, "status": response.status_code})
+        except Exception as e:
+            failed.append({"path": path, "error": str(e)})
+    return {"requests": count, "failed": failed, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def prepare_for_fork(
+    models: Dict[str, Dict[str, Any]],
+    client_factory: Callable[[], Any],
+    requests: Iterable[Tuple[str, str, Dict[str, Any] | None]],
+) -> Dict[str, Any]:
+    """Finalize the catalog, warm up, and freeze every object allocated so far out of the GC's reach.
+
+    The GC should be disabled (``gc.disable()``) before the catalog is loaded, so that no collection frees
+    objects between the shared ones and leaves holes that later allocations would fill; it is re-enabled here,
+    also when the warmup raises.
+
+    Returns:
+        The warmup report, with the frozen object count and the memory of this process
+    """
+    try:
+        finalize_catalog(models)
+        report = warm_up(client_factory, requests)
+        gc.collect()
+        gc.freeze()
+    finally:
+        gc.enable()
+    report.update(frozen_objects=gc.get_freeze_count(), memory=process_memory())
+    return report
+
+
+def _children(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计 uWSGI 主进程及各工作进程的共享/私有常驻内存")
+    parser.add_argument("--pidfile", default="LLMToolsetBackendServer.pid", help="uWSGI 主进程 PID 文件")
+    parser.add_argument("--pid", type=int, default=None, help="主进程 PID，优先于 --pidfile")
+    args = parser.parse_args()
+
+    if args.pid is None:
+        with open(args.pidfile) as f:
+            args.pid = int(f.read().strip())
+    master = process_memory(args.pid)
+    if master is None:
+        print(f"/proc/{args.pid}/smaps_rollup is not readable (Linux only)", file=sys.stderr)
+        return 1
+    workers = {pid: process_memory(pid) for pid in _children(args.pid)}
+    workers = {pid: memory for pid, memory in workers.items() if memory is not None}
+    report: Dict[str, Any] = {"master": {"pid": args.pid, **master}, "workers": []}
+    report["workers"] = [{"pid": pid, **memory} for pid, memory in sorted(workers.items())]
+    if workers:
+        report["private_mb_per_worker"] = round(sum(m["private_mb"] for m in workers.values()) / len(workers), 1)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import gc
+import os
+import sys
+import unittest
+
+from flask import Flask, jsonify, request
+
+from utils.warmup import WARMUP_ENVIRON_KEY, finalize_catalog, prepare_for_fork, process_memory, warm_up
+
+
+def make_app():
+    app = Flask(__name__)
+    seen = []
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        seen.append(request.environ.get(WARMUP_ENVIRON_KEY))
+        return jsonify(request.get_json())
+
+    @app.route("/fail")
+    def fail():
+        return jsonify({"error": "nope"}), 500
+
+    return app, seen
+
+
+class TestWarmup(unittest.TestCase):
+    """Test cases for the prefork warmup."""
+
+    def test_finalize_catalog_interns_strings(self):
+        """Keys and string values of different configs become the same objects, contents unchanged."""
+        suffix = str(os.getpid())
+        models = {
+            "a": {"torch_dtype" + suffix: "bfloat16" + suffix, "layers": [{"type": "full" + suffix}]},
+            "b": {"torch_dtype" + suffix: "bfloat16" + suffix, "layers": [{"type": "full" + suffix}]},
+        }
+        key_a, key_b = (next(iter(models[name])) for name in "ab")
+        self.assertIsNot(key_a, key_b)
+        finalize_catalog(models)
+        self.assertEqual(list(models), ["a", "b"])
+        self.assertEqual(models["a"], models["b"])
+        key_a, key_b = (next(iter(models[name])) for name in "ab")
+        self.assertIs(key_a, key_b)
+        self.assertIs(models["a"][key_a], models["b"][key_b])
+        self.assertIs(models["a"]["layers"][0]["type"], sys.intern("full" + suffix))
+
+    def test_warm_up_reports_failures(self):
+        """Warmup requests are marked in the environ and failing paths are reported, not raised."""
+        app, seen = make_app()
+        report = warm_up(app.test_client, [("POST", "/echo", {"x": 1}), ("GET", "/fail", None)])
+        self.assertEqual(report["requests"], 2)
+        self.assertEqual(seen, [True])
+        self.assertEqual(report["failed"], [{"path": "/fail", "status": 500}])
+
+    def test_prepare_for_fork_freezes(self):
+        """Objects allocated before the fork are frozen and the GC is enabled again."""
+        app, _ = make_app()
+        gc.disable()
+        try:
+            report = prepare_for_fork({}, app.test_client, [("POST", "/echo", {})])
+            self.assertTrue(gc.isenabled())
+            self.assertGreater(report["frozen_objects"], 0)
+            # Frozen objects that are freed later leave the permanent generation
+            self.assertLessEqual(gc.get_freeze_count(), report["frozen_objects"])
+        finally:
+            gc.unfreeze()
+            gc.enable()
+
+    def test_prepare_for_fork_enables_gc_on_error(self):
+        """A warmup that raises does not leave the GC disabled."""
+        app, _ = make_app()
+        gc.disable()
+        try:
+            with self.assertRaises(TypeError):
+                prepare_for_fork(None, app.test_client, [])
+            self.assertTrue(gc.isenabled())
+        finally:
+            gc.enable()
+
+    @unittest.skipUnless(os.path.exists("/proc/self/smaps_rollup"), "requires Linux /proc")
+    def test_process_memory(self):
+        """Shared and private pages add up to the RSS."""
+        memory = process_memory()
+        self.assertGreater(memory["rss_mb"], 0)
+        self.assertAlmostEqual(memory["shared_mb"] + memory["private_mb"], memory["rss_mb"], delta=0.5)
+        self.assertIsNone(process_memory(2**31))
+
+
+if __name__ == "__main__":
+    unittest.main()
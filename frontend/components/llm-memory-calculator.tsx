@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useMemo, useState } from 'react';
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 import Link from 'next/link';
 import { useQuery } from '@tanstack/react-query';
 import { Bug, Calculator, HelpCircle } from 'lucide-react';
@@ -10,6 +10,7 @@ import {
   calculateInferenceMemory,
   calculateTrainingMemory,
   fetchConfigOptions,
+  LiveCalculationChannel,
   type CalculationResponse,
   type MemoryCalculationRequest,
 } from '@/lib/api';
@@ -78,31 +79,62 @@ export function LLMMemoryCalculator() {
     }
   }, [models, selectedModel]);
 
-  const handleCalculate = async () => {
-    setIsCalculating(true);
+  const buildRequest = useCallback((): MemoryCalculationRequest => {
+    const request: MemoryCalculationRequest = {
+      model_name: selectedModel,
+      precision: parameters.precision,
+      batch_size: parameters.batchSize,
+      sequence_length: parameters.sequenceLength,
+      kv_cache_precision: parameters.kvCachePrecision,
+      use_flash_attention: parameters.useFlashAttention,
+      use_page_attention: parameters.usePageAttention,
+    };
+    if (calculationType === 'training') {
+      return { ...request, optimizer: parameters.optimizer, trainable_parameters: parameters.trainableParams };
+    }
+    return request;
+  }, [calculationType, selectedModel, parameters]);
+
+  const fetchResult = useCallback(async (type: 'inference' | 'training', request: MemoryCalculationRequest) => {
     try {
-      const request: MemoryCalculationRequest = {
-        model_name: selectedModel,
-        precision: parameters.precision,
-        batch_size: parameters.batchSize,
-        sequence_length: parameters.sequenceLength,
-        kv_cache_precision: parameters.kvCachePrecision,
-        use_flash_attention: parameters.useFlashAttention,
-        use_page_attention: parameters.usePageAttention,
-      };
-      let response: CalculationResponse;
-      if (calculationType === 'inference') {
-        response = await calculateInferenceMemory(request);
-      } else {
-        response = await calculateTrainingMemory({
-          ...request,
-          optimizer: parameters.optimizer,
-          trainable_parameters: parameters.trainableParams,
-        });
-      }
+      const response =
+        type === 'inference' ? await calculateInferenceMemory(request) : await calculateTrainingMemory(request);
       setResult(response);
     } catch (error) {
       console.error('Error calculating memory:', error);
+    }
+  }, []);
+
+  // Live channel: input changes are sent as deltas and the result shown as soon as it arrives. The first result
+  // comes from the HTTP API, so a visitor who does not edit anything never opens a channel.
+  const liveChannel = useRef<LiveCalculationChannel | null>(null);
+  const edited = useRef(false);
+  useEffect(() => {
+    const channel = new LiveCalculationChannel(
+      setResult,
+      (error) => console.error('Error calculating memory:', error),
+      (type, request) => void fetchResult(type, request),
+    );
+    liveChannel.current = channel;
+    return () => channel.close();
+  }, [fetchResult]);
+
+  useEffect(() => {
+    if (!selectedModel) {
+      return;
+    }
+    const request = buildRequest();
+    if (edited.current && liveChannel.current?.update(calculationType, request)) {
+      return;
+    }
+    edited.current = true;
+    void fetchResult(calculationType, request);
+  }, [calculationType, selectedModel, buildRequest, fetchResult]);
+
+  const handleCalculate = async () => {
+    setIsCalculating(true);
+    try {
+      await fetchResult(calculationType, buildRequest());
     } finally {
       setIsCalculating(false);
     }
@@ -108,3 +108,158 @@ export async function calculateTrainingMemory(request: MemoryCalculationRequest)
 
   return response.json();
 }
+
+export type LiveMessage =
+  | (CalculationResponse & { type: 'result'; seq: number })
+  | { type: 'error'; seq: number; error: string };
+
+type LiveParams = Record<string, string | number | boolean>;
+
+/**
+ * Recalculation channel: sends only the fields that changed and receives results as they are computed. The
+ * server coalesces rapid updates, so a slider drag never queues up stale calculations.
+ *
+ * The socket holds a server worker thread, so it is opened on the first update and closed after a short idle
+ * period. When it cannot be opened (e.g. 503 because the server's channels are taken) or closes before
+ * answering, the unanswered request is handed to `onFallback` for the HTTP API.
+ */
+export class LiveCalculationChannel {
+  private static readonly IDLE_TIMEOUT_MS = 10000;
+  private static readonly MIN_RETRY_DELAY_MS = 5000;
+  private static readonly MAX_RETRY_DELAY_MS = 300000;
+
+  private socket: WebSocket | null = null;
+  private seq = 0;
+  private latestSeq = 0;
+  private calculationType: 'inference' | 'training' | null = null;
+  private sent: LiveParams = {};
+  // Latest request not answered over the socket yet
+  private pending: ['inference' | 'training', MemoryCalculationRequest] | null = null;
+  private retryDelay = LiveCalculationChannel.MIN_RETRY_DELAY_MS;
+  private retryAt = 0;
+  private idleTimer: ReturnType<typeof setTimeout> | null = null;
+
+  constructor(
+    private readonly onResult: (response: CalculationResponse) => void,
+    private readonly onError: (error: Error) => void,
+    private readonly onFallback: (calculationType: 'inference' | 'training', request: MemoryCalculationRequest) => void,
+  ) {}
+
+  /** Send the changed fields of `request`; returns false when the caller should use the HTTP API instead. */
+  update(calculationType: 'inference' | 'training', request: MemoryCalculationRequest): boolean {
+    if (!this.socket) {
+      // After a failed open, retry with backoff instead of hammering a busy server
+      if (Date.now() < this.retryAt) {
+        return false;
+      }
+      this.open();
+    }
+    this.pending = [calculationType, request];
+    this.resetIdleTimer();
+    if (this.socket?.readyState === WebSocket.OPEN) {
+      this.send(calculationType, request);
+    }
+    return true;
+  }
+
+  close() {
+    this.pending = null;
+    this.disconnect();
+  }
+
+  private open() {
+    let opened = false;
+    const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/api/live`);
+    socket.onmessage = (event) => {
+      const message: LiveMessage = JSON.parse(event.data);
+      if (message.seq === this.seq) {
+        this.pending = null;
+      }
+      // Results older than the one on screen were superseded by a later update
+      if (message.seq < this.latestSeq) {
+        return;
+      }
+      this.latestSeq = message.seq;
+      if (message.type === 'error') {
+        this.onError(new Error(message.error));
+      } else {
+        this.onResult(message);
+      }
+    };
+    socket.onopen = () => {
+      opened = true;
+      this.retryDelay = LiveCalculationChannel.MIN_RETRY_DELAY_MS;
+      if (this.pending) {
+        this.send(...this.pending);
+      }
+    };
+    socket.onclose = () => {
+      if (this.socket !== socket) {
+        return;
+      }
+      this.disconnect();
+      if (!opened) {
+        this.retryAt = Date.now() + this.retryDelay;
+        this.retryDelay = Math.min(this.retryDelay * 2, LiveCalculationChannel.MAX_RETRY_DELAY_MS);
+      }
+      // The server session is gone with the connection; the next update opens a new one with the full state
+      if (this.pending) {
+        const [calculationType, request] = this.pending;
+        this.pending = null;
+        this.onFallback(calculationType, request);
+      }
+    };
+    this.socket = socket;
+    this.sent = {};
+    this.calculationType = null;
+  }
+
+  private send(calculationType: 'inference' | 'training', request: MemoryCalculationRequest) {
+    const params: Record<string, string | number | boolean | null> = {};
+    const next = request as unknown as LiveParams;
+    for (const [key, value] of Object.entries(next)) {
+      if (value !== undefined && this.sent[key] !== value) {
+        params[key] = value;
+      }
+    }
+    for (const key of Object.keys(this.sent)) {
+      if (next[key] === undefined) {
+        params[key] = null;
+      }
+    }
+    if (Object.keys(params).length === 0 && calculationType === this.calculationType) {
+      // The result on screen is already for this state
+      this.pending = null;
+      return;
+    }
+    this.seq += 1;
+    this.socket?.send(JSON.stringify({ seq: this.seq, calculation_type: calculationType, params }));
+    this.sent = Object.fromEntries(Object.entries(next).filter(([, value]) => value !== undefined));
+    this.calculationType = calculationType;
+  }
+
+  private resetIdleTimer() {
+    if (this.idleTimer) {
+      clearTimeout(this.idleTimer);
+    }
+    this.idleTimer = setTimeout(() => {
+      this.idleTimer = null;
+      const pending = this.pending;
+      this.pending = null;
+      this.disconnect();
+      if (pending) {
+        this.onFallback(...pending);
+      }
+    }, LiveCalculationChannel.IDLE_TIMEOUT_MS);
+  }
+
+  private disconnect() {
+    if (this.idleTimer) {
+      clearTimeout(this.idleTimer);
+      this.idleTimer = null;
+    }
+    const socket = this.socket;
+    this.socket = null;
+    socket?.close();
+  }
+}